@@ -25,13 +25,32 @@ SOFTWARE.
 __all__: 'PCTspice'
 
 
-#TO-DO LIST:
-# Add EXPORT feature
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import functools
+import gc
+import glob
+import hashlib
+import http.server
+import importlib.util
+import io
+import json
+import mmap
+import os
+import sys
+import threading
+import time
+import tracemalloc
 
 try:
-    from sympy import Matrix
+    import numpy
+    from scipy.sparse import coo_matrix, csc_matrix, diags, tril
+    from scipy.sparse.csgraph import connected_components, reverse_cuthill_mckee
+    from scipy.sparse.linalg import LinearOperator, bicgstab, cg, gmres, spilu, splu
 except ModuleNotFoundError:
-    print("\033[1;31;40m" + "ERROR: SymPy python module required for PCTspice calculations.\nPlease install SymPy to proceed.\n\nUse the terminal command \"pip install sympy\" to install using the Python package manager." + "\033[0m")
+    print("\033[1;31;40m" + "ERROR: NumPy and SciPy python modules required for PCTspice calculations.\nPlease install NumPy and SciPy to proceed.\n\nUse the terminal command \"pip install numpy scipy\" to install using the Python package manager." + "\033[0m")
     print("\n\033[1;37;40mPress [ENTER] to close terminal.\033[38;5;0m\033[?25l")
     input()
     print("\033[0m\033[?25h")
@@ -40,15 +59,177 @@ except ModuleNotFoundError:
 #__________________________________________________________________________________________________________________________________________
 #OBJECT DEFS
 
-class Branch: # Stores entered branches by recording start node, end node, component name, and component value.
+compTypeCodes = {'R': 0, 'V': 1, 'I': 2, 'D': 3}    # Component type letter -> code stored in Netlist.compTypes
+
+
+
+class Profiler: # Collects wall time, call counts and peak traced memory for each phase of the solver while enabled.  When disabled, a phase costs one attribute check.
+    def __init__(self):
+        self.enabled = False
+        self.trace = None           # Open trace file, written with one JSON record per finished phase
+        self.phases = {}            # Phase name -> [calls, total seconds, largest peak memory added in bytes]
+        self.values = {}            # Name -> last recorded value, such as the size of the last factored matrix
+        self.stack = []             # [phase name, peak traced bytes] of the phases currently running, outermost first
+        self.threadID = None        # Only phases on the thread that enabled the profiler are timed, so that the stack stays in order
+        self.startedTracing = False
+    #END def __init__()
+
+
+    def enable(self, traceName = None, memory = True): # Starts collecting, and writes a trace file if a name is given.  With memory off, phases are timed without tracemalloc and report no peak memory.
+        self.disable()
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.startedTracing = True
+        if traceName:
+            self.trace = open(traceName, "wt")
+        self.threadID = threading.get_ident()
+        self.enabled = True
+    #END def enable()
+
+
+    def disable(self): # Stops collecting and closes the trace file.  Collected statistics are kept.
+        self.enabled = False
+        if self.trace:
+            self.trace.close()
+            self.trace = None
+        if self.startedTracing:
+            tracemalloc.stop()
+            self.startedTracing = False
+    #END def disable()
+
+
+    def reset(self): # Clears collected statistics.
+        self.phases = {}
+        self.values = {}
+    #END def reset()
+
+
+    def phase(self, name): # Returns a context manager that times a block as a phase, or a shared no-op one while disabled.
+        if not self.enabled:
+            return nullPhase
+        return self.timedPhase(name)
+    #END def phase()
+
+
+    def profiled(self, name): # Decorator that runs a function as a phase.
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with self.timedPhase(name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+    #END def profiled()
+
+
+    @contextlib.contextmanager
+    def timedPhase(self, name):
+        if threading.get_ident() != self.threadID:
+            yield
+            return
+
+        # tracemalloc keeps a single peak, so it is saved into the enclosing phase and reset here, then passed back up when this phase ends
+        current, peak = tracemalloc.get_traced_memory()
+        if self.stack:
+            self.stack[-1][1] = max(self.stack[-1][1], peak)
+        tracemalloc.reset_peak()
+        entry = [name, current]
+        self.stack.append(entry)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.stack.pop()
+            peak = max(entry[1], tracemalloc.get_traced_memory()[1])
+            if self.stack:
+                self.stack[-1][1] = max(self.stack[-1][1], peak)
+
+            record = self.phases.setdefault(name, [0, 0.0, 0])
+            record[0] += 1
+            record[1] += seconds
+            record[2] = max(record[2], peak - current)
+            if self.trace:
+                self.trace.write(json.dumps({"phase": name, "parent": self.stack[-1][0] if self.stack else None, "start": start, "seconds": seconds, "peakBytes": peak - current}) + "\n")
+    #END def timedPhase()
+
+
+    def note(self, name, value): # Records a value, such as a matrix size, while enabled.
+        if self.enabled:
+            self.values[name] = value
+    #END def note()
+
+#END class Profiler
+
+
+nullPhase = contextlib.nullcontext()
+profiler = Profiler()     # Shared by every solver function.  Enabled by the STATS command.
+
+
+
+
+class Branch: # Stores entered branches by recording start node, end node, component name, and component value.  Branches in a Netlist are views that read and write its arrays.
+    __slots__ = ("netlist", "index", "_startNode", "_endNode", "_compVal", "_compName")
+
     def __init__(self, startNode, endNode, compVal, compName):
-        self.startNode = startNode.upper()
-        self.endNode = endNode.upper()
-        self.compVal = int(compVal)
-        self.compName = compName.upper()
+        self.netlist = None
+        self.index = None
+        self._startNode = startNode.upper()
+        self._endNode = endNode.upper()
+        self._compVal = int(compVal)
+        self._compName = compName.upper()
     #END def __init__()
 
 
+    @classmethod
+    def view(cls, netlist, index): # Returns a Branch that reads row number index of a Netlist instead of holding its own data.
+        branch = cls.__new__(cls)
+        branch.netlist = netlist
+        branch.index = index
+        return branch
+    #END def view()
+
+
+    @property
+    def startNode(self):
+        if self.netlist is None:
+            return self._startNode
+        return self.netlist.nodeName(self.netlist.startIDs[self.index])
+
+    @property
+    def endNode(self):
+        if self.netlist is None:
+            return self._endNode
+        return self.netlist.nodeName(self.netlist.endIDs[self.index])
+
+    @property
+    def compName(self):
+        if self.netlist is None:
+            return self._compName
+        return self.netlist.compNames[self.index]
+
+    @compName.setter
+    def compName(self, compName):
+        if self.netlist is not None:
+            raise AttributeError("Components in a Netlist cannot be renamed.  Use Netlist.replaceBranch() instead.")
+        self._compName = compName
+
+    @property
+    def compVal(self):
+        if self.netlist is None:
+            return self._compVal
+        return float(self.netlist.compVals[self.index])
+
+    @compVal.setter
+    def compVal(self, compVal):
+        if self.netlist is None:
+            self._compVal = compVal
+        else:
+            self.netlist.compVals[self.index] = compVal
+
+
     def printBranch(branch): # Prints branch in a readable format.
         if branch.compVal:
             compValStr = engNot(branch.compVal, "to", short= True)
@@ -60,7 +241,7 @@ class Branch: # Stores entered branches by recording start node, end node, compo
     
     def validComp(branch):
         
-        validComps = ['R', 'V', 'I']
+        validComps = ['R', 'V', 'I', 'D']
         
         compType = ""
 
@@ -78,6 +259,1112 @@ class Branch: # Stores entered branches by recording start node, end node, compo
 
 
 
+class Netlist: # Array-backed store of entered branches.  Row n of each array describes branch n, and Netlist.branches gives Branch views of the rows.  Nodes get integer IDs in order of first use, GND is always -1.
+    def __init__(self, capacity = 16):
+        self.count = 0              # Number of branches.  The arrays below have spare rows past this for appending.
+        self.rowStartIDs = numpy.zeros(capacity, dtype=numpy.int32)     # Branch number -> start node ID
+        self.rowEndIDs = numpy.zeros(capacity, dtype=numpy.int32)       # Branch number -> end node ID
+        self.rowCompTypes = numpy.zeros(capacity, dtype=numpy.uint8)    # Branch number -> component type code from compTypeCodes
+        self.rowCompVals = numpy.zeros(capacity, dtype=numpy.float64)   # Branch number -> component value
+        self.compNames = []         # Branch number -> component name
+        self.nodeNames = []         # Node ID -> node name
+        self._nodeIDs = {}          # Node name -> node ID, or None until first used after fromArrays()
+        self._compIndex = {}        # Component name -> branch number, or None until first used after fromArrays()
+        self._adjacency = None      # (offsets, branch numbers) per node, or None until first used after the branches change
+    #END def __init__()
+
+
+    # Views of the filled rows.  Writing to compVals changes the stored values.
+    @property
+    def startIDs(self):
+        return self.rowStartIDs[0:self.count]
+
+    @property
+    def endIDs(self):
+        return self.rowEndIDs[0:self.count]
+
+    @property
+    def compTypes(self):
+        return self.rowCompTypes[0:self.count]
+
+    @property
+    def compVals(self):
+        return self.rowCompVals[0:self.count]
+
+    @property
+    def branches(self):
+        return BranchRows(self)
+
+
+    # Name lookups.  A Netlist built from whole columns makes them on first use, so loading a file does not pay for a million dictionary entries it may never read.
+    @property
+    def nodeIDs(self):
+        if self._nodeIDs is None:
+            self._nodeIDs = dict(zip(self.nodeNames, range(len(self.nodeNames))))
+        return self._nodeIDs
+
+    @property
+    def compIndex(self):
+        if self._compIndex is None:
+            self._compIndex = dict(zip(self.compNames, range(self.count)))
+        return self._compIndex
+
+
+    @classmethod
+    def fromArrays(cls, nodeNames, startIDs, endIDs, compTypes, compVals, compNames): # Builds a Netlist from whole columns at once, such as the arrays of a binary file.  The arrays are copied into the row arrays, and the name lookups are left to be built on first use.
+        netlist = cls(max(16, len(compNames)))
+        netlist.count = len(compNames)
+        netlist.rowStartIDs[0:netlist.count] = startIDs
+        netlist.rowEndIDs[0:netlist.count] = endIDs
+        netlist.rowCompTypes[0:netlist.count] = compTypes
+        netlist.rowCompVals[0:netlist.count] = compVals
+        netlist.compNames = list(compNames)
+        netlist.nodeNames = list(nodeNames)
+        netlist._nodeIDs = None
+        netlist._compIndex = None
+        return netlist
+    #END def fromArrays()
+
+
+    def nodeID(self, nodeName): # Returns the ID of a node, adding it if it is new.
+        if nodeName == "GND":
+            return -1
+        if nodeName not in self.nodeIDs:
+            self.nodeIDs[nodeName] = len(self.nodeNames)
+            self.nodeNames.append(sys.intern(nodeName))
+        return self.nodeIDs[nodeName]
+    #END def nodeID()
+
+
+    def nodeName(self, nodeID): # Returns the name of a node ID.
+        if nodeID < 0:
+            return "GND"
+        return self.nodeNames[nodeID]
+    #END def nodeName()
+
+
+    def addBranch(self, branch): # Appends a branch and indexes its nodes and component.  Returns the branch number.
+        index = self.count
+        if index == len(self.rowCompVals):
+            capacity = 2 * index
+            for name in ["rowStartIDs", "rowEndIDs", "rowCompTypes", "rowCompVals"]:
+                column = getattr(self, name)
+                grown = numpy.zeros(capacity, dtype=column.dtype)
+                grown[0:index] = column
+                setattr(self, name, grown)
+
+        self.rowStartIDs[index] = self.nodeID(branch.startNode)
+        self.rowEndIDs[index] = self.nodeID(branch.endNode)
+        self.rowCompTypes[index] = compTypeCodes[branch.compName[0]]
+        self.rowCompVals[index] = branch.compVal
+        self.compNames.append(branch.compName)
+        self.compIndex[branch.compName] = index
+        self.count += 1
+        self._adjacency = None
+        return index
+    #END def addBranch()
+
+
+    def replaceBranch(self, index, branch): # Replaces a branch and rebuilds the indexes, so node IDs stay contiguous when a node loses its last branch.
+        branches = []
+        for b in self.branches:
+            detached = Branch(b.startNode, b.endNode, 0, b.compName)
+            detached.compVal = b.compVal
+            branches.append(detached)
+        branches[index] = branch
+        self.__init__()
+        for b in branches:
+            self.addBranch(b)
+    #END def replaceBranch()
+
+
+    def getBranch(self, compName): # Returns the branch holding a component, or None.
+        if compName in self.compIndex:
+            return Branch.view(self, self.compIndex[compName])
+        return None
+    #END def getBranch()
+
+
+    def adjacency(self): # Returns the per-node adjacency arrays (offsets, branch numbers), with the branches starting or ending at node n in branch order at branch numbers[offsets[n]:offsets[n+1]].  GND has no entry.
+        if self._adjacency is None:
+            ends = numpy.concatenate((self.startIDs, self.endIDs)).astype(numpy.int64)
+            branchIDs = numpy.tile(numpy.arange(self.count, dtype=numpy.int32), 2)
+            onNode = ends >= 0
+            ends = ends[onNode]
+            branchIDs = branchIDs[onNode]
+            order = numpy.lexsort((branchIDs, ends))
+            offsets = numpy.zeros(len(self.nodeNames) + 1, dtype=numpy.int64)
+            numpy.cumsum(numpy.bincount(ends, minlength=len(self.nodeNames)), out=offsets[1:])
+            self._adjacency = (offsets, branchIDs[order])
+        return self._adjacency
+    #END def adjacency()
+
+
+    def nodeBranches(self, nodeName): # Returns the numbers of the branches starting or ending at a node.  Raises KeyError for an unknown node.
+        offsets, branchIDs = self.adjacency()
+        node = self.nodeIDs[nodeName]
+        return branchIDs[offsets[node]:offsets[node+1]]
+    #END def nodeBranches()
+
+
+
+    @profiler.profiled("islands")
+    def islands(self): # Splits the nodes into islands joined by R and V branches.  Returns the island number of each node and whether each island has a branch to GND.
+        nodeCount = len(self.nodeNames)
+        if not nodeCount:
+            return numpy.zeros(0, dtype=numpy.int32), numpy.zeros(0, dtype=bool)
+        start = numpy.asarray(self.startIDs, dtype=numpy.int64)
+        end = numpy.asarray(self.endIDs, dtype=numpy.int64)
+        conductive = self.compTypes != compTypeCodes['I']    # Current sources only add to the right-hand side
+
+        # Each branch between two nodes once, rather than the adjacency arrays, which hold every branch twice and would double the peak memory
+        inner = conductive & (start >= 0) & (end >= 0)
+        graph = coo_matrix((numpy.ones(int(inner.sum())), (start[inner], end[inner])), shape=(nodeCount, nodeCount))
+        islandCount, labels = connected_components(graph, directed=False)
+
+        grounded = numpy.zeros(islandCount, dtype=bool)
+        tied = conductive & ((start < 0) != (end < 0))
+        grounded[labels[numpy.maximum(start[tied], end[tied])]] = True
+        return labels, grounded
+    #END def islands()
+
+
+    def nonlinear(self): # Returns True if any branch is a diode, which needs NewtonFactor instead of one linear solve.
+        return bool(numpy.any(self.compTypes == compTypeCodes['D']))
+    #END def nonlinear()
+
+
+    def floatingNodes(self): # Returns the names of nodes in islands with no path to GND, whose voltages are undefined.
+        labels, grounded = self.islands()
+        return [self.nodeNames[i] for i in numpy.flatnonzero(~grounded[labels])]
+    #END def floatingNodes()
+
+#END class Netlist
+
+
+
+class BranchRows: # Sequence of Branch views over the rows of a Netlist, returned by Netlist.branches.
+    def __init__(self, netlist):
+        self.netlist = netlist
+    #END def __init__()
+
+
+    def __len__(self):
+        return self.netlist.count
+
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [Branch.view(self.netlist, i) for i in range(*index.indices(self.netlist.count))]
+        if index < 0:
+            index += self.netlist.count
+        if not 0 <= index < self.netlist.count:
+            raise IndexError("Branch number out of range.")
+        return Branch.view(self.netlist, index)
+
+
+    def __iter__(self):
+        return (Branch.view(self.netlist, i) for i in range(self.netlist.count))
+
+#END class BranchRows
+
+
+
+class FloatingNodeError(RuntimeError): # Raised instead of factoring a singular matrix when part of the circuit has no path to GND through resistors or voltage sources.
+    def __init__(self, nodes):
+        self.nodes = nodes
+        names = ", ".join(nodes[0:10])
+        if len(nodes) > 10:
+            names = names + " and %d more" %(len(nodes) - 10)
+        super().__init__("Floating nodes not connected to GND: %s." %names)
+    #END def __init__()
+
+#END class FloatingNodeError
+
+
+
+class ConvergenceError(RuntimeError): # Raised by the ITERATIVE backend when a solve does not reach its tolerance within the iteration limit, and when Newton-Raphson fails to find the operating point of a circuit with diodes.
+    def __init__(self, stats):
+        self.stats = stats
+        super().__init__("%s solver did not converge after %d iterations.  Relative residual %.3g, tolerance %.3g." %(stats["method"], stats["iterations"], stats["residual"], stats["tolerance"]))
+    #END def __init__()
+
+#END class ConvergenceError
+
+
+
+class MNAFactor: # Keeps the factored MNA matrix of a circuit so that value-only edits can be solved without a new factorization.
+    maxRank = 32    # Number of edited resistors carried as low-rank updates before a full refactorization.
+    theveninBlock = 256     # Node pairs solved together by thevenin(), bounding the size of the dense right-hand side
+    editedState = ["compVals", "rhs", "updateCols", "updateStart", "updateEnd", "updateDelta"]    # Attributes that update() changes in place, copied by snapshot()
+
+    def __init__(self, netlist, backend = "SPARSE", ordering = "MMD"):
+        self.netlist = netlist
+        self.backend = backend.upper()
+        self.ordering = orderingAliases.get(ordering.upper(), ordering.upper())
+        self.order = None       # Fill-reducing elimination order, found by the first factorization and reused while the topology is unchanged
+        self.compVals = numpy.array(netlist.compVals)      # Branch number -> value, including edits not yet factored
+        self.factorizations = 0     # Numeric factorizations made, counted by SolutionCache
+        self.refactor()
+    #END def __init__()
+
+
+    def refactor(self): # Builds and factors the MNA matrix from the current component values and clears any pending updates.
+        floating = self.netlist.floatingNodes()
+        if floating:
+            raise FloatingNodeError(floating)
+        self.netlist.compVals[:] = self.compVals
+        self.sourceList, rows, cols, vals, rhs = buildMNA(self.netlist)
+        self.nodeList = list(self.netlist.nodeNames)
+        self.nodeNum = dict(self.netlist.nodeIDs)
+        self.sourceNum = {name: k for k, name in enumerate(self.sourceList)}
+        self.rhs = numpy.asarray(rhs, dtype=numpy.float64)
+        self.baseSolve = solverBackends[self.backend](rows, cols, vals, len(rhs), self.ordering, self.order)
+        self.factorizations += 1
+        self.order = self.baseSolve.order
+        self.stats = self.baseSolve.stats
+        self.factoredVals = numpy.array(self.compVals)
+
+        # Resistor edits since the last factorization, as A + U*diag(updateDelta)*U^T.  Each column of U is +1 at the start node and -1 at the end node,
+        # stored as row indices where GND maps to an extra zero row.  updateZ holds the matching columns of A^-1 * U.
+        self.updateCols = {}
+        self.updateStart = []
+        self.updateEnd = []
+        self.updateDelta = []
+        self.updateZ = numpy.zeros((len(rhs), 0))
+        self.stale = False
+    #END def refactor()
+
+
+    @profiler.profiled("update")
+    def update(self, compName, compVal): # Applies a value-only edit.  Source edits change only the right-hand side, resistor edits become rank-1 updates.
+        index = self.netlist.compIndex.get(compName, len(self.compVals))
+        if index >= len(self.compVals):
+            return
+        branch = self.netlist.getBranch(compName)
+        oldVal = self.compVals[index]
+        self.compVals[index] = compVal
+        branch.compVal = compVal
+
+        if compName[0] in ['V', 'I']:
+            self.rhs += sourceRHS(branch, self.nodeNum, self.sourceNum, len(self.rhs)) * (compVal - oldVal)
+
+        elif compName[0] == 'R':
+            if self.backend != "SPARSE" or (compName not in self.updateCols and len(self.updateCols) >= self.maxRank):
+                self.stale = True
+            if self.stale:
+                return
+
+            delta = 1/compVal - 1/self.factoredVals[index]
+            if compName in self.updateCols:
+                self.updateDelta[self.updateCols[compName]] = delta
+            else:
+                size = len(self.rhs)
+                column = numpy.zeros(size)
+                start = self.nodeNum.get(branch.startNode, size)
+                end = self.nodeNum.get(branch.endNode, size)
+                if start < size:
+                    column[start] = 1.0
+                if end < size:
+                    column[end] = -1.0
+                self.updateCols[compName] = len(self.updateDelta)
+                self.updateStart.append(start)
+                self.updateEnd.append(end)
+                self.updateDelta.append(delta)
+                self.updateZ = numpy.column_stack((self.updateZ, self.baseSolve(column)))
+    #END def update()
+
+
+    @profiler.profiled("solve")
+    def solve(self, rhs = None): # Solves for one right-hand side vector or a 2-D array with one right-hand side per column.  Defaults to the circuit's own sources.
+        if self.stale:
+            self.refactor()
+        if rhs is None:
+            rhs = self.rhs
+        solution = self.baseSolve(rhs)
+
+        if self.updateDelta:
+            # Woodbury identity:  x = y - Z * (I + D*U^T*Z)^-1 * D*U^T*y, with y = A^-1 * b
+            zeroRow = numpy.zeros((1,) + numpy.shape(solution)[1:])
+            solutionExt = numpy.concatenate((solution, zeroRow))
+            zExt = numpy.concatenate((self.updateZ, numpy.zeros((1, len(self.updateDelta)))))
+            delta = numpy.asarray(self.updateDelta).reshape((-1,) + (1,) * (solution.ndim - 1))
+            capacitance = numpy.eye(len(self.updateDelta)) + numpy.asarray(self.updateDelta)[:, None] * (zExt[self.updateStart] - zExt[self.updateEnd])
+            try:
+                correction = numpy.linalg.solve(capacitance, delta * (solutionExt[self.updateStart] - solutionExt[self.updateEnd]))
+            except numpy.linalg.LinAlgError:
+                self.stale = True
+                return self.solve(rhs if rhs is not self.rhs else None)
+            solution = solution - self.updateZ @ correction
+
+        return solution
+    #END def solve()
+
+
+    def packResults(self, solution): # Splits a solution into [node names, node voltages, {voltage source: current}], the form used by the RETURN command.
+        solutionMat = [self.nodeList, [], {}]
+        for i in range(len(self.nodeList)):
+            solutionMat[1].append(solution[i])
+        for k in range(len(self.sourceList)):
+            solutionMat[2][self.sourceList[k]] = solution[len(self.nodeList)+k]
+        return solutionMat
+    #END def packResults()
+
+
+    def results(self): # Solves the circuit at its current component values.
+        return self.packResults(self.solve())
+    #END def results()
+
+
+    def snapshot(self): # Returns the state of the factor for restore().  The factorization is shared, and only what update() changes in place is copied.
+        state = dict(self.__dict__)
+        for name in self.editedState:
+            state[name] = state[name].copy()
+        return state
+    #END def snapshot()
+
+
+    def restore(self, state): # Puts back a state returned by snapshot(), dropping any edits, low-rank updates and refactorizations made since.
+        factorizations = self.factorizations
+        self.__dict__.clear()
+        self.__dict__.update(state)
+        self.factorizations = factorizations    # Work done since the snapshot still counts
+    #END def restore()
+
+
+    def batch(self, sourceNames, sourceValues): # Solves the circuit for many source configurations at once.  sourceValues has one row per configuration and one column per name in sourceNames.
+        if self.stale:
+            self.refactor()
+        sourceValues = numpy.atleast_2d(numpy.asarray(sourceValues, dtype=numpy.float64))
+        baseRHS = numpy.array(self.rhs)
+        sourceMat = numpy.zeros((len(self.rhs), len(sourceNames)))
+        for s in range(len(sourceNames)):
+            sourceMat[:, s] = sourceRHS(self.netlist.getBranch(sourceNames[s]), self.nodeNum, self.sourceNum, len(self.rhs))
+            baseRHS -= sourceMat[:, s] * self.compVals[self.netlist.compIndex[sourceNames[s]]]
+
+        solution = self.solve(baseRHS[:, None] + sourceMat @ sourceValues.T)
+
+        solutionMat = [self.nodeList, solution[0:len(self.nodeList)].T, {}]
+        for k in range(len(self.sourceList)):
+            solutionMat[2][self.sourceList[k]] = solution[len(self.nodeList)+k]
+        return solutionMat
+    #END def batch()
+
+
+    def sweep(self, compName, values): # Solves the circuit for every value of one V or I source.  Each sweep point is a column of the right-hand side.
+        batch = self.batch([compName], numpy.asarray(values, dtype=numpy.float64)[:, None])
+        return [batch[0], list(batch[1].T), batch[2]]
+    #END def sweep()
+
+
+    def thevenin(self, pairs): # Returns arrays of the Thevenin voltage, Thevenin resistance and Norton current seen from node A to node B of each (A, B) pair.  Either node may be GND.
+        if self.stale:
+            self.refactor()     # The right-hand side is read below, so it must be current
+        size = len(self.rhs)
+        for pair in pairs:
+            for node in pair:
+                if node != "GND" and node not in self.nodeNum:
+                    raise ValueError("Invalid node '%s'." %node)
+        vth = numpy.zeros(len(pairs))
+        rth = numpy.zeros(len(pairs))
+
+        # With every source set to zero, a unit current pushed into A and drawn out of B raises A above B by the Thevenin resistance.  Each pair is one
+        # column of the right-hand side, solved with the existing factorization.  The circuit's own sources are the last column, which gives the open
+        # circuit voltages and, for the ITERATIVE backend, leaves the circuit's own solution as the starting guess for the next solve.
+        for first in range(0, len(pairs), self.theveninBlock):
+            block = pairs[first:first+self.theveninBlock]
+            starts = [self.nodeNum.get(a, size) for a, b in block]
+            ends = [self.nodeNum.get(b, size) for a, b in block]
+            columns = numpy.arange(len(block))
+            rhs = numpy.zeros((size+1, len(block)+1))    # The extra row takes the GND end of a pair and is dropped
+            rhs[starts, columns] += 1.0
+            rhs[ends, columns] -= 1.0
+            rhs[0:size, -1] = self.rhs
+
+            solution = numpy.asarray(self.solve(rhs[0:size]), dtype=numpy.float64)
+            solution = numpy.concatenate((solution, numpy.zeros((1, len(block)+1))))
+            vth[first:first+len(block)] = solution[starts, -1] - solution[ends, -1]
+            rth[first:first+len(block)] = solution[starts, columns] - solution[ends, columns]
+
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            norton = vth / rth      # Infinite where A and B are joined by voltage sources alone
+        return vth, rth, norton
+    #END def thevenin()
+
+
+    def sensitivity(self, cmd, name): # Returns (output value, array of d output / d value for every branch in branch order).  The output is the voltage of a node or across a component for cmd 'V', or the current through a component for cmd 'I'.
+        # A diode current is found from its voltage, so its adjoint is that of the diode voltage scaled by the diode's conductance at the operating point.
+        if self.stale:
+            self.refactor()     # The right-hand side is read below, so it must be current
+        size = len(self.rhs)
+        nodeCount = len(self.nodeList)
+        select = numpy.zeros(size+1)     # Output as select . solution, with the extra entry standing for GND
+        explicit = numpy.zeros(len(self.compVals))     # Derivative of the output with its own component value held in the formula, such as I = V/R
+
+        if cmd == 'V' and name in self.nodeNum:
+            select[self.nodeNum[name]] = 1.0
+        elif cmd in ['V', 'I'] and name in self.netlist.compIndex:
+            index = self.netlist.compIndex[name]
+            branch = self.netlist.getBranch(name)
+            start = self.nodeNum.get(branch.startNode, size)
+            end = self.nodeNum.get(branch.endNode, size)
+            if cmd == 'V' or name[0] in ['R', 'D']:
+                select[start] += 1.0
+                select[end] -= 1.0
+            if cmd == 'I' and name[0] == 'R':
+                select /= self.compVals[index]
+            elif cmd == 'I' and name[0] == 'V':
+                select[nodeCount + self.sourceNum[name]] = 1.0
+            elif cmd == 'I' and name[0] == 'I':
+                explicit[index] = 1.0
+        else:
+            raise ValueError("Invalid node or component '%s'." %name)
+
+        # The MNA matrix is symmetric, so the adjoint system uses the same factorization.  The selection vector and the circuit's own sources are
+        # solved together as two columns, own sources last to keep the ITERATIVE starting guess.
+        rhs = numpy.column_stack((select[0:size], self.rhs))
+        solution = numpy.concatenate((numpy.asarray(self.solve(rhs), dtype=numpy.float64), numpy.zeros((1, 2))))
+        adjoint = solution[:, 0]
+        voltages = solution[:, 1]
+        output = self.compVals[index] if cmd == 'I' and name[0] == 'I' else select @ voltages
+        if cmd == 'I' and name[0] == 'D':
+            saturation = self.compVals[index] if self.compVals[index] > 0 else diodeSaturation
+            current, conductance = diodeCurrent(output, saturation)
+            adjoint = adjoint * conductance
+            explicit[index] = numpy.expm1(output / diodeThermalVoltage)
+            output = float(current)
+
+        starts = numpy.where(self.netlist.startIDs >= 0, self.netlist.startIDs, size)
+        ends = numpy.where(self.netlist.endIDs >= 0, self.netlist.endIDs, size)
+        compTypes = self.netlist.compTypes
+        isResistor = compTypes == compTypeCodes['R']
+        isSource = compTypes == compTypeCodes['V']
+
+        # d output / d p = adjoint . (d rhs / d p - d A / d p * solution)
+        sens = numpy.where(compTypes == compTypeCodes['I'], adjoint[starts] - adjoint[ends], 0.0)
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            sens[isResistor] = (adjoint[starts] - adjoint[ends])[isResistor] * (voltages[starts] - voltages[ends])[isResistor] / self.compVals[isResistor]**2
+        sens[isSource] = adjoint[nodeCount + numpy.arange(numpy.count_nonzero(isSource))]
+        isDiode = compTypes == compTypeCodes['D']
+        if isDiode.any():     # The adjoint solve used the Jacobian at the operating point, and a diode's saturation current scales its exponential current
+            sens[isDiode] = -(adjoint[starts] - adjoint[ends])[isDiode] * numpy.expm1((voltages[starts] - voltages[ends])[isDiode] / diodeThermalVoltage)
+        if cmd == 'I' and name[0] == 'R':
+            explicit[index] = -output / self.compVals[index]
+        return output, sens + explicit
+    #END def sensitivity()
+
+#END class MNAFactor
+
+
+
+class NewtonFactor(MNAFactor): # Solves a circuit with diodes by Newton-Raphson.  The matrix pattern and elimination order are found once, and each iteration only restamps values and refactors.
+    # After solving, baseSolve and rhs hold the Jacobian and companion sources at the operating point, so the linear queries of MNAFactor answer small-signal questions about it.
+
+    def __init__(self, netlist, backend = "SPARSE", ordering = "MMD"):
+        self.pattern = None         # Positions of the stamps in the permuted CSC matrix, found by the first factorization
+        self.solution = None        # Last operating point, the starting guess when values change
+        self.newtonStats = None
+        super().__init__(netlist, backend, ordering)     # Sets factorizations, which counts every Newton-Raphson iteration
+    #END def __init__()
+
+
+    @profiler.profiled("newton")
+    def refactor(self): # Finds the operating point with plain Newton-Raphson, then gmin stepping, then source stepping, and keeps its Jacobian as the factored matrix.
+        floating = self.netlist.floatingNodes()
+        if floating:
+            raise FloatingNodeError(floating)
+        self.netlist.compVals[:] = self.compVals
+        self.sourceList, rows, cols, vals, rhs = buildMNA(self.netlist)
+        self.nodeList = list(self.netlist.nodeNames)
+        self.nodeNum = dict(self.netlist.nodeIDs)
+        self.sourceNum = {name: k for k, name in enumerate(self.sourceList)}
+        size = len(rhs)
+        nodeCount = len(self.nodeList)
+        self.size = size
+        self.sourceVector = numpy.append(numpy.asarray(rhs, dtype=numpy.float64), 0.0)     # Extra entry takes stamps on GND
+        self.linearMat = coo_matrix((vals, (rows, cols)), shape=(size, size)).tocsr()
+
+        isDiode = self.netlist.compTypes == compTypeCodes['D']
+        self.anodes = numpy.where(self.netlist.startIDs[isDiode] >= 0, self.netlist.startIDs[isDiode], size).astype(numpy.int64)
+        self.cathodes = numpy.where(self.netlist.endIDs[isDiode] >= 0, self.netlist.endIDs[isDiode], size).astype(numpy.int64)
+        self.saturation = numpy.where(self.compVals[isDiode] > 0, self.compVals[isDiode], diodeSaturation)
+        hasAnode = self.anodes < size
+        hasCathode = self.cathodes < size
+        both = hasAnode & hasCathode
+        diodes = numpy.arange(len(self.anodes))
+
+        # Stamps are the linear entries, then four per diode, then one on each node's diagonal for gmin stepping
+        self.linearVals = vals
+        self.stampDiode = numpy.concatenate((diodes[hasAnode], diodes[hasCathode], diodes[both], diodes[both]))
+        self.stampSign = numpy.repeat([1.0, 1.0, -1.0, -1.0], [numpy.count_nonzero(hasAnode), numpy.count_nonzero(hasCathode)] + [numpy.count_nonzero(both)] * 2)
+        self.stampRows = numpy.concatenate((rows, self.anodes[hasAnode], self.cathodes[hasCathode], self.anodes[both], self.cathodes[both], numpy.arange(nodeCount)))
+        self.stampCols = numpy.concatenate((cols, self.anodes[hasAnode], self.cathodes[hasCathode], self.cathodes[both], self.anodes[both], numpy.arange(nodeCount)))
+
+        history = []
+        guess = self.solution if self.solution is not None and len(self.solution) == size else numpy.zeros(size)
+        solution, solve, converged = self.newton(guess, 0.0, 1.0, "newton", history)
+        if not converged:
+            solution = guess
+            for gmin in [10.0**-k for k in range(2, 13)] + [0.0]:
+                solution, solve, converged = self.newton(solution, gmin, 1.0, "gmin", history)
+                if not converged:
+                    break
+        if not converged:
+            solution, solve, converged = self.sourceStepping(size, history)
+        self.newtonStats = {"iterations": len(history), "converged": converged, "stage": history[-1]["stage"] if history else "newton", "history": history}
+        if not converged:
+            raise ConvergenceError({"method": "NEWTON", "iterations": len(history), "residual": history[-1]["residual"], "tolerance": newtonSettings["reltol"]})
+
+        self.solution = solution
+        self.baseSolve = solve
+        self.rhs = solve.rhs
+        self.order = solve.order
+        self.stats = solve.stats if solve.stats is not None else self.patternStats(solve)
+        self.factoredVals = numpy.array(self.compVals)
+        self.updateCols = {}
+        self.updateStart = []
+        self.updateEnd = []
+        self.updateDelta = []
+        self.updateZ = numpy.zeros((size, 0))
+        self.stale = False
+    #END def refactor()
+
+
+    def update(self, compName, compVal): # Records a value edit.  Any edit moves the operating point, so the next solve runs Newton-Raphson again from the last one.
+        index = self.netlist.compIndex.get(compName, len(self.compVals))
+        if index >= len(self.compVals):
+            return
+        self.compVals[index] = compVal
+        self.netlist.getBranch(compName).compVal = compVal
+        self.stale = True
+    #END def update()
+
+
+    def newton(self, guess, gmin, scale, stage, history): # Runs Newton-Raphson from guess with gmin from every node to GND and the sources scaled by scale.  Returns (solution, solve function at the solution, converged).
+        solution = numpy.array(guess, dtype=numpy.float64)
+        extended = numpy.append(solution, 0.0)
+        drops = extended[self.anodes] - extended[self.cathodes]     # Diode voltages the circuit is linearized at, after limiting
+        solve = None
+        for iteration in range(newtonSettings["maxIterations"]):
+            start = time.perf_counter()
+            with profiler.phase("stamp"):
+                current, conductance = diodeCurrent(drops, self.saturation)
+                values = numpy.concatenate((self.linearVals, conductance[self.stampDiode] * self.stampSign, numpy.full(len(self.nodeList), gmin)))
+                rhs = self.sourceVector * scale
+                companion = current - conductance * drops      # Diode current not carried by its conductance, as a current source from anode to cathode
+                numpy.subtract.at(rhs, self.anodes, companion)
+                numpy.add.at(rhs, self.cathodes, companion)
+                rhs = rhs[0:self.size]
+            stamped = time.perf_counter()
+            solve = self.numericFactor(values)
+            solve.rhs = rhs
+            factored = time.perf_counter()
+            with profiler.phase("solve"):
+                newSolution = numpy.asarray(solve(rhs), dtype=numpy.float64)
+            solved = time.perf_counter()
+
+            extended = numpy.append(newSolution, 0.0)
+            newDrops = extended[self.anodes] - extended[self.cathodes]
+            limited = diodeLimit(newDrops, drops, self.saturation)
+            change = numpy.abs(newSolution - solution)
+            converged = iteration > 0 and bool(numpy.all(change <= newtonSettings["reltol"] * numpy.maximum(numpy.abs(newSolution), numpy.abs(solution)) + newtonSettings["vntol"]))
+            converged = converged and bool(numpy.all(limited == newDrops))
+
+            # Largest current law error at the new solution, for the statistics
+            residual = self.linearMat @ newSolution + gmin * numpy.append(newSolution[0:len(self.nodeList)], numpy.zeros(self.size - len(self.nodeList))) - self.sourceVector[0:self.size] * scale
+            residualExt = numpy.append(residual, 0.0)
+            numpy.add.at(residualExt, self.anodes, diodeCurrent(newDrops, self.saturation)[0])
+            numpy.subtract.at(residualExt, self.cathodes, diodeCurrent(newDrops, self.saturation)[0])
+            history.append({"stage": stage, "step": gmin if stage == "gmin" else scale, "iteration": iteration + 1, "maxChange": float(change.max()) if len(change) else 0.0,
+                            "residual": float(numpy.abs(residualExt[0:len(self.nodeList)]).max()) if len(self.nodeList) else 0.0, "limited": int(numpy.count_nonzero(limited != newDrops)),
+                            "stampSeconds": stamped - start, "factorSeconds": factored - stamped, "solveSeconds": solved - factored})
+
+            solution = newSolution
+            drops = limited
+            if converged:
+                return solution, solve, True
+        return solution, solve, False
+    #END def newton()
+
+
+    def sourceStepping(self, size, history): # Ramps every source up from zero, starting each step from the last solution and shortening the step when Newton-Raphson fails.
+        solution = numpy.zeros(size)
+        solve = None
+        scale = 0.0
+        step = 0.1
+        while scale < 1.0:
+            target = min(1.0, scale + step)
+            trial, trialSolve, converged = self.newton(solution, 0.0, target, "source", history)
+            if converged:
+                solution, solve, scale = trial, trialSolve, target
+                step = min(step * 2, 0.5)
+            else:
+                step /= 4
+                if step < 1e-6:
+                    return solution, solve, False
+        return solution, solve, True
+    #END def sourceStepping()
+
+
+    def numericFactor(self, values): # Factors the matrix for one set of stamp values.  For the SPARSE backend, the first call finds the elimination order and the CSC pattern, and later calls only fill in values.
+        size = self.size
+        self.factorizations += 1
+        if self.backend != "SPARSE":
+            solve = solverBackends[self.backend](self.stampRows, self.stampCols, values, size, self.ordering, self.order)
+            self.order = solve.order        # For ITERATIVE, the last solution is the next starting guess
+            return solve
+
+        if self.pattern is None:
+            solve = factorSparse(self.stampRows, self.stampCols, values, size, self.ordering, self.order)
+            order = solve.order
+            rank = numpy.empty(size, dtype=numpy.int64)
+            rank[order] = numpy.arange(size)
+            keys, positions = numpy.unique(rank[self.stampCols] * size + rank[self.stampRows], return_inverse=True)     # Column major, as CSC stores them
+            self.pattern = (order, positions, (keys % size).astype(numpy.int32), numpy.searchsorted(keys // size, numpy.arange(size+1)).astype(numpy.int32), len(keys))
+            return solve
+
+        order, positions, indices, indptr, nnz = self.pattern
+        with profiler.phase("factor"):
+            matrix = csc_matrix((numpy.bincount(positions, values, nnz), indices, indptr), shape=(size, size))
+            factor = splu(matrix, permc_spec="NATURAL")
+
+        def solve(rhs):
+            rhs = numpy.asarray(rhs, dtype=numpy.float64)
+            solution = numpy.empty_like(rhs)
+            solution[order] = factor.solve(rhs[order])
+            return solution
+
+        solve.order = order
+        solve.stats = None
+        solve.matrix = matrix
+        solve.factorNnz = factor.nnz
+        return solve
+    #END def numericFactor()
+
+
+    def patternStats(self, solve): # Fill-in statistics of a factorization made by numericFactor(), which skips them while iterating.
+        if not hasattr(solve, "matrix"):
+            return None
+        stats = fillStats(solve.matrix, numpy.arange(self.size), solve.factorNnz, self.ordering)
+        profiler.note("matrix", stats)
+        return stats
+    #END def patternStats()
+
+
+    def batch(self, sourceNames, sourceValues): # Solves the circuit for each source configuration in turn, starting each Newton-Raphson solve from the last operating point.
+        sourceValues = numpy.atleast_2d(numpy.asarray(sourceValues, dtype=numpy.float64))
+        saved = [self.compVals[self.netlist.compIndex[name]] for name in sourceNames]
+        columns = []
+        try:
+            for row in sourceValues:
+                for name, value in zip(sourceNames, row):
+                    self.update(name, value)
+                columns.append(self.solve())
+        finally:
+            for name, value in zip(sourceNames, saved):
+                self.update(name, value)
+        solution = numpy.column_stack(columns) if columns else numpy.zeros((len(self.rhs), 0))
+
+        solutionMat = [self.nodeList, solution[0:len(self.nodeList)].T, {}]
+        for k in range(len(self.sourceList)):
+            solutionMat[2][self.sourceList[k]] = solution[len(self.nodeList)+k]
+        return solutionMat
+    #END def batch()
+
+#END class NewtonFactor
+
+
+
+class SolutionCache: # Caches the factored circuit and its solved results, keyed on netlist version counters.  Topology edits and value-only edits bump separate counters.
+    def __init__(self):
+        self.topologyVersion = 0
+        self.valueVersion = 0
+        self.factor = None
+        self.factorKey = None
+        self.results = None
+        self.resultsKey = None
+
+        self.hits = 0
+        self.misses = 0
+        self.otherFactorizations = 0    # Factorizations by islandAnalysis and by factors since replaced
+        self.updates = 0
+    #END def __init__()
+
+
+    @property
+    def factorizations(self): # Full numeric factorizations of every kind, including refactors after too many low-rank updates and each Newton-Raphson iteration.
+        return self.otherFactorizations + (self.factor.factorizations if self.factor else 0)
+
+
+    def topologyChanged(self): # Call when branches are added, replaced or cleared.  The next solve builds a new factorization.
+        self.topologyVersion += 1
+    #END def topologyChanged()
+
+
+    def valueChanged(self, compName, compVal): # Call when a component value is edited.  A current factorization is updated in place.
+        self.valueVersion += 1
+        if self.factor and self.factorKey[0] == self.topologyVersion:
+            self.factor.update(compName, compVal)
+            self.updates += 1
+    #END def valueChanged()
+
+
+    def getFactor(self, netlist, compDict, backend, ordering = "MMD"): # Returns the factored circuit for the current topology, factoring it first if needed.
+        if not self.factor or self.factorKey != (self.topologyVersion, backend, ordering):
+            netlist.compVals[:] = numpy.fromiter((compDict[name] for name in netlist.compNames), dtype=numpy.float64, count=netlist.count)
+            if self.factor:
+                self.otherFactorizations += self.factor.factorizations
+            self.factor = None
+            self.factor = (NewtonFactor if netlist.nonlinear() else MNAFactor)(netlist, backend, ordering)
+            self.factorKey = (self.topologyVersion, backend, ordering)
+        return self.factor
+    #END def getFactor()
+
+
+    def solve(self, netlist, compDict, backend, ordering = "MMD", workers = None): # Returns solved results, from the cache when neither counter has changed since they were computed.
+        key = (self.topologyVersion, self.valueVersion, backend, ordering)
+        if self.results and self.resultsKey == key:
+            self.hits += 1
+            return self.results
+
+        self.misses += 1
+        # The first solve of a linear circuit made of several islands factors each island on its own, on workers processes.  The whole circuit is only
+        # factored once it is solved again after an edit, when its factorization is kept for low-rank updates.
+        firstSolve = not (self.factor and self.factorKey == (self.topologyVersion, backend, ordering)) and not (self.results and self.resultsKey[0] == self.topologyVersion)
+        if firstSolve and not netlist.nonlinear() and len(netlist.islands()[1]) > 1:
+            netlist.compVals[:] = numpy.fromiter((compDict[name] for name in netlist.compNames), dtype=numpy.float64, count=netlist.count)
+            self.results = islandAnalysis(netlist, backend, workers, ordering)
+            self.otherFactorizations += 1
+            self.resultsKey = key
+            return self.results
+        self.results = self.getFactor(netlist, compDict, backend, ordering).results()
+        self.resultsKey = key
+        return self.results
+    #END def solve()
+
+
+    def snapshot(self): # Returns the cached results, factor and value counter for restore().
+        return self.valueVersion, self.results, self.resultsKey, self.factor, self.factorKey, self.factor.snapshot() if self.factor else None
+    #END def snapshot()
+
+
+    def restore(self, state): # Puts back a state returned by snapshot(), as if the value edits made since had never happened.  Topology edits must not be made in between.
+        current = self.factor
+        self.valueVersion, self.results, self.resultsKey, self.factor, self.factorKey, factorState = state
+        if current and current is not self.factor:
+            self.otherFactorizations += current.factorizations
+        if self.factor:
+            self.factor.restore(factorState)
+    #END def restore()
+
+
+    def cachedResults(self): # Returns the cached results if they match the current netlist, otherwise None.
+        if self.results and self.resultsKey[0:2] == (self.topologyVersion, self.valueVersion):
+            return self.results
+        return None
+    #END def cachedResults()
+
+
+    def setResults(self, results, backend, ordering = "MMD"): # Stores results solved elsewhere, such as a loaded binary file, as valid for the current netlist.
+        self.results = results
+        self.resultsKey = (self.topologyVersion, self.valueVersion, backend, ordering)
+    #END def setResults()
+
+#END class SolutionCache
+
+
+
+class Circuit: # A circuit and its solver state, for use from other Python code.  Methods return plain numbers and arrays, and raise exceptions instead of printing.  The PCTspice() session is a client of this class.
+    def __init__(self, backend = "SPARSE", ordering = "MMD"):
+        self.netlist = Netlist()
+        self.values = {}                # Component name -> value, including values assigned before their branch is entered
+        self.tolerances = {}            # Component name, or R, V or I for every component of that type -> (tolerance, distribution)
+        self.cache = SolutionCache()
+        self.backend = "SPARSE"
+        self.ordering = "MMD"
+        self.workers = None             # Processes for solving islands, None or 1 to solve them one at a time
+        self.setBackend(backend)
+        self.setOrdering(ordering)
+    #END def __init__()
+
+
+    def setBackend(self, backend): # Selects a backend from solverBackends.  Raises ValueError for an unknown backend and ModuleNotFoundError if EXACT is chosen without SymPy.
+        backend = backend.upper()
+        if backend not in solverBackends:
+            raise ValueError("Invalid solver backend '%s'." %backend)
+        if backend == "EXACT" and importlib.util.find_spec("sympy") is None:
+            raise ModuleNotFoundError("SymPy python module required for the EXACT solver.")
+        self.backend = backend
+    #END def setBackend()
+
+
+    def setOrdering(self, ordering): # Selects a fill-reducing node ordering from sparseOrderings or orderingAliases.  Raises ValueError for an unknown ordering.
+        ordering = orderingAliases.get(ordering.upper(), ordering.upper())
+        if ordering not in sparseOrderings:
+            raise ValueError("Invalid node ordering '%s'." %ordering)
+        self.ordering = ordering
+    #END def setOrdering()
+
+
+    def setWorkers(self, workers): # Sets the number of processes used to solve the islands of a circuit, 1 for one at a time.  Raises ValueError for fewer than 1.
+        if workers < 1:
+            raise ValueError("Invalid worker count %d." %workers)
+        self.workers = workers
+    #END def setWorkers()
+
+
+    def setIterative(self, method = None, preconditioner = None, tolerance = None): # Changes iterativeSettings, which are shared by every Circuit, and solves this circuit again with them.  Raises ValueError for an unknown or mismatched setting.
+        method = (method or iterativeSettings["method"]).upper()
+        preconditioner = (preconditioner or iterativeSettings["preconditioner"]).upper()
+        if method not in iterativeMethods:
+            raise ValueError("Invalid iterative method '%s'." %method)
+        if preconditioner not in iterativePreconditioners:
+            raise ValueError("Invalid preconditioner '%s'." %preconditioner)
+        if method == "CG" and preconditioner == "ILU":
+            raise ValueError("CG needs a symmetric preconditioner.  Use IC or JACOBI.")
+        if tolerance is not None and not 0 < tolerance < 1:
+            raise ValueError("Tolerance must be between 0 and 1.")
+        iterativeSettings["method"] = method
+        iterativeSettings["preconditioner"] = preconditioner
+        if tolerance is not None:
+            iterativeSettings["tolerance"] = tolerance
+        self.cache.topologyChanged()
+    #END def setIterative()
+
+
+    def clear(self): # Removes every branch and component value.
+        self.netlist = Netlist()
+        self.values = {}
+        self.tolerances = {}
+        self.cache.topologyChanged()
+    #END def clear()
+
+
+    def addBranch(self, startNode, compName, endNode, value = None): # Adds a branch.  Without a value, the component keeps a value assigned earlier or 0.  Raises ValueError for an invalid or repeated component.
+        branch = Branch(startNode, endNode, 0, compName)
+        if not branch.validComp() or not branch.startNode or not branch.endNode:
+            raise ValueError("Invalid branch %s %s %s." %(startNode, compName, endNode))
+        if branch.compName in self.netlist.compIndex:
+            raise ValueError("Component %s already exists." %branch.compName)
+        if value is None:
+            self.values.setdefault(branch.compName, 0)
+        else:
+            self.values[branch.compName] = value
+        self.netlist.addBranch(branch)
+        self.cache.topologyChanged()
+    #END def addBranch()
+
+
+    def replaceBranch(self, index, startNode, compName, endNode, value = None): # Replaces branch number index, counting from 0.  Without a value, the component keeps its current value.
+        branch = Branch(startNode, endNode, 0, compName)
+        if not branch.validComp() or not branch.startNode or not branch.endNode:
+            raise ValueError("Invalid branch %s %s %s." %(startNode, compName, endNode))
+        if not 0 <= index < self.netlist.count:
+            raise IndexError("Branch %d does not exist." %(index+1))
+        if value is None:
+            self.values.setdefault(branch.compName, 0)
+        else:
+            self.values[branch.compName] = value
+        self.netlist.replaceBranch(index, branch)
+        self.cache.topologyChanged()
+    #END def replaceBranch()
+
+
+    def setValue(self, compName, value): # Sets the value of a component.  A factored circuit is updated in place instead of being factored again.
+        compName = compName.upper()
+        if not Branch('', '', 0, compName).validComp():
+            raise ValueError("Invalid component '%s'." %compName)
+        self.values[compName] = value
+        self.cache.valueChanged(compName, value)
+    #END def setValue()
+
+
+    @contextlib.contextmanager
+    def temporaryValues(self, edits): # Sets {component: value} edits for the duration of a with block, then puts the values, cached results and factorization back as they were.  Solves made before the block stay cached.
+        saved = {name: self.values[name] for name in edits}
+        compVals = numpy.array(self.netlist.compVals)
+        state = self.cache.snapshot()
+        try:
+            for name, value in edits.items():
+                self.setValue(name, value)
+            yield self
+        finally:
+            self.values.update(saved)
+            self.netlist.compVals[:] = compVals
+            self.cache.restore(state)
+    #END def temporaryValues()
+
+
+    def load(self, fileName, echo = False): # Adds the branches and values of a netlist text file or open text file, like the IMPORT command.  Returns the number of branches added and a list of (line number, message) errors.
+        try:
+            return importNetlist(fileName, self.netlist, self.values, echo)
+        finally:
+            self.cache.topologyChanged()
+    #END def load()
+
+
+    def exportBinary(self, fileName): # Writes the circuit and its solution, if one is cached, to a binary file.
+        exportBinary(fileName, self.netlist, self.values, self.cache.cachedResults())
+    #END def exportBinary()
+
+
+    def exportResults(self, fileName, fileFormat = None, engineering = False): # Solves the circuit and writes every node voltage and branch current to a CSV, NPY, JSON lines or JSON file.  Returns the number of rows written.
+        return exportResults(fileName, self.netlist, self.solve(), fileFormat, engineering)
+    #END def exportResults()
+
+
+    def loadBinary(self, fileName): # Replaces the circuit with one saved by exportBinary().  A saved solution is kept as the cached result.
+        self.netlist, self.values, results = loadBinary(fileName)
+        self.cache.topologyChanged()
+        if results:
+            self.cache.setResults(results, self.backend, self.ordering)
+    #END def loadBinary()
+
+
+    def solve(self): # Returns [node names, node voltages, {voltage source: current}], solving only if the circuit changed since the last call.  Raises FloatingNodeError or RuntimeError if the circuit cannot be solved.
+        return self.cache.solve(self.netlist, self.values, self.backend, self.ordering, self.workers)
+    #END def solve()
+
+
+    def voltage(self, name): # Returns the voltage of a node, or the voltage drop across a component from its start node to its end node.
+        results = self.solve()
+        name = name.upper()
+        if name in self.netlist.nodeIDs:
+            return results[1][self.netlist.nodeIDs[name]]
+        if name in self.netlist.compIndex:
+            return branchVoltage(self.netlist, results, self.netlist.getBranch(name))
+        if name == "GND":
+            return 0.0
+        raise ValueError("Invalid node or component '%s'." %name)
+    #END def voltage()
+
+
+    def current(self, compName): # Returns the current through a component, from its start node to its end node.
+        results = self.solve()
+        compName = compName.upper()
+        if compName not in self.netlist.compIndex:
+            raise ValueError("Invalid component '%s'." %compName)
+        return currentCalc(self.netlist, results, compName)
+    #END def current()
+
+
+    def voltages(self): # Returns {node name: voltage} for every node.
+        results = self.solve()
+        return dict(zip(results[0], results[1]))
+    #END def voltages()
+
+
+    def currents(self): # Returns {component name: current} for every branch, in branch order.
+        currents = branchCalc(self.netlist, self.solve())[1]
+        return dict(zip(self.netlist.compNames, currents.tolist()))
+    #END def currents()
+
+
+    def sweep(self, compName, values): # Solves the circuit for every value of one V or I source.  Returns [node names, node voltage arrays, {voltage source: current array}] with one array entry per value.
+        compName = compName.upper()
+        if compName[0:1] not in ['V', 'I'] or compName not in self.netlist.compIndex:
+            raise ValueError("Invalid source '%s'." %compName)
+        return self.cache.getFactor(self.netlist, self.values, self.backend, self.ordering).sweep(compName, values)
+    #END def sweep()
+
+
+    def thevenin(self, pairs): # Returns arrays of the Thevenin voltage, Thevenin resistance and Norton current between the nodes of each (A, B) pair, where either node may be GND.  Answered from the factored circuit without building it again.  Raises ValueError for an unknown node.
+        pairs = [(a.upper(), b.upper()) for a, b in pairs]
+        for a, b in pairs:
+            if a == b:
+                raise ValueError("Node pair %s,%s must name two different nodes." %(a, b))
+        return self.cache.getFactor(self.netlist, self.values, self.backend, self.ordering).thevenin(pairs)
+    #END def thevenin()
+
+
+    def sensitivity(self, output): # Returns {component name: d output / d value} for every component, largest magnitude first, from one extra solve of the adjoint system.  The output is a query like "V(N2)", "V(R1)" or "I(R1)".  Raises ValueError for an invalid output.
+        query = output.upper().replace(" ", "")
+        cmd, operand = query[0:query.find('(')], query[query.find('(')+1:query.rfind(')')]
+        if cmd not in ['V', 'I'] or query.find('(') < 0 or not query.endswith(')'):
+            raise ValueError("Invalid output '%s'." %output)
+        value, sens = self.cache.getFactor(self.netlist, self.values, self.backend, self.ordering).sensitivity(cmd, operand)
+        ranked = numpy.argsort(-numpy.abs(sens), kind="stable")
+        return {self.netlist.compNames[index]: float(sens[index]) for index in ranked}
+    #END def sensitivity()
+
+
+    def setTolerance(self, name, tolerance, distribution = "UNIFORM"): # Sets the tolerance of a component, or with a name of R, V or I, of every component of that type without its own.  Tolerance is a fraction, such as 0.05 for 5%, and 0 removes it.  Raises ValueError for an invalid setting.
+        name = name.upper()
+        distribution = distribution.upper()
+        if distribution not in toleranceDistributions:
+            raise ValueError("Invalid distribution '%s'." %distribution)
+        if not (0 <= tolerance < 1):
+            raise ValueError("Tolerance must be at least 0 and less than 1.")
+        if not Branch("", "", 0, name).validComp():
+            raise ValueError("Invalid component '%s'." %name)
+        if tolerance:
+            self.tolerances[name] = (float(tolerance), distribution)
+        else:
+            self.tolerances.pop(name, None)
+    #END def setTolerance()
+
+
+    def monteCarlo(self, outputs, samples, seed = 1, workers = None): # Solves the circuit for random draws of its toleranced values and returns the finished MonteCarlo, with a RunningStats per output.  Outputs are queries like "V(N2)", or "V(N2)=4.9:5.1" with limits for the yield.
+        self.netlist.compVals[:] = numpy.fromiter((self.values[name] for name in self.netlist.compNames), dtype=numpy.float64, count=self.netlist.count)
+        return MonteCarlo(self.netlist, self.tolerances, outputs, self.backend, self.ordering).run(samples, seed, workers)
+    #END def monteCarlo()
+
+
+    def newtonStats(self): # Returns the Newton-Raphson statistics of the last operating point, with one history entry per iteration, or None for a circuit without diodes.
+        self.solve()
+        return getattr(self.cache.getFactor(self.netlist, self.values, self.backend, self.ordering), "newtonStats", None)
+    #END def newtonStats()
+
+
+    def matrixStats(self): # Returns the size and fill-in statistics of the factored matrix, or None if the backend does not keep them.  For the ITERATIVE backend, returns the method, preconditioner and convergence of the last solve.
+        return self.cache.getFactor(self.netlist, self.values, self.backend, self.ordering).stats
+    #END def matrixStats()
+
+#END class Circuit
+
+
+
+class CircuitCache: # Least recently used cache of parsed Circuits, keyed by a hash of the netlist text, backend and ordering.  Each Circuit keeps its own factorization, so a cached circuit is solved without parsing or factoring again.
+    def __init__(self, capacity = 64):
+        self.capacity = capacity
+        self.entries = collections.OrderedDict()    # Key -> (Circuit, lock held while the Circuit is in use), least recently used first
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    #END def __init__()
+
+
+    def get(self, text, backend = "SPARSE", ordering = "MMD"): # Returns (Circuit, lock, whether it was cached) for a netlist text.  Raises ValueError if the text cannot be read.
+        key = (hashlib.sha256(text.encode()).hexdigest(), backend.upper(), orderingAliases.get(ordering.upper(), ordering.upper()))
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key] + (True,)
+            self.misses += 1
+
+        # Parsed outside the cache lock so that other circuits can be served meanwhile
+        circuit = Circuit(backend, ordering)
+        num, errors = circuit.load(io.StringIO(text))
+        if errors:
+            raise ValueError("Line %d: %s" %errors[0])
+        if not num:
+            raise ValueError("No branches found.")
+
+        with self.lock:
+            entry = self.entries.setdefault(key, (circuit, threading.Lock()))     # Another thread may have parsed the same netlist first
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return entry + (False,)
+    #END def get()
+
+#END class CircuitCache
+
+
+
 #__________________________________________________________________________________________________________________________________________
 # HELP FUNCTIONS
 
@@ -108,6 +1395,7 @@ def helpprint(): # Prints general help statement, including syntax guide and key
     print("\n\033[1;33;40m" + "Valid component list:" + "\033[1;32;40m\n")
     print("> " + "\033[1;33;40m" + "Resistor" + "\033[1;32;40m" + "\t\tDC non-reactive resistance.\n\t\t\tUnit: Ohms\n\t\033[1;37;40m╱╲╱╲╱╲╱\033[1;32;40m\t\tFormat: R[#]=[value]\n")
     print("\n> " + "\033[1;33;40m" + "DC Voltage Source" + "\033[1;32;40m" + "\tIdeal DC voltage source.\n\t\033[1;37;40m ┌───┐ \033[1;32;40m\t\tThe start node is the positive terminal, the end node is the negative terminal.\n\t\033[1;37;40m─┤+ -├─\033[1;32;40m\t\tUnit: Volts\n\t\033[1;37;40m └───┘ \033[1;32;40m\t\tFormat: V[#]=[value]\n")
+    print("\n> " + "\033[1;33;40m" + "Diode" + "\033[1;32;40m" + "\t\t\tIdeal junction diode, solved with Newton-Raphson.  The value is the saturation current, 1e-14 by default.\n\t\033[1;37;40m──►├──\033[1;32;40m\t\tThe start node is the anode, the end node is the cathode.\n\t\t\tUnit: Amperes\n\t\t\tFormat: D[#]=[value]\n")
     print("\n> " + "\033[1;33;40m" + "DC Current Source" + "\033[1;32;40m" + "\tIdeal DC current source.\n\t\033[1;37;40m ┌───┐ \033[1;32;40m\t\tThe start node is the positive terminal, the end node is the negative terminal.\n\t\033[1;37;40m─┤◄──├─\033[1;32;40m\t\tUnit: Amperes\n\t\033[1;37;40m └───┘ \033[1;32;40m\t\tFormat: I[#]=[value]\n")
     print("\n")
     input("\033[1;37;40m--- Press [ENTER] to continue ---\033[38;5;0m\033[?25l")
@@ -124,24 +1412,38 @@ def helpprint(): # Prints general help statement, including syntax guide and key
         # End of EDIT
     print("> " + "\033[1;34;40m" + "END" + "\033[1;32;40m\t\tExit and stop running PCTspice.\n\t\tFormat: END\n")
     print("> " + "\033[1;34;40m" + "EXIT" + "\033[1;32;40m" + "\t\tSynonym of END.\n\t\tFormat: EXIT\n")
+    print("> " + "\033[1;34;40m" + "EXPORT" + "\033[1;32;40m" + "\tSaves branches, component values, and the last solution (if still valid) to a binary file.\n\t\tA .csv, .npy, .jsonl or .json file name instead solves the circuit and writes every node voltage and\n\t\tbranch current, one per row.  ENG writes the values in engineering notation (all but NPY).\n\t\tFormat: EXPORT fileName.pct\n\t\t        EXPORT [ENG] fileName.csv\n")
     print("> " + "\033[1;34;40m" + "HELP" + "\033[1;32;40m" + "\t\tPrint out help message.\n\t\tFormat: HELP\n")
 
     input("\033[1;37;40m--- Press [ENTER] to continue ---\033[38;5;0m\033[?25l")
     print("\33[2K\33[A\33[2K\33[A\r\033[0m\033[?25h\033[1;32;40m")
 
-    print("> " + "\033[1;34;40m" + "IMPORT" + "\033[1;32;40m" + "\tImport text file (.txt) as parameter input.\n\t\tFormat: IMPORT fileName.txt\n")
+    print("> " + "\033[1;34;40m" + "IMPORT" + "\033[1;32;40m" + "\tImport text file (.txt) as parameter input.\n\t\tLines may be branch descriptions or [COMPONENT]=[VALUE].  Blank lines and lines starting with * are skipped.\n\t\tUse QUIET to skip printing the file contents.\n\t\tFormat: IMPORT fileName.txt\n\t\t        IMPORT QUIET fileName.txt\n")
+    print("> " + "\033[1;34;40m" + "LOAD" + "\033[1;32;40m" + "\t\tReplaces the workspace with a binary file saved by EXPORT.\n\t\tFormat: LOAD fileName.pct\n")
     print("> " + "\033[1;34;40m" + "NEW" + "\033[1;32;40m" + "\t\tClears current workspace and deletes all branches, nodes, and components from memory.\n\t\tFormat: NEW\n")
+    print("> " + "\033[1;34;40m" + "ORDER" + "\033[1;32;40m" + "\tSelects the node ordering used by the SPARSE solver to limit fill-in during factorization.\n\t\tMMD (default) is SuperLU's multiple minimum degree on the symmetrized pattern, also accepted as AMD,\n\t\tCOLAMD is column approximate minimum degree, RCM is reverse Cuthill-McKee, and NATURAL\n\t\tkeeps the order the nodes were entered in.\n\t\tFormat: ORDER [MMD, COLAMD, RCM or NATURAL]\n")
    
     print("> " + "\033[1;34;40m" + "PRINT" + "\033[1;32;40m" + "\t\tPrint various variables or parameters.\n\t\tFormat: PRINT [PARAMETER]\n")
         # Continuation of PRINT
     print("\t\t> " + "\033[1;34;40m" + "BRANCHES" + "\033[1;32;40m" + "\tPrints a list of entered branches with starting node, component, and end node.\n\t\t\t\tFormat: PRINT BRANCHES\n")
     print("\t\t> " + "\033[1;34;40m" + "COMPONENTS" + "\033[1;32;40m" + "\tPrints a list of entered compnents and values, even if not yet assigned to a node.\n\t\t\t\tFormat: PRINT COMPONENTS\n")
+    print("\t\t> " + "\033[1;34;40m" + "CACHE" + "\033[1;32;40m" + "\tPrints result cache hits and misses, factorization counts (including each Newton-Raphson iteration), and netlist version counters.\n\t\t\t\tFormat: PRINT CACHE\n")
+    print("\t\t> " + "\033[1;34;40m" + "NEWTON" + "\033[1;32;40m" + "\tPrints each Newton-Raphson iteration of the last operating point of a circuit with diodes,\n\t\t\t\twith its continuation stage, update size, residual, and stamp, factor, and solve time.\n\t\t\t\tFormat: PRINT NEWTON\n")
+    print("\t\t> " + "\033[1;34;40m" + "MATRIX" + "\033[1;32;40m" + "\tPrints the size, bandwidth, and nonzero count of the circuit matrix and its factors, and the fill ratio.\n\t\t\t\tFormat: PRINT MATRIX\n")
         #End of PRINT
     print("> " + "\033[1;34;40m" + "RETURN" + "\033[1;32;40m" + "\tPrints calculated values of entered parameter to the screen.\n\t\tFormat: RETURN [PARAMETER]\n")
         # Continuation of RETURN
     print("\t\t> " + "\033[1;34;40m" + "V()" + "\033[1;32;40m" + "\tVoltage of entered node, or voltage drop across component.\n\t\t\tV(ALL) returns voltage of all nodes.\n\t\t\tFormat: RETURN V([node or component])\n")
     print("\t\t> " + "\033[1;34;40m" + "I()" + "\033[1;32;40m" + "\tCurrent through component.\n\t\t\tI(ALL) returns current through all components.\n\t\t\tFormat: RETURN I([component])\n")
+    print("\t\t> " + "\033[1;34;40m" + "RTH()" + "\033[1;32;40m" + "\tThevenin resistance between two nodes.  VTH() and IN() return the Thevenin voltage\n\t\t\tand Norton current.  A single node is measured against GND, several pairs are\n\t\t\tseparated by ';', and ALL measures every node against GND.\n\t\t\tFormat: RETURN RTH([node],[node])\n")
         # End of RETURN
+    print("> " + "\033[1;34;40m" + "SENS" + "\033[1;32;40m" + "\tPrints the derivative of a node voltage, component voltage or component current with respect to\n\t\tevery component value, largest first, from one extra solve of the adjoint system.\n\t\tFormat: SENS V([node or component])\n\t\t        SENS I([component])\n")
+    print("> " + "\033[1;34;40m" + "SOLVER" + "\033[1;32;40m" + "\tSelects the backend used to solve the circuit.\n\t\tSPARSE (default) uses floating-point sparse LU factorization.\n\t\tEXACT uses SymPy row reduction, which is much slower on large circuits.\n\t\tITERATIVE uses preconditioned CG, GMRES or BICGSTAB for circuits too large to factor.\n\t\tIts preconditioner is IC, ILU, JACOBI or NONE, and AUTO picks both.  Tolerance defaults to 1e-10.\n\t\tFormat: SOLVER [SPARSE or EXACT]\n\t\tFormat: SOLVER ITERATIVE [method] [preconditioner] [tolerance]\n")
+    print("> " + "\033[1;34;40m" + "TOL" + "\033[1;32;40m" + "\tSets the tolerance of a component for MONTECARLO, as a fraction or a percentage.  R, V or I in place of a\n\t\tcomponent sets it for every component of that type without its own.  UNIFORM (default) draws values\n\t\tevenly within the tolerance, and GAUSSIAN treats the tolerance as three standard deviations,\n\t\twith draws below 0.1% of the nominal value clamped to it.\n\t\tTOL alone lists tolerances, TOL CLEAR removes them, and a tolerance of 0 removes one.\n\t\tFormat: TOL [component or R, V, I] [tolerance] [UNIFORM or GAUSSIAN]\n")
+    print("> " + "\033[1;34;40m" + "MONTECARLO" + "\033[1;32;40m" + "\tSolves the circuit for many random draws of its toleranced values and prints the mean, standard\n\t\tdeviation, extremes and histogram of each output.  Limits after an output, as in V(N2)=4.9:5.1,\n\t\tgive the yield.  Samples are drawn in batches from a fixed SEED, 1 by default, and are not kept.\n\t\tFormat: MONTECARLO [samples] [V() or I() ...] [SEED n] [WORKERS n]\n")
+    print("> " + "\033[1;34;40m" + "STATS" + "\033[1;32;40m" + "\tPrints wall time, call count, and peak memory of each solver phase, and the size of the last factored matrix.\n\t\tON starts collecting, OFF stops, RESET clears, and TRACE also writes one JSON line per phase to a file.\n\t\tFormat: STATS\n\t\t        STATS [ON, OFF, RESET, or TRACE fileName.jsonl]\n")
+    print("> " + "\033[1;34;40m" + "SWEEP" + "\033[1;32;40m" + "\tSolves the circuit for each value of a V or I source from start to stop in steps of step.\n\t\tThe matrix is factored once and reused for every sweep point.\n\t\tV() and I() queries can be listed after the step to choose the printed columns.  V(ALL) is printed by default.\n\t\tFormat: SWEEP [SOURCE] [START] [STOP] [STEP] [V() or I() ...]\n")
+    print("> " + "\033[1;34;40m" + "WORKERS" + "\033[1;32;40m" + "\tSets the number of processes that solve the islands of a circuit, groups of nodes joined only through GND.\n\t\tIslands are solved on their own the first time a circuit is solved.  1 (default) solves them one at a time.\n\t\tFormat: WORKERS [count]\n")
     print("\n")
 # end
     print("────────────────────────────────────────────────────────────────────────────────\033[0m")
@@ -152,74 +1454,142 @@ def helpprint(): # Prints general help statement, including syntax guide and key
 #__________________________________________________________________________________________________________________________________________
 #LINE INTERPRETING FUNCTIONS
 
-def importFromLine(line): # Opens text file called by user input.
+importChunkSize = 1 << 20    # Approximate number of characters read from a netlist file at a time.
+
+def importFromLine(line, circuit): # Imports the text file called by user input into a Circuit.  Use IMPORT QUIET to skip printing the file contents.
     fileName = line[len("IMPORT")+1:]
-    returnArray = []
-    lineList = []
-    compDict = {}
+    quiet = fileName[0:len("QUIET ")].upper() == "QUIET "
+    if quiet:
+        fileName = fileName[len("QUIET "):]
+
     try:
-        file = open(fileName, "rt")
-        print("\n\033[1;34;40mContents of %s:\n┌──────────────────────────────────────────────────────────────────────────────┐" %fileName)
-        for fileLine in file:
-            if fileLine[-1] == '\n':
-                fileLine = fileLine[0:-1]
-            print("│" + fileLine.ljust(78, ' ') + "│")
-            lineList.append(fileLine)
-        print("└──────────────────────────────────────────────────────────────────────────────┘\033[0m")
-        file.close()
-
-        for l in lineList:
-            returnArray.append(nodeAssign(l))
-
-        num = len(returnArray)
+        if not quiet:
+            print("\n\033[1;34;40mContents of %s:\n┌──────────────────────────────────────────────────────────────────────────────┐" %fileName)
+        num, errors = circuit.load(fileName, echo = not quiet)
+        if not quiet:
+            print("└──────────────────────────────────────────────────────────────────────────────┘\033[0m")
+
+        for lineNum, message in errors[0:20]:
+            print("\033[1;31;40m" + "ERROR:  Line %d: %s" %(lineNum, message) + "\033[0m")
+        if len(errors) > 20:
+            print("\033[1;31;40m" + "ERROR:  %d more lines could not be read." %(len(errors) - 20) + "\033[0m")
+
         if num == 1:
             print("\033[1;34;40mImported %d branch.\033[0m\n" %num)
         else:
             print("\033[1;34;40mImported %d branches.\033[0m\n" %num)
 
-        return returnArray
+        return num
 
     except FileNotFoundError:
         print("\n\033[1;31;40m" + "ERROR:  File '%s' not found." %fileName + "\033[0m\n")
     except OSError:
         print("\n\033[1;31;40m" + "ERROR:  Invalid file name or path." + "\033[0m\n")
+    return 0
 #END def importFromLine()
 
 
-def nodeAssign(line):  #Extract node and component names and value from line of entered text
-    try: 
-        line = line.upper()
-        newBranch = Branch('', '', 0.0, '')
-        i = 0
-        while line[i] != ' ':
-            newBranch.startNode = newBranch.startNode + line[i]
-            i += 1
-
-
-        i = -1
-        while line[i] != ' ':
-            newBranch.endNode = line[i] + newBranch.endNode
-            i -= 1
-
-        i = len(newBranch.startNode)+1
-        while line[i] != " " and line[i] != "=":
-            newBranch.compName = newBranch.compName + line[i]
-            i += 1
-
-        if line[i] == "=":
-            i += 1
-            compValTemp = ""
-            while line[i] != " ":
-                compValTemp = compValTemp + line[i]
-                i += 1
-            newBranch.compVal = engNot(compValTemp, 'from')
-
-        if newBranch and newBranch.validComp():
-            return newBranch
+
+@profiler.profiled("import")
+def importNetlist(fileName, netlist, compDict, echo = False): # Streams a netlist file, or an open text file, into a Netlist and component dictionary, reading it in chunks of lines.  Returns the number of branches added and a list of (line number, message) errors.
+    num = 0
+    errors = []
+    lineNum = 0
+
+    gcEnabled = gc.isenabled()
+    gc.disable()    # Every branch allocates a few container objects, so cyclic garbage collection would otherwise run many times during a large import
+    try:
+        with (open(fileName, "rt") if isinstance(fileName, str) else contextlib.nullcontext(fileName)) as file:
+            while True:
+                lines = file.readlines(importChunkSize)
+                if not lines:
+                    break
+                if echo:
+                    sys.stdout.write("".join("│" + fileLine.rstrip("\n").ljust(78, ' ') + "│\n" for fileLine in lines))
+
+                for fileLine in lines:
+                    lineNum += 1
+                    tokens = fileLine.upper().split()
+                    if not tokens or tokens[0][0] == '*':   # Blank lines and SPICE-style comments
+                        continue
+
+                    try:
+                        if len(tokens) == 1 and '=' in tokens[0]:
+                            name, value = parseCompValue(tokens[0])
+                            compDict[name] = value
+                            continue
+
+                        branchVal = parseBranchTokens(tokens)
+                        if branchVal.compName in netlist.compIndex:
+                            raise ValueError("Component %s already exists." %branchVal.compName)
+                    except ValueError as error:
+                        errors.append((lineNum, str(error)))
+                        continue
+
+                    if branchVal.compVal or branchVal.compName not in compDict:
+                        compDict[branchVal.compName] = branchVal.compVal
+                    branchVal.compVal = 0
+                    netlist.addBranch(branchVal)
+                    num += 1
+    finally:
+        if gcEnabled:
+            gc.enable()
+
+    return num, errors
+#END def importNetlist()
+
+
+
+engPrefixes = {'T': 10**12, 'G': 10**9, 'M': 10**6, 'MEG': 10**6, 'Meg': 10**6, 'K': 10**3, 'k': 10**3, 'm': 10**-3, 'u': 10**-6, 'n': 10**-9, 'p': 10**-12}
+
+def parseValue(valueStr): # Converts a value from engineering notation like engNot(valueStr, "from"), with a fast path for plain numbers and single suffixes.
+    try:
+        if valueStr[-1:].isalpha():
+            suffix = valueStr[-3:] if valueStr[-3:] in engPrefixes else valueStr[-1]
+            if suffix in engPrefixes:
+                return float(valueStr[0:-len(suffix)]) * engPrefixes[suffix]
         else:
-            return None
-        
-    except:
+            return float(valueStr)
+    except ValueError:
+        pass
+    try:
+        return engNot(valueStr, "from")
+    except ValueError:
+        raise ValueError("Invalid value '%s'." %valueStr) from None
+#END def parseValue()
+
+
+
+def parseCompValue(token): # Splits a [COMPONENT]=[VALUE] token.  Raises ValueError if the component name or value is invalid.
+    name, sep, valueStr = token.partition('=')
+    if not (name[0:1] in ['R', 'V', 'I', 'D'] and (len(name) == 1 or name[1:].isdigit())):
+        psuedoBranch = Branch('', '', 0.0, name)
+        if not name or not psuedoBranch.validComp():
+            raise ValueError("Invalid component '%s'." %name)
+        name = psuedoBranch.compName
+    return name, parseValue(valueStr)
+#END def parseCompValue()
+
+
+
+def parseBranchTokens(tokens): # Builds a Branch from the whitespace-split tokens of a branch description.  Raises ValueError if they do not describe a valid branch.
+    if len(tokens) != 3:
+        raise ValueError("Expected [START NODE] [COMPONENT] [END NODE], found %d fields." %len(tokens))
+    if '=' in tokens[1]:
+        name, value = parseCompValue(tokens[1])
+    else:
+        name, value = parseCompValue(tokens[1] + "=0")
+    newBranch = Branch(tokens[0], tokens[2], 0, name)
+    newBranch.compVal = value
+    return newBranch
+#END def parseBranchTokens()
+
+
+
+def nodeAssign(line):  #Extract node and component names and value from line of entered text
+    try:
+        return parseBranchTokens(line.upper().split())
+    except ValueError:
         return None
 #END def nodeAssign()
 
@@ -306,188 +1676,213 @@ def engNot(Value, toOrFromStr, short = False):  # Converts to and from engineeri
 
 
 
-def nodalAnalysis(branchArray, nodeDict):  # Solves for nodal voltages based on array of branches and dictionary object containing node names as keys and index of branches that refer to them
-    nodeList = list(nodeDict.keys())
-    nodeMat = [[0.0] * (len(nodeList)+1) for n in range(len(nodeList))]
-    for i in range(len(nodeMat)):
-        node = nodeList[i]
-        voltageNode=False
-
-        for n in nodeDict[node][0]:
-            branch = branchArray[n]
-            if not voltageNode:
-                if branch.compName[0] == 'R':
-                    comp = 1/branch.compVal
-                    if branch.startNode != "GND":
-                        nodeMat[i][nodeList.index(branch.startNode)] += comp
-                    
-                    if branch.endNode != "GND":
-                        nodeMat[i][nodeList.index(branch.endNode)] -= comp
-
-                elif branch.compName[0] == 'V':
-                    nodeMat[i] = [0.0] * (len(nodeList)+1)
-                    if branch.startNode != "GND":
-                        nodeMat[i][nodeList.index(branch.startNode)] = 1
-                    if branch.endNode != "GND":
-                        nodeMat[i][nodeList.index(branch.endNode)] = -1
-                    voltageNode = True
-                    
-                    nodeMat[i][-1] = branch.compVal
-
-                elif branch.compName[0] == 'I':
-                    nodeMat[i][-1] += branch.compVal
-
-        for n in nodeDict[node][1]:
-            if not voltageNode:
-                branch = branchArray[n]
-                if branch.compName[0] == 'R':
-                    comp = 1/branch.compVal
-                    if branch.startNode != "GND":
-                        nodeMat[i][nodeList.index(branch.startNode)] -= comp
-                    
-                    if branch.endNode != "GND":
-                        nodeMat[i][nodeList.index(branch.endNode)] += comp
-
-                elif branch.compName[0] == 'V':
-                    nodeMat[i] = [0.0] * (len(nodeList)+1)
-                
-                    if branch.startNode == "GND":
-                        nodeMat[i][nodeList.index(branch.endNode)] = -1
-                        nodeMat[i][-1] = branch.compVal
-                        voltageNode = True
-                    else:
-                        otherNodes = superNode(branchArray, nodeDict, branch.startNode)
-                        for l in range(len(otherNodes[0])):
-                            if otherNodes[0][l] == "ENDOFMAT":
-                                nodeMat[i][-1] += otherNodes[1][l]
-                            else:
-                                nodeMat[i][nodeList.index(otherNodes[0][l])] += otherNodes[1][l]
-                        voltageNode = True
+engSuffixes = numpy.array(['p', 'n', 'u', 'm', '', 'k', 'M', 'G', 'T'])
+
+def engNotArray(values, short = False):  # Converts an array of values to engineering notation strings, giving the same text as engNot(value, "to", short) for each.  The exponents are found for the whole array at once.
+    values = numpy.asarray(values, dtype=numpy.float64)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        exponent = numpy.clip(numpy.floor(numpy.log10(numpy.abs(values)) / 3) * 3, -12, 12)
+        exponent = numpy.where(numpy.isnan(exponent) | (values == 0), 0, exponent).astype(numpy.int64)
+        mantissa = values / 10.0**exponent
+        # log10 can land one side of a power of 1000 that the division lands on the other, so step once the way engNot() does
+        exponent += 3 * ((numpy.abs(mantissa) >= 1000) & (exponent < 12)) - 3 * ((numpy.abs(mantissa) < 1) & (mantissa != 0) & (exponent > -12))
+        mantissa = values / 10.0**exponent
+    text = map(('{:0<5.4}' if short else '{:.6f}').format, mantissa.tolist())
+    return list(map(str.__add__, text, engSuffixes[(exponent + 12) // 3].tolist()))
+#END def engNotArray()
+
+
+
+@profiler.profiled("build")
+def buildMNA(netlist):  # Stamps the Modified Nodal Analysis system from the netlist arrays.  Unknowns are the node voltages by node ID, then one branch current per voltage source.  The stamps are returned as COO triplet arrays.
+    nodeCount = len(netlist.nodeNames)
+    start = netlist.startIDs.astype(numpy.int64)
+    end = netlist.endIDs.astype(numpy.int64)
+    values = netlist.compVals
+
+    isResistor = netlist.compTypes == compTypeCodes['R']
+    if not values[isResistor].all():
+        raise ZeroDivisionError("Resistor %s has a value of zero." %netlist.compNames[numpy.flatnonzero(isResistor & (values == 0))[0]])
+    rStart = start[isResistor]
+    rEnd = end[isResistor]
+    comp = 1/values[isResistor]
+
+    isSource = netlist.compTypes == compTypeCodes['V']
+    sourceList = [netlist.compNames[i] for i in numpy.flatnonzero(isSource)]
+    vStart = start[isSource]
+    vEnd = end[isSource]
+    k = numpy.arange(nodeCount, nodeCount + len(sourceList))
+    ones = numpy.ones(len(sourceList))
+
+    # (row, column, value, mask) for each kind of stamp.  Masks drop the entries that would land on GND.
+    stamps = [(rStart, rStart, comp, rStart >= 0),
+              (rEnd, rEnd, comp, rEnd >= 0),
+              (rStart, rEnd, -comp, (rStart >= 0) & (rEnd >= 0)),
+              (rEnd, rStart, -comp, (rStart >= 0) & (rEnd >= 0)),
+              (vStart, k, ones, vStart >= 0),
+              (k, vStart, ones, vStart >= 0),
+              (vEnd, k, -ones, vEnd >= 0),
+              (k, vEnd, -ones, vEnd >= 0)]
+    rows = numpy.concatenate([row[mask] for row, col, val, mask in stamps])
+    cols = numpy.concatenate([col[mask] for row, col, val, mask in stamps])
+    vals = numpy.concatenate([val[mask] for row, col, val, mask in stamps])
+
+    rhs = numpy.zeros(nodeCount + len(sourceList))
+    rhs[nodeCount:] = values[isSource]
+    isCurrent = netlist.compTypes == compTypeCodes['I']
+    numpy.add.at(rhs, start[isCurrent & (start >= 0)], values[isCurrent & (start >= 0)])
+    numpy.subtract.at(rhs, end[isCurrent & (end >= 0)], values[isCurrent & (end >= 0)])
+
+    return sourceList, rows, cols, vals, rhs
+#END def buildMNA()
+
+
+
+def nodalAnalysis(netlist, backend = "SPARSE", workers = None, ordering = "MMD"):  # Solves for nodal voltages and voltage source currents of the branches in a Netlist
+    return islandAnalysis(netlist, backend, workers, ordering)
+#END def nodalAnalysis()
 
-                elif branch.compName[0] == 'I':
-                    nodeMat[i][-1] -= branch.compVal
 
-    #print(nodeList)
-    #print(Matrix(nodeMat))
-    nodeVoltages = Matrix(nodeMat).rref()[0].col(-1)
-    solutionMat = [nodeList,[]]
-    for i in range(len(nodeList)):
-        solutionMat[1].append(nodeVoltages[i])
 
-    return solutionMat
-#END def nodalAnalysis()
+islandGroupSize = 4096    # Islands smaller than this many unknowns are factored together with their neighbours in island order as one block-diagonal system.
 
+@profiler.profiled("islandAnalysis")
+def islandAnalysis(netlist, backend = "SPARSE", workers = None, ordering = "MMD"):  # Solves each island of the circuit, found by Netlist.islands(), as its own system and merges the results.  With more than one worker, islands are solved on a process pool, as SuperLU holds the GIL while it factors.
+    labels, grounded = netlist.islands()
+    if not grounded.all():
+        raise FloatingNodeError([netlist.nodeNames[i] for i in numpy.flatnonzero(~grounded[labels])])
+    if netlist.nonlinear():
+        return NewtonFactor(netlist, backend, ordering).results()     # Newton-Raphson solves the circuit as one system
 
+    sourceList, rows, cols, vals, rhs = buildMNA(netlist)
+    nodeCount = len(netlist.nodeNames)
+    size = len(rhs)
+    if not size:
+        return [[], [], {}]
 
-def superNode(branchArray, nodeDict, nodeName, branchToExclude = None):  # Assigns KCL equations if the node needs to become supernode, calls itself recursively for each voltage source encountered.
-    superNodeList = [[],[]]
-
-    for i in nodeDict[nodeName][0]:
-        branch = branchArray[i]
-
-        if branch != branchToExclude:
-            if branch.compName[0] == 'R':
-                if branch.startNode not in superNodeList[0]:
-                    superNodeList[0].append(branch.startNode)
-                    superNodeList[1].append(0)
-                if branch.endNode not in superNodeList[0] and branch.endNode != "GND":
-                    superNodeList[0].append(branch.endNode)
-                    superNodeList[1].append(0)
-
-                superNodeList[1][superNodeList[0].index(branch.startNode)] += 1/branch.compVal
-                if branch.endNode != "GND":
-                    superNodeList[1][superNodeList[0].index(branch.endNode)] -= 1/branch.compVal
-
-            if branch.compName[0] == 'V':
-                temp = superNode(branchArray, nodeDict, branch.endNode, branchToExclude=branch)
-                for t in range(len(temp[0])):
-                    if temp[0][t] not in superNodeList[0]:
-                        superNodeList[0].append(temp[0][t])
-                        superNodeList[1].append(0)
-
-                    superNodeList[1][superNodeList[0].index(temp[0][t])] += temp[1][t]
-            
-            if branch.compName[0] == 'I':
-                    if "ENDOFMAT" not in superNodeList[0]:
-                        superNodeList[0].append(branch.endNode)
-                        superNodeList[1].append(0)
-                    superNodeList[0][superNodeList[0].index("ENDOFMAT")] -= branch.compVal
-
-    for i in nodeDict[nodeName][1]:
-        branch = branchArray[i]
-        if branch != branchToExclude:
-            if branch.compName[0] == 'R':
-                if branch.startNode not in superNodeList[0]:
-                    superNodeList[0].append(branch.startNode)
-                    superNodeList[1].append(0)
-                if branch.endNode not in superNodeList[0] and branch.startNode != "GND":
-                    superNodeList[0].append(branch.endNode)
-                    superNodeList[1].append(0)
-
-                if branch.startNode != "GND":
-                    superNodeList[1][superNodeList[0].index(branch.startNode)] -= 1/branch.compVal
-                superNodeList[1][superNodeList[0].index(branch.endNode)] += 1/branch.compVal
-
-            if branch.compName[0] == 'V':
-                temp = superNode(branchArray, nodeDict, branch.startNode, branchToExclude=branch)
-                for t in range(len(temp[0])):
-                    if temp[0][t] not in superNodeList[0]:
-                        superNodeList[0].append(temp[0][t])
-                        superNodeList[1].append(0)
-
-                    superNodeList[1][superNodeList[0].index(temp[0][t])] += temp[1][t]
-
-            if branch.compName[0] == 'I':
-                    if "ENDOFMAT" not in superNodeList[0]:
-                        superNodeList[0].append(branch.endNode)
-                        superNodeList[1].append(0)
-                    superNodeList[0][superNodeList[0].index("ENDOFMAT")] += branch.compVal
-
-    return superNodeList
-# END def superNode()
-
-
-
-def currentCalc(branchArray, results, nodeDict, compName):
-    if compName[0] == 'R':
-        for branch in branchArray:
-            if branch.compName == compName:
-                start = branch.startNode
-                end = branch.endNode
-                compVal = branch.compVal
-
-        if start == "GND":
-            current = (-results[1][results[0].index(end)])/compVal
-        elif end == "GND":
-            current = (results[1][results[0].index(start)])/compVal
+    # Each source current unknown belongs to the island of its nodes.  A source with both ends on GND gets an island of its own and fails to factor as before.
+    isSource = netlist.compTypes == compTypeCodes['V']
+    sourceNodes = numpy.maximum(netlist.startIDs[isSource], netlist.endIDs[isSource])
+    sourceLabels = numpy.where(sourceNodes >= 0, numpy.append(labels, 0)[sourceNodes], len(grounded) + numpy.arange(len(sourceNodes)))
+    unknownLabels = numpy.concatenate((labels, sourceLabels.astype(labels.dtype)))
+
+    blocks = []
+    blockStart = 0
+    for islandEnd in numpy.cumsum(numpy.bincount(unknownLabels)).tolist():
+        if islandEnd - blockStart >= islandGroupSize or islandEnd == size:
+            blocks.append((blockStart, islandEnd))
+            blockStart = islandEnd
+
+    if len(blocks) == 1:    # Nothing to split, so the matrix is factored as it is
+        solution = numpy.asarray(solverBackends[backend.upper()](rows, cols, vals, size, ordering.upper())(rhs))
+    else:
+        # Sorting the unknowns by island makes the matrix block diagonal, so every island is a contiguous diagonal block
+        perm = numpy.argsort(unknownLabels, kind="stable")
+        nodeMat = coo_matrix((vals, (rows, cols)), shape=(size, size)).tocsr()[perm][:, perm]
+        rhs = rhs[perm]
+
+        def blockTask(block):
+            start, end = block
+            blockMat = nodeMat[start:end, start:end].tocoo()
+            return backend.upper(), ordering.upper(), blockMat.row, blockMat.col, blockMat.data, end - start, rhs[start:end]
+
+        if workers and workers > 1:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(blocks))) as executor:
+                pieces = list(executor.map(islandTask, map(blockTask, blocks)))
         else:
-            current = (results[1][results[0].index(start)]-results[1][results[0].index(end)])/compVal
-        
-        return current
-    
-    elif compName[0] == 'V':
-        current = 0
-        for branch in branchArray:
-            if branch.compName == compName:
-                if branch.startNode != 'GND':
-                    testNode = branch.startNode
-                else:
-                    testNode = branch.endNode
+            pieces = [islandTask(blockTask(block)) for block in blocks]
 
-        for i in nodeDict[testNode][0]:
-            if branchArray[i].compName != compName:
-                current += currentCalc(branchArray, results, nodeDict, branchArray[i].compName)
-        
-        for i in nodeDict[testNode][1]:
-            if branchArray[i].compName != compName:
-                current -= currentCalc(branchArray, results, nodeDict, branchArray[i].compName)
+        pieces = numpy.concatenate(pieces)
+        solution = numpy.empty(size, dtype=pieces.dtype)
+        solution[perm] = pieces
+
+    return [list(netlist.nodeNames), list(solution[0:nodeCount]), {name: solution[nodeCount+k] for k, name in enumerate(sourceList)}]
+#END def islandAnalysis()
+
+
+
+def islandTask(task):  # Factors and solves one block of islands given as (backend, ordering, rows, cols, vals, size, rhs), in this process or a pool worker.
+    backend, ordering, rows, cols, vals, size, rhs = task
+    return numpy.asarray(solverBackends[backend](rows, cols, vals, size, ordering)(rhs))
+#END def islandTask()
+
+
+
+def sourceRHS(compBranch, nodeNum, sourceNum, size):  # Returns the right-hand side column produced by one V or I source with a value of 1.
+    column = numpy.zeros(size)
+    if compBranch.compName[0] == 'V':
+        column[len(nodeNum) + sourceNum[compBranch.compName]] = 1.0
+    elif compBranch.compName[0] == 'I':
+        if compBranch.startNode != "GND":
+            column[nodeNum[compBranch.startNode]] = 1.0
+        if compBranch.endNode != "GND":
+            column[nodeNum[compBranch.endNode]] = -1.0
+    else:
+        raise ValueError("Only V and I sources can be swept.")
+    return column
+#END def sourceRHS()
+
+
+
+def batchAnalysis(netlist, sourceNames, sourceValues, backend = "SPARSE"):  # Solves the circuit for many source configurations at once.  sourceValues has one row per configuration and one column per name in sourceNames.
+    return MNAFactor(netlist, backend).batch(sourceNames, sourceValues)
+#END def batchAnalysis()
+
+
+
+def sweepAnalysis(netlist, compName, values, backend = "SPARSE"):  # Solves the circuit for every value of one V or I source.  The matrix is factored once and each sweep point is a column of the right-hand side.
+    return MNAFactor(netlist, backend).sweep(compName, values)
+#END def sweepAnalysis()
 
-        return -current
+
+
+def branchVoltage(netlist, results, branch):  # Returns the voltage drop from start node to end node of a branch.
+    voltage = 0.0
+    if branch.startNode != "GND":
+        voltage = voltage + results[1][netlist.nodeIDs[branch.startNode]]
+    if branch.endNode != "GND":
+        voltage = voltage - results[1][netlist.nodeIDs[branch.endNode]]
+    return voltage
+#END def branchVoltage()
+
+
+
+@profiler.profiled("branchCalc")
+def branchCalc(netlist, results):  # Returns arrays of voltage drop and current for every branch, in branch order, from one pass over the node voltages.  Works on sweep results with one column per point as well.
+    voltages = numpy.asarray(results[1])
+    voltages = numpy.concatenate((voltages, numpy.zeros((1,) + voltages.shape[1:], dtype=voltages.dtype)))    # Node ID -1 (GND) reads the trailing zero row
+    drops = voltages[netlist.startIDs] - voltages[netlist.endIDs]     # Same as the transposed incidence matrix times the node voltages
+
+    compVals = netlist.compVals.reshape((-1,) + (1,) * (drops.ndim - 1))
+    isResistor = (netlist.compTypes == compTypeCodes['R']).reshape(compVals.shape)
+    currents = numpy.where(isResistor, drops / numpy.where(isResistor, compVals, 1.0), compVals + 0 * drops)
+    isDiode = netlist.compTypes == compTypeCodes['D']
+    if isDiode.any():
+        currents[isDiode] = diodeCurrent(drops[isDiode], numpy.where(compVals[isDiode] > 0, compVals[isDiode], diodeSaturation))[0]
+    for compName, current in results[2].items():
+        currents[netlist.compIndex[compName]] = current
+
+    return drops, currents
+#END def branchCalc()
+
+
+
+def currentCalc(netlist, results, compName):
+    branch = netlist.getBranch(compName)
+    if branch is None:
+        return False
+
+    if compName[0] == 'R':
+        return branchVoltage(netlist, results, branch)/branch.compVal
+    
+    elif compName[0] == 'V':
+        return results[2][compName]
     
     elif compName[0] == 'I':
-        for branch in branchArray:
-            if branch.compName == compName:
-                return branch.compVal
+        return branch.compVal
+
+    elif compName[0] == 'D':
+        return diodeCurrent(branchVoltage(netlist, results, branch), branch.compVal or diodeSaturation)[0]
 
     else:
         return False
@@ -495,6 +1890,1108 @@ def currentCalc(branchArray, results, nodeDict, compName):
 
 
 
+def theveninPairs(netlist, operand):  # Splits the operand of an RTH, VTH or IN query into (A, B) node pairs.  Pairs are separated by ';', a single node is paired with GND, and ALL pairs every node with GND.
+    operand = operand.upper().replace(" ", "")
+    if operand == "ALL":
+        return [(name, "GND") for name in netlist.nodeNames]
+    pairs = []
+    for item in operand.split(';'):
+        nodes = item.split(',')
+        if len(nodes) == 1:
+            nodes.append("GND")
+        if len(nodes) != 2 or not nodes[0] or not nodes[1] or nodes[0] == nodes[1]:
+            raise ValueError("Invalid node pair '%s'." %item)
+        pairs.append((nodes[0], nodes[1]))
+    return pairs
+#END def theveninPairs()
+
+
+
+diodeThermalVoltage = 0.025852    # kT/q at 300 K.  Diodes use an emission coefficient of 1.
+diodeSaturation = 1e-14           # Saturation current in amperes of a diode entered without a value
+newtonSettings = {"reltol": 1e-9, "vntol": 1e-9, "maxIterations": 100, "gmin": 1e-12}    # gmin is a conductance across every diode, so a reverse biased diode does not leave its node floating
+
+def diodeCurrent(drops, saturation):  # Returns the current and conductance of diodes at the given anode to cathode voltages, including the gmin conductance across each diode.
+    exponential = numpy.exp(numpy.minimum(drops / diodeThermalVoltage, 700.0))
+    current = saturation * (exponential - 1) + newtonSettings["gmin"] * drops
+    conductance = saturation / diodeThermalVoltage * exponential + newtonSettings["gmin"]
+    return current, conductance
+#END def diodeCurrent()
+
+
+
+def diodeLimit(drops, oldDrops, saturation):  # Limits the change of forward diode voltages between Newton-Raphson iterations to a logarithmic step, so the exponential cannot overflow.  Same as pnjlim in SPICE.
+    critical = diodeThermalVoltage * numpy.log(diodeThermalVoltage / (numpy.sqrt(2) * saturation))
+    limit = (drops > critical) & (numpy.abs(drops - oldDrops) > 2 * diodeThermalVoltage)
+    limited = numpy.array(drops, dtype=numpy.float64)
+    fromForward = limit & (oldDrops > 0)
+    argument = 1 + (drops[fromForward] - oldDrops[fromForward]) / diodeThermalVoltage
+    limited[fromForward] = numpy.where(argument > 0, oldDrops[fromForward] + diodeThermalVoltage * numpy.log(numpy.maximum(argument, 1e-300)), critical[fromForward])
+    fromReverse = limit & (oldDrops <= 0)
+    limited[fromReverse] = diodeThermalVoltage * numpy.log(drops[fromReverse] / diodeThermalVoltage)
+    return limited
+#END def diodeLimit()
+
+
+
+#__________________________________________________________________________________________________________________________________________
+#SOLVER BACKENDS
+# Each backend factors the nodal matrix, given as COO triplets (row, column, value), and returns a solve function.
+# The solve function accepts a right-hand side vector, or a 2-D array with one right-hand side per column, and reuses the factorization.
+# It also carries the elimination order it used as solve.order, which can be passed back in to skip the ordering step, and fill-in statistics as solve.stats.
+
+sparseOrderings = {"MMD": "MMD_AT_PLUS_A", "COLAMD": "COLAMD", "RCM": None, "NATURAL": "NATURAL"}    # Ordering name -> SuperLU permc_spec, or None when the order is computed here
+orderingAliases = {"AMD": "MMD"}    # Earlier names still accepted.  SuperLU runs multiple minimum degree on A^T + A, not approximate minimum degree.
+
+@profiler.profiled("factor")
+def factorSparse(rows, cols, vals, size, ordering = "MMD", order = None):  # Default backend.  Assembles a float64 CSC matrix and factors it with sparse LU factorization after a fill-reducing reordering.
+    ordering = orderingAliases.get(ordering, ordering)
+    nodeMat = coo_matrix((numpy.asarray(vals, dtype=numpy.float64), (numpy.asarray(rows, dtype=numpy.int64), numpy.asarray(cols, dtype=numpy.int64))), shape=(size, size)).tocsc()
+    if size == 0:
+        factor = None
+        order = numpy.zeros(0, dtype=numpy.int64)
+        solve = lambda rhs: numpy.zeros(numpy.shape(rhs))
+    elif order is None and sparseOrderings[ordering] is not None:
+        factor = splu(nodeMat, permc_spec=sparseOrderings[ordering])
+        order = numpy.argsort(factor.perm_c)    # perm_c maps each column to its place in the elimination order
+        solve = lambda rhs: factor.solve(numpy.asarray(rhs, dtype=numpy.float64))
+    else:
+        if order is None:
+            order = reverse_cuthill_mckee(nodeMat, symmetric_mode=True).astype(numpy.int64)     # MNA stamps are structurally symmetric
+        factor = splu(nodeMat[order][:, order], permc_spec="NATURAL")    # Same order on rows and columns keeps the diagonal in place for pivoting
+
+        def solve(rhs):
+            rhs = numpy.asarray(rhs, dtype=numpy.float64)
+            solution = numpy.empty_like(rhs)
+            solution[order] = factor.solve(rhs[order])
+            return solution
+
+    solve.order = order
+    solve.stats = fillStats(nodeMat, order, factor.nnz if factor else 0, ordering)
+    profiler.note("matrix", solve.stats)
+    return solve
+#END def factorSparse()
+
+
+
+def fillStats(nodeMat, order, factorNnz, ordering):  # Returns the size, bandwidth and fill-in of a factored matrix as a dictionary.  Bandwidth is measured with rows and columns in elimination order.
+    position = numpy.empty(len(order), dtype=numpy.int64)
+    position[order] = numpy.arange(len(order))
+    entries = nodeMat.tocoo()
+    return {"ordering": ordering,
+            "size": nodeMat.shape[0],
+            "nnz": entries.nnz,
+            "factorNnz": factorNnz,
+            "fillRatio": factorNnz / entries.nnz if entries.nnz else 0.0,
+            "bandwidth": int(numpy.abs(position[entries.row] - position[entries.col]).max(initial=0))}
+#END def fillStats()
+
+
+
+@profiler.profiled("factor")
+def factorExact(rows, cols, vals, size, ordering = None, order = None):  # Opt-in exact backend.  Builds the dense matrix, and solves a first single right-hand side by SymPy row reduction of the augmented matrix.
+    # Later solves, and blocks of right-hand sides, use a LU decomposition made on first need.  It costs more than one row reduction, so a circuit solved only once does not pay for it.  The ordering is not used.
+    from sympy import Matrix    # Imported on first use, since SymPy takes longer to import than the rest of PCTspice together
+    nodeMat = [[0.0] * size for n in range(size)]
+    for i in range(len(vals)):
+        nodeMat[rows[i]][cols[i]] += vals[i]
+    matrix = Matrix(nodeMat)
+    factors = []    # (lower, upper, row swaps) once made
+
+    def solve(rhs):
+        rhs = numpy.asarray(rhs)
+        vector = Matrix(rhs.tolist())
+        if rhs.ndim == 1 and not factors and not solve.solves and size:
+            solve.solves += 1
+            reduced, pivots = matrix.row_join(vector).rref()
+            if tuple(pivots[0:size]) != tuple(range(size)):
+                raise RuntimeError("Factor is exactly singular")
+            return list(reduced.col(-1))
+        if not factors:
+            lower, upper, perm = matrix.LUdecomposition()
+            if any(upper[i, i] == 0 for i in range(size)):
+                raise RuntimeError("Factor is exactly singular")
+            factors.extend((lower, upper, perm))
+        lower, upper, perm = factors
+        solve.solves += 1
+        for swap in perm:
+            vector = vector.elementary_row_op("n<->m", row1=swap[0], row2=swap[1])
+        solution = upper.upper_triangular_solve(lower.lower_triangular_solve(vector))
+        if rhs.ndim == 1:
+            return list(solution)
+        return numpy.array(solution.tolist(), dtype=object)
+
+    solve.solves = 0
+    solve.order = None
+    solve.stats = None
+    return solve
+#END def factorExact()
+
+
+iterativeMethods = ["AUTO", "CG", "GMRES", "BICGSTAB"]
+iterativePreconditioners = ["AUTO", "IC", "ILU", "JACOBI", "NONE"]
+iterativeSettings = {"method": "AUTO", "preconditioner": "AUTO", "tolerance": 1e-10, "maxIterations": 10000}    # Shared by every circuit.  AUTO picks CG with IC when every voltage source has a terminal on GND, and GMRES with ILU otherwise.
+# CG and IC need that symmetric form, so circuits with a source between two nodes fall back to GMRES and ILU.  The method and preconditioner used are reported in solve.stats.
+# A source between two nodes leaves zero diagonals, on which an incomplete factor can break down.  ILU is then tried again with threshold pivoting, and then JACOBI is used instead.
+iluAttempts = [{"drop_tol": 1e-5, "fill_factor": 2}, {"drop_tol": 1e-5, "fill_factor": 2, "permc_spec": "MMD_AT_PLUS_A", "diag_pivot_thresh": 0.1}]   # Fill limited to about twice the matrix nonzeros
+
+@profiler.profiled("factor")
+def factorIterative(rows, cols, vals, size, ordering = None, order = None):  # Backend for circuits too large to factor.  Solves with preconditioned Krylov iterations, keeping memory proportional to the matrix nonzeros.  Instead of an elimination order, order is the last solution, used as the starting guess.
+    tolerance = iterativeSettings["tolerance"]
+    nodeMat = coo_matrix((numpy.asarray(vals, dtype=numpy.float64), (numpy.asarray(rows, dtype=numpy.int64), numpy.asarray(cols, dtype=numpy.int64))), shape=(size, size)).tocsr()
+    nodeMat.sum_duplicates()
+
+    # Source current unknowns have a zero diagonal.  A source with a terminal on GND has a single entry in its row, which fixes the voltage of its other node.
+    # Those node voltages are moved to the right-hand side, leaving the resistor conductances, which are symmetric positive definite.
+    sourceRows = numpy.flatnonzero(nodeMat.diagonal() == 0)
+    reduced = bool(numpy.all(numpy.diff(nodeMat.indptr)[sourceRows] == 1))
+    method = iterativeSettings["method"]
+    if method == "AUTO" or (method == "CG" and not reduced):
+        method = "CG" if reduced else "GMRES"
+    preconditioner = iterativeSettings["preconditioner"]
+    if preconditioner == "AUTO" or (preconditioner == "IC" and not reduced):
+        preconditioner = "IC" if reduced else "ILU"
+
+    if reduced:
+        fixedNodes = nodeMat.indices[nodeMat.indptr[sourceRows]]
+        fixedSigns = nodeMat.data[nodeMat.indptr[sourceRows]]
+        if len(numpy.unique(fixedNodes)) < len(fixedNodes):
+            raise RuntimeError("Factor is exactly singular")     # Two sources across the same node and GND, as the direct backends would find
+        isFree = numpy.ones(size, dtype=bool)
+        isFree[sourceRows] = False
+        isFree[fixedNodes] = False
+        freeRows = numpy.flatnonzero(isFree)
+        freeMat = nodeMat[freeRows]
+        system = freeMat[:, freeRows].tocsr()
+        fixedMat = freeMat[:, fixedNodes].tocsr()
+        fixedRowMat = nodeMat[fixedNodes]
+    else:
+        system = nodeMat
+
+    if not system.shape[0]:
+        inverse = None
+    elif preconditioner == "IC":
+        # Zero fill incomplete Cholesky in its diagonal form, M = (D + L) * D^-1 * (D + L)^T with L the strict lower triangle of the matrix.  Only D is computed here.
+        lower = tril(system, -1).tocsr()
+        indptr = lower.indptr.tolist()
+        indices = lower.indices.tolist()
+        data = lower.data.tolist()
+        pivots = system.diagonal().tolist()
+        for i in range(len(pivots)):
+            pivot = pivots[i]
+            for k in range(indptr[i], indptr[i+1]):
+                pivot -= data[k] * data[k] / pivots[indices[k]]
+            pivots[i] = pivot if pivot > 0 else system[i, i]
+        pivots = numpy.array(pivots)
+        # A triangular matrix factors without fill in its own order, which gives compiled triangular solves
+        triangle = splu((lower + diags(pivots)).tocsc(), permc_spec="NATURAL", diag_pivot_thresh=0.0, options={"SymmetricMode": True})
+        inverse = LinearOperator(system.shape, matvec=lambda vector: triangle.solve(pivots * triangle.solve(numpy.ravel(vector)), trans='T'))
+    elif preconditioner == "ILU":
+        inverse = None
+        for options in iluAttempts:
+            try:
+                incomplete = spilu(system.tocsc(), **options)
+            except RuntimeError:     # "Factor is exactly singular" from a zero pivot, although the circuit may be solvable
+                continue
+            inverse = LinearOperator(system.shape, matvec=incomplete.solve)
+            break
+        if inverse is None:
+            preconditioner = "JACOBI"
+    if preconditioner == "JACOBI" and system.shape[0]:
+        diagonal = system.diagonal()
+        scale = 1/numpy.where(diagonal != 0, diagonal, 1.0)
+        inverse = LinearOperator(system.shape, matvec=lambda vector: scale * numpy.ravel(vector))
+    elif preconditioner == "NONE":
+        inverse = None
+
+    guess = numpy.zeros(size) if order is None or len(order) != size else order
+    stats = {"method": method, "preconditioner": preconditioner, "tolerance": tolerance, "size": size, "nnz": nodeMat.nnz, "iterations": 0, "residual": 0.0, "solves": 0}
+
+    def solveVector(rhs):
+        iterations = [0]
+        def count(*args):
+            iterations[0] += 1
+
+        if reduced:
+            solution = numpy.zeros(size)
+            solution[fixedNodes] = rhs[sourceRows] / fixedSigns
+            systemRHS = rhs[freeRows] - fixedMat @ solution[fixedNodes]
+            start = guess[freeRows]
+        else:
+            systemRHS = rhs
+            start = guess
+
+        if not len(systemRHS):
+            systemSolution, info = start, 0
+        elif method == "CG":
+            systemSolution, info = cg(system, systemRHS, x0=start, rtol=tolerance, atol=0.0, maxiter=iterativeSettings["maxIterations"], M=inverse, callback=count)
+        elif method == "GMRES":
+            systemSolution, info = gmres(system, systemRHS, x0=start, rtol=tolerance, atol=0.0, restart=50, maxiter=iterativeSettings["maxIterations"], M=inverse, callback=count, callback_type="pr_norm")
+        else:
+            systemSolution, info = bicgstab(system, systemRHS, x0=start, rtol=tolerance, atol=0.0, maxiter=iterativeSettings["maxIterations"], M=inverse, callback=count)
+            if info < 0:    # A breakdown, which zero diagonals make likely.  GMRES does not break down.
+                stats["method"] = "GMRES"
+                systemSolution, info = gmres(system, systemRHS, x0=start, rtol=tolerance, atol=0.0, restart=50, maxiter=iterativeSettings["maxIterations"], M=inverse, callback=count, callback_type="pr_norm")
+
+        norm = numpy.linalg.norm(systemRHS)
+        stats["iterations"] = iterations[0]
+        stats["residual"] = float(numpy.linalg.norm(system @ systemSolution - systemRHS) / norm) if norm else 0.0
+        stats["solves"] += 1
+        if info != 0 or stats["residual"] > 100 * tolerance:    # BiCGSTAB can stop on a breakdown with a small recurrence residual but a wrong answer
+            raise ConvergenceError(dict(stats))
+
+        if reduced:
+            solution[freeRows] = systemSolution
+            solution[sourceRows] = (rhs[fixedNodes] - fixedRowMat @ solution) / fixedSigns     # Each source supplies the current its node draws through the resistors
+        else:
+            solution = systemSolution
+        guess[:] = solution
+        return solution
+
+    def solve(rhs):
+        rhs = numpy.asarray(rhs, dtype=numpy.float64)
+        if rhs.ndim == 1:
+            return solveVector(rhs)
+        return numpy.column_stack([solveVector(column) for column in rhs.T]) if rhs.shape[1] else numpy.zeros(rhs.shape)
+
+    solve.order = guess
+    solve.stats = stats
+    profiler.note("matrix", stats)
+    return solve
+#END def factorIterative()
+
+
+solverBackends = {"SPARSE": factorSparse, "EXACT": factorExact, "ITERATIVE": factorIterative}
+
+
+
+#__________________________________________________________________________________________________________________________________________
+#TOLERANCE ANALYSIS
+# Monte Carlo analysis draws every toleranced component value at random for each sample and solves the sampled circuits in batches.
+# Samples are stamped straight into the COO triplets of buildMNA(), so a batch is one stack of dense systems for small circuits, or one
+# block-diagonal sparse system for larger ones.  Circuits too large to batch are spread across a process pool instead, one batch per task.
+# Each batch draws from its own generator seeded with (seed, batch number), so results do not depend on the number of workers.
+
+toleranceDistributions = ["UNIFORM", "GAUSSIAN"]    # GAUSSIAN tolerances are three standard deviations
+monteCarloBlock = 1 << 20     # Matrix entries stamped per batch of samples, which bounds the memory of one batch
+monteCarloDense = 48          # Circuits up to this many unknowns are solved as a stack of dense matrices
+monteCarloPoolBelow = 16      # Circuits with fewer samples than this per batch use a process pool by default
+monteCarloFloor = 1e-3        # Smallest fraction of its nominal value a sampled component may take, so wide tolerances cannot reach zero or flip its sign
+histogramBins = 20
+
+
+class RunningStats: # Count, mean, variance, extremes, pass count and histogram of one output, updated one batch of samples at a time so samples are not kept.  The histogram range is set by the first batch, and later samples outside it are counted as under or over.
+    def __init__(self, name, low = None, high = None, bins = histogramBins):
+        self.name = name
+        self.low = low      # Limits for the yield, None where there is no limit
+        self.high = high
+        self.bins = bins
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0       # Sum of squared differences from the mean
+        self.min = numpy.inf
+        self.max = -numpy.inf
+        self.passed = 0
+        self.edges = None
+        self.histogram = numpy.zeros(bins, dtype=numpy.int64)
+        self.under = 0
+        self.over = 0
+    #END def __init__()
+
+
+    def add(self, values): # Merges a batch of samples into the statistics.
+        values = numpy.asarray(values, dtype=numpy.float64)
+        if not len(values):
+            return
+        count = len(values)
+        mean = values.mean()
+        delta = mean - self.mean
+        total = self.count + count
+        self.m2 += ((values - mean)**2).sum() + delta**2 * self.count * count / total
+        self.mean += delta * count / total
+        self.count = total
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.passed += numpy.count_nonzero(self.passes(values))
+
+        if self.edges is None:
+            # The first batch sets the range, widened more when it is small since later samples are then more likely to fall outside it
+            low, high = values.min(), values.max()
+            pad = (high - low) * max(0.05, 4 / numpy.sqrt(count)) or abs(low) * 1e-6 or 1e-12
+            self.edges = numpy.linspace(low - pad, high + pad, self.bins + 1)
+        self.histogram += numpy.histogram(values, self.edges)[0]
+        self.under += numpy.count_nonzero(values < self.edges[0])
+        self.over += numpy.count_nonzero(values > self.edges[-1])
+    #END def add()
+
+
+    def passes(self, values): # Returns a boolean array, True where a sample is within the limits.
+        passed = numpy.ones(len(values), dtype=bool)
+        if self.low is not None:
+            passed &= values >= self.low
+        if self.high is not None:
+            passed &= values <= self.high
+        return passed
+    #END def passes()
+
+
+    @property
+    def std(self):
+        return numpy.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+#END class RunningStats
+
+
+
+class MonteCarlo: # Monte Carlo tolerance analysis of a netlist.  Keeps running statistics of each output instead of the samples, so memory does not grow with the number of samples.
+    def __init__(self, netlist, tolerances, outputs, backend = "SPARSE", ordering = "MMD"):
+        floating = netlist.floatingNodes()
+        if floating:
+            raise FloatingNodeError(floating)
+        if backend not in ["SPARSE", "ITERATIVE"]:
+            raise ValueError("Monte Carlo analysis needs the SPARSE or ITERATIVE backend.")
+        if netlist.nonlinear():
+            raise ValueError("Monte Carlo analysis does not support diodes.")
+        self.backend = backend
+        self.ordering = ordering
+        self.nominal = numpy.array(netlist.compVals)
+        sourceList, rows, cols, vals, rhs = buildMNA(netlist)
+        self.rows = rows
+        self.cols = cols
+        self.size = len(rhs)
+        self.nodeCount = len(netlist.nodeNames)
+        compTypes = netlist.compTypes
+        start = numpy.where(netlist.startIDs >= 0, netlist.startIDs, self.size).astype(numpy.int64)     # GND maps to an extra zero column
+        end = numpy.where(netlist.endIDs >= 0, netlist.endIDs, self.size).astype(numpy.int64)
+
+        # Branch and sign behind each resistor entry of vals, in the order buildMNA() stamps them.  Voltage source entries follow and are fixed.
+        rIndex = numpy.flatnonzero(compTypes == compTypeCodes['R'])
+        hasStart = start[rIndex] < self.size
+        hasEnd = end[rIndex] < self.size
+        self.stampBranch = numpy.concatenate((rIndex[hasStart], rIndex[hasEnd], rIndex[hasStart & hasEnd], rIndex[hasStart & hasEnd]))
+        self.stampSign = numpy.repeat([1.0, 1.0, -1.0, -1.0], [numpy.count_nonzero(hasStart), numpy.count_nonzero(hasEnd)] + [numpy.count_nonzero(hasStart & hasEnd)] * 2)
+        self.fixedVals = vals[len(self.stampBranch):]
+        self.sourceBranch = numpy.flatnonzero(compTypes == compTypeCodes['V'])
+        self.currentBranch = numpy.flatnonzero(compTypes == compTypeCodes['I'])
+        self.currentStart = start[self.currentBranch]
+        self.currentEnd = end[self.currentBranch]
+
+        # A component's own tolerance wins over one given for its type as R, V or I
+        spread = numpy.zeros(netlist.count)
+        gaussian = numpy.zeros(netlist.count, dtype=bool)
+        for index, compName in enumerate(netlist.compNames):
+            tolerance, distribution = tolerances.get(compName, tolerances.get(compName[0], (0.0, "UNIFORM")))
+            spread[index] = tolerance
+            gaussian[index] = distribution == "GAUSSIAN"
+        self.varied = numpy.flatnonzero(spread)
+        self.spread = spread[self.varied]
+        self.gaussian = gaussian[self.varied]
+
+        # Each output is (x[a] - x[b]) / value[divide] + value[add], with -1 for an unused value
+        self.outputSpecs = []
+        self.stats = []
+        for output in outputs:
+            query, limits = (output.upper().replace(" ", "").split('=', 1) + [""])[0:2]
+            low, high = (limits.split(':', 1) + [""])[0:2] if limits else ("", "")
+            low = engNot(low, "from") if low else None
+            high = engNot(high, "from") if high else None
+            cmd, operand = query[0:query.find('(')], query[query.find('(')+1:-1]
+            if query.find('(') < 0 or not query.endswith(')'):
+                raise ValueError("Invalid output '%s'." %output)
+            if cmd == 'V' and operand == 'ALL':
+                names = list(netlist.nodeNames)
+            else:
+                names = [operand]
+            for name in names:
+                index = netlist.compIndex.get(name, -1)
+                if cmd == 'V' and name in netlist.nodeIDs:
+                    spec = (netlist.nodeIDs[name], self.size, -1, -1)
+                elif cmd == 'V' and index >= 0:
+                    spec = (start[index], end[index], -1, -1)
+                elif cmd == 'I' and index >= 0 and name[0] == 'R':
+                    spec = (start[index], end[index], index, -1)
+                elif cmd == 'I' and index >= 0 and name[0] == 'V':
+                    spec = (self.nodeCount + sourceList.index(name), self.size, -1, -1)
+                elif cmd == 'I' and index >= 0 and name[0] == 'I':
+                    spec = (self.size, self.size, -1, index)
+                else:
+                    raise ValueError("Invalid node or component in output '%s'." %output)
+                self.outputSpecs.append(spec)
+                self.stats.append(RunningStats(cmd + "(" + name + ")", low, high))
+
+        self.batchSize = max(1, monteCarloBlock // max(1, len(vals), netlist.count))
+        self.samples = 0
+        self.passed = 0     # Samples with every output within its limits
+        self.clamped = 0    # Component draws raised to monteCarloFloor
+        self.order = None
+        self.orderSize = None
+    #END def __init__()
+
+
+    def sample(self, batch, count, seed): # Returns the component values of one batch of samples, one row per sample, and the number of draws clamped to monteCarloFloor.
+        rng = numpy.random.default_rng((seed, batch))
+        values = numpy.tile(self.nominal, (count, 1))
+        uniform = rng.uniform(-1.0, 1.0, (count, len(self.varied)))
+        normal = rng.standard_normal((count, len(self.varied))) / 3
+        scale = 1 + self.spread * numpy.where(self.gaussian, normal, uniform)
+        clamped = numpy.count_nonzero(scale < monteCarloFloor)
+        values[:, self.varied] *= numpy.maximum(scale, monteCarloFloor)
+        return values, clamped
+    #END def sample()
+
+
+    @profiler.profiled("monteCarlo")
+    def solveBatch(self, batch, count, seed): # Solves one batch of sampled circuits.  Returns the outputs as an array with one row per sample, and the number of clamped draws.
+        values, clamped = self.sample(batch, count, seed)
+        vals = numpy.concatenate((self.stampSign / values[:, self.stampBranch], numpy.broadcast_to(self.fixedVals, (count, len(self.fixedVals)))), axis=1)
+        rhs = numpy.zeros((count, self.size+1))
+        rhs[:, self.nodeCount:self.size] = values[:, self.sourceBranch]
+        numpy.add.at(rhs, (slice(None), self.currentStart), values[:, self.currentBranch])
+        numpy.subtract.at(rhs, (slice(None), self.currentEnd), values[:, self.currentBranch])
+        rhs = rhs[:, 0:self.size]
+
+        if self.size <= monteCarloDense:
+            matrices = numpy.zeros((count, self.size * self.size))
+            numpy.add.at(matrices, (slice(None), self.rows * self.size + self.cols), vals)
+            try:
+                solution = numpy.linalg.solve(matrices.reshape(count, self.size, self.size), rhs[:, :, None])[:, :, 0]
+            except numpy.linalg.LinAlgError:
+                raise RuntimeError("Factor is exactly singular")
+        else:
+            offsets = numpy.arange(count)[:, None] * self.size
+            solve = solverBackends[self.backend]((self.rows + offsets).ravel(), (self.cols + offsets).ravel(), vals.ravel(), count * self.size,
+                                                 self.ordering, self.order if self.orderSize == count else None)
+            self.order, self.orderSize = solve.order, count
+            solution = numpy.reshape(solve(rhs.ravel()), (count, self.size))
+
+        solution = numpy.concatenate((solution, numpy.zeros((count, 1))), axis=1)
+        outputs = numpy.empty((count, len(self.outputSpecs)))
+        for o, (a, b, divide, add) in enumerate(self.outputSpecs):
+            outputs[:, o] = solution[:, a] - solution[:, b]
+            if divide >= 0:
+                outputs[:, o] /= values[:, divide]
+            if add >= 0:
+                outputs[:, o] += values[:, add]
+        return outputs, clamped
+    #END def solveBatch()
+
+
+    def add(self, outputs, clamped = 0): # Merges the outputs of one batch into the running statistics.
+        passed = numpy.ones(len(outputs), dtype=bool)
+        for o, stats in enumerate(self.stats):
+            stats.add(outputs[:, o])
+            passed &= stats.passes(outputs[:, o])
+        self.samples += len(outputs)
+        self.passed += numpy.count_nonzero(passed)
+        self.clamped += clamped
+    #END def add()
+
+
+    def run(self, samples, seed = 1, workers = None): # Draws and solves samples in batches and adds them to the statistics.  Workers defaults to one per CPU when batches are small and to solving in this process otherwise.
+        batches = [(b, min(self.batchSize, samples - first), seed) for b, first in enumerate(range(0, samples, self.batchSize))]
+        if workers is None:
+            workers = (os.cpu_count() or 1) if self.batchSize < monteCarloPoolBelow else 1
+        if workers > 1 and len(batches) > 1:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=monteCarloInit, initargs=(self,)) as executor:
+                for outputs, clamped in executor.map(monteCarloTask, batches):
+                    self.add(outputs, clamped)
+        else:
+            for task in batches:
+                self.add(*self.solveBatch(*task))
+        return self
+    #END def run()
+
+
+    @property
+    def yieldFraction(self):
+        return self.passed / self.samples if self.samples else 0.0
+
+#END class MonteCarlo
+
+
+
+monteCarloWorker = None     # The MonteCarlo copy of a pool worker process
+
+def monteCarloInit(monteCarlo):  # Process pool initializer.  Receives the analysis once per worker instead of once per batch.
+    global monteCarloWorker
+    monteCarloWorker = monteCarlo
+#END def monteCarloInit()
+
+
+def monteCarloTask(task):  # Solves one (batch number, sample count, seed) batch in a pool worker.
+    return monteCarloWorker.solveBatch(*task)
+#END def monteCarloTask()
+
+
+
+#__________________________________________________________________________________________________________________________________________
+#BINARY FILE FUNCTIONS
+# Binary netlist layout:  8-byte magic, uint32 format version, uint32 header length, JSON header, then raw little-endian arrays aligned to 64 bytes.
+# The header lists the offset, dtype and length of each array.  Node and component names are stored as newline-separated UTF-8 text blobs.
+
+binaryMagic = b"PCTSPICE"
+binaryVersion = 1
+binaryAlign = 64
+
+@profiler.profiled("export")
+def exportBinary(fileName, netlist, compDict, results = None): # Writes the netlist, component values and optionally the solution vector to a binary file.
+    arrays = {}
+    arrays["startIDs"] = numpy.asarray(netlist.startIDs, dtype="<i4")
+    arrays["endIDs"] = numpy.asarray(netlist.endIDs, dtype="<i4")
+    arrays["compTypes"] = numpy.asarray(netlist.compTypes, dtype=numpy.uint8)
+    arrays["values"] = numpy.fromiter((compDict.get(name, 0.0) for name in netlist.compNames), dtype="<f8", count=netlist.count)
+    arrays["nodeNames"] = numpy.frombuffer("\n".join(netlist.nodeNames).encode(), dtype=numpy.uint8)
+    arrays["compNames"] = numpy.frombuffer("\n".join(netlist.compNames).encode(), dtype=numpy.uint8)
+
+    extraNames = [name for name in compDict if name not in netlist.compIndex]
+    arrays["extraNames"] = numpy.frombuffer("\n".join(extraNames).encode(), dtype=numpy.uint8)
+    arrays["extraValues"] = numpy.array([compDict[name] for name in extraNames], dtype="<f8")
+
+    if results:
+        sources = [results[2][netlist.compNames[i]] for i in numpy.flatnonzero(netlist.compTypes == compTypeCodes['V'])]
+        arrays["solution"] = numpy.array(list(results[1]) + sources, dtype="<f8")
+
+    header = {"branches": netlist.count, "nodes": len(netlist.nodeNames), "arrays": {}}
+    offset = 0
+    for name, array in arrays.items():
+        header["arrays"][name] = {"offset": offset, "dtype": array.dtype.str, "length": len(array)}
+        offset += -(-array.nbytes // binaryAlign) * binaryAlign
+    headerBytes = json.dumps(header).encode()
+    dataStart = -(-(len(binaryMagic) + 8 + len(headerBytes)) // binaryAlign) * binaryAlign
+
+    with open(fileName, "wb") as file:
+        file.write(binaryMagic)
+        file.write(numpy.array([binaryVersion, len(headerBytes)], dtype="<u4").tobytes())
+        file.write(headerBytes)
+        for name, array in arrays.items():
+            file.seek(dataStart + header["arrays"][name]["offset"])
+            file.write(array.tobytes())
+        file.truncate(dataStart + offset)
+#END def exportBinary()
+
+
+
+@profiler.profiled("load")
+def loadBinary(fileName): # Memory-maps a binary file written by exportBinary().  Returns the netlist, component dictionary and the saved results, or None if no solution was saved.
+    with open(fileName, "rb") as file:
+        fileMap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if fileMap[0:len(binaryMagic)] != binaryMagic:
+        raise ValueError("'%s' is not a PCTspice binary netlist." %fileName)
+    version, headerLength = numpy.frombuffer(fileMap, dtype="<u4", count=2, offset=len(binaryMagic))
+    if version != binaryVersion:
+        raise ValueError("Unsupported binary netlist version %d." %version)
+    header = json.loads(fileMap[len(binaryMagic)+8 : len(binaryMagic)+8+headerLength])
+    dataStart = -(-(len(binaryMagic) + 8 + int(headerLength)) // binaryAlign) * binaryAlign
+
+    arrays = {}
+    for name, info in header["arrays"].items():
+        arrays[name] = numpy.frombuffer(fileMap, dtype=info["dtype"], count=info["length"], offset=dataStart + info["offset"])
+
+    def names(blob):
+        return bytes(blob).decode().split("\n") if len(blob) else []
+
+    gcEnabled = gc.isenabled()
+    gc.disable()    # The name lists and component dictionary are millions of new objects, and none of them can be cyclic garbage
+    try:
+        nodeNames = names(arrays["nodeNames"])
+        compNames = names(arrays["compNames"])
+        compDict = dict(zip(compNames, arrays["values"].tolist()))
+        compDict.update(zip(names(arrays["extraNames"]), arrays["extraValues"].tolist()))
+    finally:
+        if gcEnabled:
+            gc.enable()
+
+    netlist = Netlist.fromArrays(nodeNames, arrays["startIDs"], arrays["endIDs"], arrays["compTypes"], arrays["values"], compNames)
+
+    results = None
+    if "solution" in arrays:
+        solution = arrays["solution"]
+        sourceNames = [compNames[i] for i in numpy.flatnonzero(arrays["compTypes"] == compTypeCodes['V'])]
+        results = [nodeNames, solution[0:len(nodeNames)], dict(zip(sourceNames, solution[len(nodeNames):].tolist()))]
+
+    return netlist, compDict, results
+#END def loadBinary()
+
+
+
+#__________________________________________________________________________________________________________________________________________
+#RESULT EXPORT FUNCTIONS
+# Node voltages and branch currents are written as (name, value) rows, V(node) for every node and then I(component) for every branch in branch order.
+# Rows are formatted and written a chunk at a time, so the text of a large circuit is never held in memory at once.
+
+resultFormats = {".csv": "CSV", ".npy": "NPY", ".jsonl": "JSONL", ".json": "JSON"}
+exportChunk = 1 << 16       # Rows formatted per write
+
+def resultRows(netlist, results, voltages = True, currents = True):  # Yields (names, values) chunks of the rows written by exportResults().
+    if voltages:
+        for start in range(0, len(results[0]), exportChunk):
+            yield ["V(" + name + ")" for name in results[0][start:start+exportChunk]], numpy.asarray(results[1][start:start+exportChunk], dtype=numpy.float64)
+    if currents:
+        values = branchCalc(netlist, results)[1]
+        for start in range(0, netlist.count, exportChunk):
+            yield ["I(" + name + ")" for name in netlist.compNames[start:start+exportChunk]], values[start:start+exportChunk]
+#END def resultRows()
+
+
+
+@profiler.profiled("exportResults")
+def exportResults(fileName, netlist, results, fileFormat = None, engineering = False, voltages = True, currents = True): # Writes node voltages and branch currents to a CSV, NPY, JSON lines or JSON file, chosen from the extension unless fileFormat is given.  Returns the number of rows written.
+    fileFormat = (fileFormat or resultFormats.get(os.path.splitext(fileName)[1].lower(), "")).upper()
+    if fileFormat not in resultFormats.values():
+        raise ValueError("Unknown result file format for '%s'.  Use .csv, .npy, .jsonl or .json." %fileName)
+    if fileFormat == "NPY" and engineering:
+        raise ValueError("Engineering notation is only written to CSV and JSON files.")
+
+    rows = (len(results[0]) if voltages else 0) + (netlist.count if currents else 0)
+    with open(fileName, "wb", buffering = 1 << 20) as file:
+        if fileFormat == "NPY":
+            width = max([len(name) for name in results[0]] * voltages + [len(name) for name in netlist.compNames] * currents + [0]) + 3
+            dtype = numpy.dtype([("name", "<U%d" %width), ("value", "<f8")])
+            numpy.lib.format.write_array_header_1_0(file, {"descr": numpy.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (rows,)})
+        elif fileFormat == "CSV":
+            file.write(b"name,value\n")
+        elif fileFormat == "JSON":
+            file.write(b"[")        # One array of row objects, with the rows of each chunk joined by commas
+        separator = b"\n"
+
+        for names, values in resultRows(netlist, results, voltages, currents):
+            if fileFormat == "NPY":
+                chunk = numpy.empty(len(names), dtype=dtype)
+                chunk["name"] = names
+                chunk["value"] = values
+                file.write(chunk.tobytes())
+                continue
+
+            if engineering:
+                text = ['"' + value + '"' if fileFormat != "CSV" else value for value in engNotArray(values)]
+            else:
+                text = list(map(repr, values.tolist()))
+                if fileFormat != "CSV" and not numpy.isfinite(values).all():
+                    for i in numpy.flatnonzero(~numpy.isfinite(values)):
+                        text[i] = json.dumps(float(values[i]))      # NaN and Infinity, as the json module reads them
+            if fileFormat == "CSV":
+                column = "\n".join(names)
+                if ',' in column or '"' in column:
+                    names = ['"' + name.replace('"', '""') + '"' if ',' in name or '"' in name else name for name in names]
+                lines = map(",".join, zip(names, text))
+            else:
+                names = json.dumps(names, separators=("\n", ":"))[1:-1].split("\n")     # Escaped as one array, which is faster than one dumps() per name.  Escaped strings hold no newlines, so splitting on them is exact.
+                lines = map('{"name": %s, "value": %s}'.__mod__, zip(names, text))
+            if fileFormat == "JSON":
+                file.write(separator + ",\n".join(lines).encode())
+                separator = b",\n"
+            else:
+                file.write(("\n".join(lines) + "\n").encode())
+        if fileFormat == "JSON":
+            file.write(b"\n]\n")
+    return rows
+#END def exportResults()
+
+
+
+#__________________________________________________________________________________________________________________________________________
+#OUTPUT FUNCTIONS
+
+def sweepColumns(netlist, sweep, compName, values, outputs):  # Returns the (name, column) pairs of a sweep table, starting with the swept values, and the outputs that were not valid.  Outputs are V() and I() queries in the same form as the RETURN command.
+    columns = [(compName, values)]
+    invalid = []
+    for output in outputs:
+        output = output.upper()
+        cmd = output[0:output.find('(')]
+        operand = output[output.find('(')+1:output.find(')')]
+
+        if cmd == 'V' and operand == 'ALL':
+            for i in range(len(sweep[0])):
+                columns.append(("V(" + sweep[0][i] + ")", sweep[1][i]))
+        elif cmd == 'V' and operand in netlist.nodeIDs:
+            columns.append(("V(" + operand + ")", sweep[1][netlist.nodeIDs[operand]]))
+        elif cmd == 'V' and operand in netlist.compIndex:
+            drop = branchVoltage(netlist, sweep, netlist.getBranch(operand))
+            columns.append(("V(" + operand + ")", numpy.broadcast_to(drop, numpy.shape(values))))
+        elif cmd == 'I' and (operand == 'ALL' or operand in netlist.compIndex):
+            currents = branchCalc(netlist, sweep)[1]
+            for comp in (netlist.compNames if operand == 'ALL' else [operand]):
+                if comp == compName and compName[0] == 'I':
+                    columns.append(("I(" + comp + ")", values))
+                else:
+                    columns.append(("I(" + comp + ")", currents[netlist.compIndex[comp]]))
+        else:
+            invalid.append(output)
+    return columns, invalid
+#END def sweepColumns()
+
+
+
+def printSweep(netlist, sweep, compName, values, outputs):  # Prints a table of sweep results with one row per sweep point.
+    columns, invalid = sweepColumns(netlist, sweep, compName, values, outputs)
+    for output in invalid:
+        print("\033[1;31;40m" + "ERROR: Invalid node or component %s in SWEEP command." %output + "\033[0m")
+
+    print("\033[1;36;40m" + "".join('{: >12}'.format(name) for name, column in columns))
+    for p in range(len(values)):
+        print("".join('{: >12}'.format(engNot(column[p], "to", short=True)) for name, column in columns))
+    print("\033[0m")
+#END def printSweep()
+
+
+
+def printSensitivity(output, outputValue, sens, values):  # Prints the derivative of an output with respect to every component value, in the order given, with the normalized sensitivity (percent change of the output per percent change of the value).
+    unit = {'V': "V", 'I': "A"}[output[0]]
+    print("\033[1;36;40m" + "Sensitivity of %s = %s %s" %(output, engNot(outputValue, "to", short=True), unit) + "\n")
+    print('{: <12}{: >16}{: >14}'.format("COMPONENT", "d" + output[0] + "/dVALUE", "NORMALIZED"))
+    for compName, derivative in sens.items():
+        unitPer = unit + "/" + {'R': "OHM", 'V': "V", 'I': "A", 'D': "A"}[compName[0]]
+        value = values[compName] if compName[0] != 'D' or values[compName] > 0 else diodeSaturation      # A diode entered without a value uses the default saturation current
+        normalized = derivative * value / outputValue if outputValue else float("nan")
+        print('{: <12}{: >16}{: >14}'.format(compName, engNot(derivative, "to", short=True) + " " + unitPer, ("%.4f" %normalized) if numpy.isfinite(normalized) else "-"))
+    print("\033[0m")
+#END def printSensitivity()
+
+
+
+def printMonteCarlo(monteCarlo):  # Prints the summary statistics and histogram of each output of a finished MonteCarlo, and the yield if any output has limits.
+    print("\033[1;36;40m" + "%d samples\n" %monteCarlo.samples)
+    if monteCarlo.clamped:
+        print("\033[1;33;40m" + "%d component draws fell below %g of their nominal value and were clamped to it.  Tolerances this wide skew the results.\n" %(monteCarlo.clamped, monteCarloFloor) + "\033[1;36;40m")
+    for stats in monteCarlo.stats:
+        print("%s\tmean %s\tstd %s\tmin %s\tmax %s" %(stats.name, engNot(stats.mean, "to", short=True), engNot(stats.std, "to", short=True), engNot(stats.min, "to", short=True), engNot(stats.max, "to", short=True)))
+        if stats.low is not None or stats.high is not None:
+            print("\tyield %.2f%%" %(100 * stats.passed / stats.count))
+        scale = 40 / max(1, stats.histogram.max())
+        if stats.under:
+            print('{: >24} {}'.format("below", stats.under))
+        for b in range(stats.bins):
+            print('{: >10} .. {: <10} {}'.format(engNot(stats.edges[b], "to", short=True), engNot(stats.edges[b+1], "to", short=True), "#" * int(round(stats.histogram[b] * scale))) + " %d" %stats.histogram[b])
+        if stats.over:
+            print('{: >24} {}'.format("above", stats.over))
+        print("")
+    if any(stats.low is not None or stats.high is not None for stats in monteCarlo.stats):
+        print("Yield with every output within its limits: %.2f%%" %(100 * monteCarlo.yieldFraction))
+    print("\033[0m")
+#END def printMonteCarlo()
+
+
+
+def printNewton(stats):  # Prints the stage, step, update size, current law residual, limited diode count and time split of each Newton-Raphson iteration.
+    print("\033[1;34;40m" + "%s after %d iterations, last stage %s\n" %("Converged" if stats["converged"] else "Did not converge", stats["iterations"], stats["stage"]))
+    print("{: <8}{: >10}{: >6}{: >12}{: >12}{: >9}{: >11}{: >11}{: >11}".format("STAGE", "STEP", "ITER", "MAX CHANGE", "RESIDUAL", "LIMITED", "STAMP ms", "FACTOR ms", "SOLVE ms"))
+    for entry in stats["history"]:
+        print("{: <8}{: >10.3g}{: >6}{: >12.3g}{: >12.3g}{: >9}{: >11.3f}{: >11.3f}{: >11.3f}".format(entry["stage"], entry["step"], entry["iteration"], entry["maxChange"], entry["residual"], entry["limited"],
+                                                                                                 entry["stampSeconds"] * 1000, entry["factorSeconds"] * 1000, entry["solveSeconds"] * 1000))
+    print("\033[0m")
+#END def printNewton()
+
+
+
+def printStats(profiler):  # Prints the time, call count and peak memory of each solver phase collected by a Profiler, and the size of the last factored matrix.
+    if not profiler.phases:
+        print("\033[1;34;40m" + ("No statistics collected yet." if profiler.enabled else "Statistics are off.  Use STATS ON to start collecting.") + "\033[0m\n")
+        return
+
+    print("\033[1;34;40m" + "{: <16}{: >8}{: >12}{: >12}{: >12}".format("PHASE", "CALLS", "TOTAL ms", "MEAN ms", "PEAK MiB"))
+    for name, (calls, seconds, peak) in profiler.phases.items():
+        print("{: <16}{: >8}{: >12.3f}{: >12.3f}{: >12.2f}".format(name, calls, seconds * 1000, seconds * 1000 / calls, peak / 2**20))
+    if "matrix" in profiler.values:
+        stats = profiler.values["matrix"]
+        if "iterations" in stats:
+            print("\nLast iterative solve:  size %d, %d nonzeros, %s with %s, %d iterations, relative residual %.3g" %(stats["size"], stats["nnz"], stats["method"], stats["preconditioner"], stats["iterations"], stats["residual"]))
+        else:
+            print("\nLast factored matrix:  size %d, %d nonzeros, %d factor nonzeros, fill ratio %.2f, %s ordering" %(stats["size"], stats["nnz"], stats["factorNnz"], stats["fillRatio"], stats["ordering"]))
+    print("\033[0m")
+#END def printStats()
+
+
+
+#__________________________________________________________________________________________________________________________________________
+#BATCH FUNCTIONS
+# Headless mode for solving many netlist files without the interactive prompt.  Run as:
+#   python PCTspice.py [files or directories] --query "V(ALL)" --workers 4 --output results.jsonl
+# Each file produces one JSON record on its own line.  No ANSI codes are printed and input() is never called.
+
+def queryResults(netlist, results, query, factor = None):  # Evaluates one V(), I(), RTH(), VTH() or IN() query in the same form as the RETURN command.  Returns a list of (name, value) pairs.  RTH, VTH and IN need the MNAFactor that solved the results.  Raises ValueError for an invalid query.
+    query = query.upper().replace(" ", "")
+    if query.find('(') < 0 or query.find(')') < query.find('('):
+        raise ValueError("Invalid query '%s'." %query)
+    cmd = query[0:query.find('(')]
+    operand = query[query.find('(')+1:query.find(')')]
+
+    if cmd == 'V' and operand == 'ALL':
+        return [("V(" + results[0][i] + ")", float(results[1][i])) for i in range(len(results[0]))]
+    elif cmd == 'V' and operand in netlist.nodeIDs:
+        return [("V(" + operand + ")", float(results[1][netlist.nodeIDs[operand]]))]
+    elif cmd == 'V' and operand in netlist.compIndex:
+        return [("V(" + operand + ")", float(branchVoltage(netlist, results, netlist.getBranch(operand))))]
+    elif cmd == 'I' and operand == 'ALL':
+        currents = branchCalc(netlist, results)[1]
+        return [("I(" + compName + ")", float(currents[index])) for index, compName in enumerate(netlist.compNames)]
+    elif cmd == 'I' and operand in netlist.compIndex:
+        return [("I(" + operand + ")", float(currentCalc(netlist, results, operand)))]
+    elif cmd in ['RTH', 'VTH', 'IN'] and factor is not None:
+        pairs = theveninPairs(netlist, operand)
+        values = dict(zip(['VTH', 'RTH', 'IN'], factor.thevenin(pairs)))[cmd]
+        return [(cmd + "(" + a + "," + b + ")", float(values[p])) for p, (a, b) in enumerate(pairs)]
+    raise ValueError("Invalid node or component in query '%s'." %query)
+#END def queryResults()
+
+
+
+def errorMessage(error):  # Returns the message reported in a result record for an exception raised while reading or solving a circuit.
+    if isinstance(error, FileNotFoundError):
+        return "File not found."
+    elif isinstance(error, (OSError, UnicodeDecodeError)):
+        return "Unable to read file. %s" %error
+    elif isinstance(error, (FloatingNodeError, ConvergenceError)):
+        return str(error)
+    elif isinstance(error, RuntimeError):
+        return "Circuit could not be solved.  Check for floating nodes or loops of voltage sources."
+    elif isinstance(error, (ZeroDivisionError, ValueError)):
+        return str(error)
+    return "Python error: " + str(error)
+#END def errorMessage()
+
+
+
+def solveFile(fileName, queries, backend = "SPARSE", ordering = "MMD", workers = None):  # Imports and solves one netlist file, with its islands solved on workers processes.  Returns a result record that is always JSON serializable, with status "ok" or "error".
+    start = time.perf_counter()
+    record = {"file": fileName, "status": "error"}
+    netlist = Netlist()
+    compDict = {}
+
+    try:
+        record["branches"], errors = importNetlist(fileName, netlist, compDict)
+        if errors:
+            record["errors"] = [[lineNum, message] for lineNum, message in errors]
+            raise ValueError("%d lines could not be read." %len(errors))
+        if not netlist.branches:
+            raise ValueError("No branches found.")
+
+        netlist.compVals[:] = numpy.fromiter((compDict[name] for name in netlist.compNames), dtype=numpy.float64, count=netlist.count)
+        factor = None
+        if any(query.upper().lstrip().startswith(('RTH', 'VTH', 'IN')) for query in queries):
+            factor = MNAFactor(netlist, backend, ordering)     # Equivalent circuit queries need the whole circuit factored, so it is solved in one piece
+            results = factor.results()
+        else:
+            results = nodalAnalysis(netlist, backend, workers, ordering)
+        values = {}
+        for query in queries:
+            values.update(queryResults(netlist, results, query, factor))
+        record["results"] = values
+        record["status"] = "ok"
+    except Exception as error:    # One bad file should not stop the rest of the batch
+        record["message"] = errorMessage(error)
+
+    record["seconds"] = time.perf_counter() - start
+    return record
+#END def solveFile()
+
+
+
+def findNetlists(paths, pattern = "*.txt"):  # Expands directories into the sorted netlist files they contain.  Files named directly are kept in the order given.
+    fileNames = []
+    for path in paths:
+        if os.path.isdir(path):
+            fileNames.extend(sorted(glob.glob(os.path.join(path, pattern))))
+        else:
+            fileNames.append(path)
+    return fileNames
+#END def findNetlists()
+
+
+
+def runBatch(fileNames, queries, workers = None, backend = "SPARSE", ordering = "MMD"):  # Solves netlist files on a process pool and yields their records in input order.  One worker solves them in this process instead, and a single file is solved in this process with its islands on a pool of workers processes.
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(fileNames) == 1:
+        yield from map(functools.partial(solveFile, queries=queries, backend=backend, ordering=ordering, workers=workers), fileNames)
+        return
+
+    solve = functools.partial(solveFile, queries=queries, backend=backend, ordering=ordering)
+    chunkSize = max(1, min(64, len(fileNames) // (workers * 8)))    # Large enough to amortize pickling on many small files, small enough to balance uneven ones
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(solve, fileNames, chunksize=chunkSize)
+#END def runBatch()
+
+
+
+def batchMain(args):  # Command line entry point for batch mode.  Returns the process exit code: 0 if every file solved, 1 if any failed, 2 for bad arguments.
+    parser = argparse.ArgumentParser(prog="PCTspice.py", description="Solve netlist files without the interactive prompt and write one JSON record per file.")
+    parser.add_argument("paths", nargs="+", help="netlist files, or directories to search for netlist files")
+    parser.add_argument("-q", "--query", action="append", dest="queries", metavar="QUERY", help="V(), I(), RTH(), VTH() or IN() query in the form used by RETURN, may be repeated (default V(ALL))")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="number of worker processes, or of island processes for a single file (default one per CPU)")
+    parser.add_argument("-o", "--output", default="-", help="file for the result records (default standard output)")
+    parser.add_argument("--pattern", default="*.txt", help="file name pattern used inside directories (default *.txt)")
+    parser.add_argument("--solver", default="SPARSE", type=str.upper, choices=sorted(solverBackends), help="solver backend (default SPARSE)")
+    parser.add_argument("--ordering", default="MMD", type=lambda name: orderingAliases.get(name.upper(), name.upper()), choices=list(sparseOrderings), help="node ordering for the SPARSE backend (default MMD, also accepted as AMD)")
+    args = parser.parse_args(args)
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    fileNames = findNetlists(args.paths, args.pattern)
+    failed = 0
+    output = sys.stdout if args.output == "-" else open(args.output, "wt")
+    try:
+        for record in runBatch(fileNames, args.queries or ["V(ALL)"], args.workers, args.solver, args.ordering):
+            if record["status"] != "ok":
+                failed += 1
+            output.write(json.dumps(record) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print("Solved %d of %d files." %(len(fileNames) - failed, len(fileNames)), file=sys.stderr)
+    return 1 if failed else 0
+#END def batchMain()
+
+
+
+
+#__________________________________________________________________________________________________________________________________________
+#SERVER FUNCTIONS
+
+def serveRequest(cache, request):  # Answers one solve server request, decoded from JSON.  Returns a response record that is always JSON serializable, with status "ok" or "error".
+    start = time.perf_counter()
+    record = {"status": "error"}
+
+    try:
+        if not isinstance(request, dict) or not isinstance(request.get("netlist"), str):
+            raise ValueError("Request must be a JSON object with a \"netlist\" string.")
+        sweep = request.get("sweep")
+        if sweep is not None and not (isinstance(sweep, dict) and isinstance(sweep.get("source"), str) and isinstance(sweep.get("values"), list)):
+            raise ValueError("\"sweep\" must have a \"source\" name and a list of \"values\".")
+        queries = request.get("queries") or ["V(ALL)"]
+        edits = {name.upper(): value if isinstance(value, (int, float)) else parseValue(str(value)) for name, value in (request.get("values") or {}).items()}
+
+        circuit, lock, record["cached"] = cache.get(request["netlist"], request.get("solver", "SPARSE"), request.get("ordering", "MMD"))
+        for name in edits:
+            if name not in circuit.netlist.compIndex:
+                raise ValueError("Component %s does not exist." %name)
+
+        # Value edits apply to this request only.  The cached circuit is put back afterwards without counting as an edit, so plain requests keep their cached result.
+        with lock, (circuit.temporaryValues(edits) if edits else contextlib.nullcontext()):
+            if sweep is not None:
+                values = numpy.asarray(sweep["values"], dtype=numpy.float64)
+                source = sweep["source"].upper()
+                columns, invalid = sweepColumns(circuit.netlist, circuit.sweep(source, values), source, values, queries)
+                if invalid:
+                    raise ValueError("Invalid node or component in query '%s'." %invalid[0])
+                record["results"] = {name: numpy.asarray(column, dtype=numpy.float64).tolist() for name, column in columns}
+            else:
+                results = circuit.solve()
+                factor = circuit.cache.getFactor(circuit.netlist, circuit.values, circuit.backend, circuit.ordering)
+                values = {}
+                for query in queries:
+                    values.update(queryResults(circuit.netlist, results, query, factor))
+                record["results"] = values
+            if circuit.backend == "ITERATIVE":
+                record["convergence"] = dict(circuit.matrixStats())
+        record["status"] = "ok"
+    except Exception as error:    # One bad request should not stop the server
+        record["message"] = errorMessage(error)
+
+    record["seconds"] = time.perf_counter() - start
+    return record
+#END def serveRequest()
+
+
+
+class SolveRequestHandler(http.server.BaseHTTPRequestHandler): # Handles POST /solve with a JSON request for serveRequest(), and GET /stats with the cache counters.
+    def do_POST(self):
+        if self.path != "/solve":
+            self.sendJSON(404, {"status": "error", "message": "Unknown path %s.  Use POST /solve." %self.path})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        except ValueError as error:
+            self.sendJSON(400, {"status": "error", "message": "Invalid JSON. %s" %error})
+            return
+        self.sendJSON(200, serveRequest(self.server.cache, request))
+    #END def do_POST()
+
+
+    def do_GET(self):
+        if self.path != "/stats":
+            self.sendJSON(404, {"status": "error", "message": "Unknown path %s.  Use GET /stats." %self.path})
+            return
+        cache = self.server.cache
+        self.sendJSON(200, {"status": "ok", "circuits": len(cache.entries), "capacity": cache.capacity, "hits": cache.hits, "misses": cache.misses, "evictions": cache.evictions})
+    #END def do_GET()
+
+
+    def sendJSON(self, code, record):
+        body = json.dumps(record).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    #END def sendJSON()
+
+
+    def log_message(self, format, *args):   # Requests are not logged, to keep the server quiet under load
+        pass
+
+#END class SolveRequestHandler
+
+
+
+class SolveServer(http.server.HTTPServer): # HTTP server that answers requests on a fixed pool of worker threads, sharing one CircuitCache.
+    def __init__(self, address, cache, workers = None):
+        super().__init__(address, SolveRequestHandler)
+        self.cache = cache
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    #END def __init__()
+
+
+    def process_request(self, request, clientAddress):
+        self.executor.submit(self.processRequestThread, request, clientAddress)
+    #END def process_request()
+
+
+    def processRequestThread(self, request, clientAddress):
+        try:
+            self.finish_request(request, clientAddress)
+        except Exception:
+            self.handle_error(request, clientAddress)
+        finally:
+            self.shutdown_request(request)
+    #END def processRequestThread()
+
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False)
+    #END def server_close()
+
+#END class SolveServer
+
+
+
+def serveMain(args):  # Command line entry point for server mode.  Serves until interrupted and returns the process exit code.
+    parser = argparse.ArgumentParser(prog="PCTspice.py --serve", description="Serve solve requests as JSON over HTTP, keeping parsed and factored circuits in memory between requests.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on (default 8765)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="number of worker threads (default as many as concurrent.futures uses)")
+    parser.add_argument("--cache", type=int, default=64, help="number of circuits kept in the cache (default 64)")
+    args = parser.parse_args(args)
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.cache < 1:
+        parser.error("--cache must be at least 1")
+
+    server = SolveServer((args.host, args.port), CircuitCache(args.cache), args.workers)
+    print("Serving on http://%s:%d" %server.server_address[0:2], file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+#END def serveMain()
+
+
+
+
+
 #__________________________________________________________________________________________________________________________________________
 #MAIN FUNCTION
 
@@ -502,10 +2999,7 @@ def PCTspice():
     run = True
     print("\033[1;32;40m\nRunning PCTspice circuit analysis!\033[0;32;40m\n\nEnter data below or import text file.\nAll data will be lost when ending the PCTspice session.\nSome commands may not work correctly if not running directly in Python terminal.\n\n\033[1;32;40mType \033[1;33;40mHELP\033[1;32;40m for help.\n\n────────────────────────────────────────────────────────────────────────────────\033[0m\n")
 
-    branchArray = []
-    compnentDict = {}
-    nodeIndexDict = {}
-    results = []
+    circuit = Circuit()
 
     while run:
         line = input()
@@ -524,10 +3018,7 @@ def PCTspice():
             case "HELP":
                 helpprint()
             case "NEW":
-                branchArray = []
-                compnentDict = {}
-                nodeIndexDict = {}
-                results = []
+                circuit.clear()
                 print("\n\033[1;32;40mMemory cleared.\nRunning PCTspice circuit analysis!  \033[1;32;40mType \033[1;33;40mHELP\033[1;32;40m for help./n────────────────────────────────────────────────────────────────────────────────\033[0m\n")
             case "CLEAR":
                 print('\033c', end='')
@@ -541,113 +3032,87 @@ def PCTspice():
 
      # RETURN command
                 if line[0:len("RETURN")].upper() == "RETURN":
-                    i = len("RETURN")+1
-                    cmd = ""
-                    operand = ""
-                    while line[i] != '(' and line[i] != '\n':
-                        cmd = cmd + line[i].upper()
-                        i += 1
-
-                #Put things like Rth here
+                    with profiler.phase("RETURN"):
+                        i = len("RETURN")+1
+                        cmd = ""
+                        operand = ""
+                        while line[i] != '(' and line[i] != '\n':
+                            cmd = cmd + line[i].upper()
+                            i += 1
 
-                    i += 1
-                    while line[i] != ')':
-                        operand = operand + line[i].upper()
                         i += 1
+                        while line[i] != ')':
+                            operand = operand + line[i].upper()
+                            i += 1
 
-                    if not results:
-                        tempBranchArray = []
-                        for branch in branchArray:
-                            branch.compVal = compnentDict[branch.compName]
-                            tempBranchArray.append(branch)
-                        results = nodalAnalysis(tempBranchArray, nodeIndexDict)
-
-                # Returning VOLTAGE
-                    if cmd == 'V':
-                        if operand == 'ALL':
-                            for i in range(len(results[0])):
-                                print("\033[1;36;40m" + "V(" + results[0][i] + ")\t = " + engNot(results[1][i], "to") + "\tVOLTS\033[0m")
-                        
-                        elif operand in results[0]:
-                            index = results[0].index(operand)
-                            print("\033[1;36;40m" + "V(" + results[0][index] + ")\t = " + engNot(results[1][index], "to") + "\tVOLTS\033[0m")
-                        
-                        elif operand in list(compnentDict.keys()):
-                            for branch in branchArray:
-                                if branch.compName == operand:
-                                    start = branch.startNode
-                                    end = branch.endNode
-                            
-                            if start and end:
-                                if start == "GND":
-                                    print("\033[1;36;40m" + "V(" + operand + ")\t = " + engNot(-results[1][results[0].index(end)], "to") + "\tVOLTS\033[0m")
-                                elif end == "GND":
-                                    print("\033[1;36;40m" + "V(" + operand + ")\t = " + engNot(results[1][results[0].index(start)], "to") + "\tVOLTS\033[0m")
+                        try:
+                        # Returning VOLTAGE
+                            if cmd == 'V':
+                                if operand == 'ALL':
+                                    results = circuit.solve()
+                                    for start in range(0, len(results[0]), exportChunk):     # One write per chunk of lines instead of one print per node
+                                        text = engNotArray(results[1][start:start+exportChunk])
+                                        sys.stdout.write("".join(["\033[1;36;40m" + "V(" + name + ")\t = " + value + "\tVOLTS\033[0m\n" for name, value in zip(results[0][start:start+exportChunk], text)]))
                                 else:
-                                    print("\033[1;36;40m" + "V(" + operand + ")\t = " + engNot(results[1][results[0].index(start)]-results[1][results[0].index(end)], "to") + "\tVOLTS\033[0m")
-                        else:
-                            print("\033[1;31;40m" + "ERROR: Invalid node or component value in RETURN command." + "\033[0m")
-                    
-                # Returning CURRENT
-                    elif cmd == 'I':
-                        testBranchArray = []
-                        for branch in branchArray:
-                            testBranchArray.append(branch)
-                            testBranchArray[-1].compVal = compnentDict[branch.compName]
-
-                        currentCalc(branchArray, results, nodeIndexDict, operand)    
-                        if operand == "ALL":
-                            for comp in list(compnentDict.keys()):
-                                print("\033[1;36;40m" + "I(" + comp + ")\t = " + engNot(currentCalc(testBranchArray, results, nodeIndexDict, comp), 'to') + "\tAMPERES\033[0m")
-
-                        elif operand in list(compnentDict.keys()):
-                            print("\033[1;36;40m" + "I(" + operand + ")\t = " + engNot(currentCalc(testBranchArray, results, nodeIndexDict, operand), 'to') + "\tAMPERES\033[0m")
-
-                        else:
-                            print("\033[1;31;40m" + "ERROR: Invalid component value in RETURN command." + "\033[0m")
+                                    try:
+                                        print("\033[1;36;40m" + "V(" + operand + ")\t = " + engNot(circuit.voltage(operand), "to") + "\tVOLTS\033[0m")
+                                    except ValueError:
+                                        print("\033[1;31;40m" + "ERROR: Invalid node or component value in RETURN command." + "\033[0m")
+
+                        # Returning CURRENT
+                            elif cmd == 'I':
+                                if operand == "ALL":
+                                    currents = circuit.currents()
+                                    comps = [comp for comp in circuit.values if comp in currents]
+                                    for start in range(0, len(comps), exportChunk):
+                                        text = engNotArray([currents[comp] for comp in comps[start:start+exportChunk]])
+                                        sys.stdout.write("".join(["\033[1;36;40m" + "I(" + comp + ")\t = " + value + "\tAMPERES\033[0m\n" for comp, value in zip(comps[start:start+exportChunk], text)]))
+                                else:
+                                    try:
+                                        print("\033[1;36;40m" + "I(" + operand + ")\t = " + engNot(circuit.current(operand), 'to') + "\tAMPERES\033[0m")
+                                    except ValueError:
+                                        print("\033[1;31;40m" + "ERROR: Invalid component value in RETURN command." + "\033[0m")
+
+                        # Returning THEVENIN and NORTON equivalents between node pairs
+                            elif cmd in ['RTH', 'VTH', 'IN']:
+                                try:
+                                    pairs = theveninPairs(circuit.netlist, operand)
+                                    values = dict(zip(['VTH', 'RTH', 'IN'], circuit.thevenin(pairs)))[cmd]
+                                except ValueError:
+                                    print("\033[1;31;40m" + "ERROR: Invalid node pair in RETURN command." + "\033[0m")
+                                else:
+                                    unit = {'VTH': "VOLTS", 'RTH': "OHMS", 'IN': "AMPERES"}[cmd]
+                                    for (a, b), value in zip(pairs, values):
+                                        print("\033[1;36;40m" + cmd + "(" + a + "," + b + ")\t = " + (engNot(value, 'to') if numpy.isfinite(value) else "INFINITE") + "\t" + unit + "\033[0m")
+
+                        except (FloatingNodeError, ConvergenceError) as error:
+                            print("\033[1;31;40m" + "ERROR: " + str(error) + "\033[0m")
+                        except RuntimeError:
+                            print("\033[1;31;40m" + "ERROR: Circuit could not be solved.  Check for floating nodes or loops of voltage sources." + "\033[0m")
                         
 
      # IMPORT command
                 if line[0:len("IMPORT")].upper() == "IMPORT":
-                    branchesToAdd = importFromLine(line)
-                    try:
-                        if branchesToAdd:
-                            for branchVal in branchesToAdd:
-                                if branchVal:
-                                    compnentDict[branchVal.compName] = branchVal.compVal
-                                    branchVal.compVal = 0
-                                    branchArray.append(branchVal)
-                                    try:
-                                        nodeIndexDict[branchVal.startNode][0].append(branchArray.index(branchVal))
-                                    except KeyError:
-                                        if branchVal.startNode != "GND":
-                                            nodeIndexDict[branchVal.startNode] = [[branchArray.index(branchVal)],[]]
-                                    try:
-                                        nodeIndexDict[branchVal.endNode][1].append(branchArray.index(branchVal))
-                                    except KeyError:
-                                        if branchVal.endNode != "GND":
-                                            nodeIndexDict[branchVal.endNode] = [[],[branchArray.index(branchVal)]]
-                    except TypeError:
-                        print("\033[1;31;40m" + "ERROR: Unable to read net description in file." + "\033[0m")
+                    importFromLine(line, circuit)
 
          # PRINT command 
                 elif line[0:len("PRINT")].upper() == "PRINT":
                  # PRINT BRANCHES
                     if line[len("PRINT")+1:].upper() == "BRANCH" or line[len("PRINT")+1:].upper() == "BRANCHES" or line[len("PRINT")+1:].upper() == "BRANCHS":
                         print("\033[1;34;40m┌─────┬──────────────────────────────────┐\n│ NUM │ BRANCHES                         │\n├─────┼──────────────────────────────────┤")
-                        for branch in branchArray:
+                        for index, branch in enumerate(circuit.netlist.branches):
                             if branch:
-                                if branch.compName in list(compnentDict.keys()):
-                                    branch.compVal = compnentDict[branch.compName]
+                                if branch.compName in circuit.values:
+                                    branch.compVal = circuit.values[branch.compName]
                                 branchStr = branch.printBranch()
-                                print("│"+ "{: <40}".format("{: >4}".format(branchArray.index(branch)+1) +" ┼ " + branchStr) + '│')
+                                print("│"+ "{: <40}".format("{: >4}".format(index+1) +" ┼ " + branchStr) + '│')
                                 print("│     │                                  │")
                         print("└─────┴──────────────────────────────────┘\033[0m\n")
 
                  # PRINT COMPONENTS
                     elif line[len("PRINT")+1:].upper() == "COMPONENT" or line[len("PRINT")+1:].upper() == "COMPONENTS" or line[len("PRINT")+1:].upper() == "COMPS" or line[len("PRINT")+1:].upper() == "COMP":
                         print("\033[1;34;40m")
-                        for name, val in compnentDict.items():
+                        for name, val in circuit.values.items():
                             if val:
                                 engVal = engNot(val,"to", short=True)
                                 print(name + "=" + engVal)
@@ -655,9 +3120,204 @@ def PCTspice():
                                 print(name)
                         print("\033[0m\n")
 
+                 # PRINT CACHE
+                    elif line[len("PRINT")+1:].upper() == "CACHE":
+                        print("\033[1;34;40m" + "Result cache hits:      %d\nResult cache misses:    %d\nFull factorizations:    %d\nLow-rank value updates: %d\nTopology version:       %d\nValue version:          %d" %(circuit.cache.hits, circuit.cache.misses, circuit.cache.factorizations, circuit.cache.updates, circuit.cache.topologyVersion, circuit.cache.valueVersion) + "\033[0m\n")
+
+                 # PRINT NEWTON
+                    elif line[len("PRINT")+1:].upper() == "NEWTON":
+                        try:
+                            stats = circuit.newtonStats()
+                        except (FloatingNodeError, ConvergenceError) as error:
+                            stats = getattr(circuit.cache.factor, "newtonStats", None) if isinstance(error, ConvergenceError) else None
+                            print("\033[1;31;40m" + "ERROR: " + str(error) + "\033[0m")
+                        except RuntimeError:
+                            stats = None
+                            print("\033[1;31;40m" + "ERROR: Circuit could not be solved.  Check for floating nodes or loops of voltage sources." + "\033[0m")
+                        if stats:
+                            printNewton(stats)
+                        elif stats is None and not circuit.netlist.nonlinear():
+                            print("\033[1;31;40m" + "ERROR: Newton-Raphson statistics are only kept for circuits with diodes." + "\033[0m")
+
+                 # PRINT MATRIX
+                    elif line[len("PRINT")+1:].upper() == "MATRIX":
+                        try:
+                            stats = circuit.matrixStats()
+                        except RuntimeError as error:
+                            stats = None
+                            print("\033[1;31;40m" + "ERROR: Circuit could not be factored.  " + str(error) + "\033[0m")
+                        if stats and "iterations" in stats:
+                            print("\033[1;34;40m" + "Method:            %s\nPreconditioner:    %s\nTolerance:         %.3g\nMatrix size:       %d\nMatrix nonzeros:   %d\nLast iterations:   %d\nLast residual:     %.3g" %(stats["method"], stats["preconditioner"], stats["tolerance"], stats["size"], stats["nnz"], stats["iterations"], stats["residual"]) + "\033[0m\n")
+                        elif stats:
+                            print("\033[1;34;40m" + "Ordering:          %s\nMatrix size:       %d\nBandwidth:         %d\nMatrix nonzeros:   %d\nFactor nonzeros:   %d\nFill ratio:        %.2f" %(stats["ordering"], stats["size"], stats["bandwidth"], stats["nnz"], stats["factorNnz"], stats["fillRatio"]) + "\033[0m\n")
+                        elif circuit.backend == "EXACT":
+                            print("\033[1;31;40m" + "ERROR: Matrix statistics are only kept by the SPARSE and ITERATIVE solvers." + "\033[0m")
+
                     else:
                         print("\033[1;31;40m" + "ERROR: Invalid or incomplete command." + "\033[0m")
         
+         # EXPORT command
+                elif line[0:len("EXPORT ")].upper() == "EXPORT ":
+                    fileName = line[len("EXPORT "):]
+                    engineering = fileName[0:len("ENG ")].upper() == "ENG "
+                    if engineering:
+                        fileName = fileName[len("ENG "):]
+                    try:
+                        if os.path.splitext(fileName)[1].lower() in resultFormats:
+                            rows = circuit.exportResults(fileName, engineering = engineering)
+                            print("\033[1;34;40m" + "Exported %d node voltages and branch currents to %s." %(rows, fileName) + "\033[0m")
+                        else:
+                            circuit.exportBinary(fileName)
+                            print("\033[1;34;40m" + "Exported %d branches to %s." %(circuit.netlist.count, fileName) + "\033[0m")
+                    except OSError:
+                        print("\n\033[1;31;40m" + "ERROR:  Invalid file name or path." + "\033[0m\n")
+                    except ValueError as error:
+                        print("\n\033[1;31;40m" + "ERROR:  %s" %error + "\033[0m\n")
+                    except (FloatingNodeError, ConvergenceError) as error:
+                        print("\033[1;31;40m" + "ERROR: " + str(error) + "\033[0m")
+                    except RuntimeError:
+                        print("\033[1;31;40m" + "ERROR: Circuit could not be solved.  Check for floating nodes or loops of voltage sources." + "\033[0m")
+
+         # LOAD command
+                elif line[0:len("LOAD ")].upper() == "LOAD ":
+                    fileName = line[len("LOAD "):]
+                    try:
+                        circuit.loadBinary(fileName)
+                        print("\033[1;34;40m" + "Loaded %d branches from %s." %(circuit.netlist.count, fileName) + "\033[0m")
+                    except FileNotFoundError:
+                        print("\n\033[1;31;40m" + "ERROR:  File '%s' not found." %fileName + "\033[0m\n")
+                    except (OSError, ValueError, KeyError) as error:
+                        print("\n\033[1;31;40m" + "ERROR:  Unable to load '%s'. %s" %(fileName, error) + "\033[0m\n")
+
+         # SWEEP command
+                elif line[0:len("SWEEP")].upper() == "SWEEP":
+                    sweepArgs = line.split()
+                    try:
+                        compName = sweepArgs[1].upper()
+                        start = engNot(sweepArgs[2], "from")
+                        stop = engNot(sweepArgs[3], "from")
+                        step = engNot(sweepArgs[4], "from")
+                        count = int(round((stop - start) / step)) + 1
+                        if count < 1:
+                            raise ValueError
+                        values = numpy.linspace(start, start + (count-1)*step, count)
+                        sweep = circuit.sweep(compName, values)
+                    except (IndexError, ValueError, ZeroDivisionError):
+                        print("\033[1;31;40m" + "ERROR: Invalid SWEEP command.  Format: SWEEP [V or I source] [start] [stop] [step]" + "\033[0m")
+                    except (FloatingNodeError, ConvergenceError) as error:
+                        print("\033[1;31;40m" + "ERROR: " + str(error) + "\033[0m")
+                    except RuntimeError:
+                        print("\033[1;31;40m" + "ERROR: Circuit could not be solved.  Check for floating nodes or loops of voltage sources." + "\033[0m")
+                    else:
+                        printSweep(circuit.netlist, sweep, compName, values, sweepArgs[5:] or ["V(ALL)"])
+
+         # TOL command
+                elif line[0:len("TOL")].upper() == "TOL":
+                    tolArgs = line[len("TOL")+1:].upper().split()
+                    try:
+                        if not tolArgs:
+                            for name, (tolerance, distribution) in circuit.tolerances.items():
+                                print("\033[1;34;40m" + "%s\t%g%%\t%s" %(name, tolerance * 100, distribution) + "\033[0m")
+                        elif tolArgs == ["CLEAR"]:
+                            circuit.tolerances.clear()
+                        else:
+                            tolerance = float(tolArgs[1][0:-1]) / 100 if tolArgs[1].endswith('%') else engNot(tolArgs[1], "from")
+                            circuit.setTolerance(tolArgs[0], tolerance, *tolArgs[2:3])
+                    except (IndexError, ValueError):
+                        print("\033[1;31;40m" + "ERROR: Invalid TOL command.  Format: TOL [component or R, V, I] [tolerance] [UNIFORM or GAUSSIAN]" + "\033[0m")
+
+         # MONTECARLO command
+                elif line[0:len("MONTECARLO")].upper() == "MONTECARLO":
+                    mcArgs = line[len("MONTECARLO")+1:].upper().split()
+                    try:
+                        samples = int(mcArgs[0])
+                        seed = int(mcArgs[mcArgs.index("SEED")+1]) if "SEED" in mcArgs else 1
+                        workers = int(mcArgs[mcArgs.index("WORKERS")+1]) if "WORKERS" in mcArgs else None
+                        outputs = [arg for arg in mcArgs[1:] if '(' in arg]
+                        if samples < 1 or len(outputs) + 2 * ("SEED" in mcArgs) + 2 * ("WORKERS" in mcArgs) != len(mcArgs) - 1:
+                            raise ValueError
+                        monteCarlo = circuit.monteCarlo(outputs or ["V(ALL)"], samples, seed, workers)
+                    except (IndexError, ValueError):
+                        print("\033[1;31;40m" + "ERROR: Invalid MONTECARLO command.  Format: MONTECARLO [samples] [V() or I() ...] [SEED n] [WORKERS n]" + "\033[0m")
+                    except FloatingNodeError as error:
+                        print("\033[1;31;40m" + "ERROR: " + str(error) + "\033[0m")
+                    except (RuntimeError, ZeroDivisionError):
+                        print("\033[1;31;40m" + "ERROR: Circuit could not be solved.  Check for floating nodes or loops of voltage sources." + "\033[0m")
+                    else:
+                        printMonteCarlo(monteCarlo)
+
+         # SENS command
+                elif line[0:len("SENS")].upper() == "SENS":
+                    output = line[len("SENS")+1:].upper().replace(" ", "")
+                    try:
+                        sens = circuit.sensitivity(output)
+                        outputValue = circuit.voltage(output[2:-1]) if output[0] == 'V' else circuit.current(output[2:-1])
+                    except ValueError:
+                        print("\033[1;31;40m" + "ERROR: Invalid SENS command.  Format: SENS V([node or component]) or SENS I([component])" + "\033[0m")
+                    except (FloatingNodeError, ConvergenceError) as error:
+                        print("\033[1;31;40m" + "ERROR: " + str(error) + "\033[0m")
+                    except RuntimeError:
+                        print("\033[1;31;40m" + "ERROR: Circuit could not be solved.  Check for floating nodes or loops of voltage sources." + "\033[0m")
+                    else:
+                        printSensitivity(output, outputValue, sens, circuit.values)
+
+         # SOLVER command
+                elif line[0:len("SOLVER")].upper() == "SOLVER":
+                    solverArgs = line[len("SOLVER")+1:].split()
+                    try:
+                        circuit.setBackend(solverArgs[0] if solverArgs else "")
+                        if circuit.backend == "ITERATIVE":
+                            method = [arg.upper() for arg in solverArgs[1:] if arg.upper() in iterativeMethods]
+                            preconditioner = [arg.upper() for arg in solverArgs[1:] if arg.upper() in iterativePreconditioners]
+                            tolerance = [engNot(arg, "from") for arg in solverArgs[1:] if arg.upper() not in iterativeMethods + iterativePreconditioners]
+                            circuit.setIterative(method[-1] if method else None, preconditioner[-1] if preconditioner else None, tolerance[-1] if tolerance else None)
+                            print("\033[1;34;40m" + "Using ITERATIVE solver backend with %s, %s preconditioner and tolerance %g." %(iterativeSettings["method"], iterativeSettings["preconditioner"], iterativeSettings["tolerance"]) + "\033[0m")
+                        else:
+                            print("\033[1;34;40m" + "Using %s solver backend." %circuit.backend + "\033[0m")
+                    except ModuleNotFoundError:
+                        print("\033[1;31;40m" + "ERROR: SymPy python module required for the EXACT solver.\nUse the terminal command \"pip install sympy\" to install using the Python package manager." + "\033[0m")
+                    except ValueError:
+                        print("\033[1;31;40m" + "ERROR: Invalid solver backend or setting.  Use SPARSE, EXACT or ITERATIVE [method] [preconditioner] [tolerance]." + "\033[0m")
+
+         # STATS command
+                elif line[0:len("STATS")].upper() == "STATS":
+                    option = line[len("STATS")+1:]
+                    if option.upper() == "ON":
+                        profiler.enable()
+                        print("\033[1;34;40m" + "Collecting solver statistics." + "\033[0m")
+                    elif option.upper() == "OFF":
+                        profiler.disable()
+                        print("\033[1;34;40m" + "Stopped collecting solver statistics." + "\033[0m")
+                    elif option.upper() == "RESET":
+                        profiler.reset()
+                        print("\033[1;34;40m" + "Solver statistics cleared." + "\033[0m")
+                    elif option[0:len("TRACE ")].upper() == "TRACE ":
+                        try:
+                            profiler.enable(option[len("TRACE "):])
+                            print("\033[1;34;40m" + "Collecting solver statistics and writing a trace to %s." %option[len("TRACE "):] + "\033[0m")
+                        except OSError:
+                            print("\n\033[1;31;40m" + "ERROR:  Invalid file name or path." + "\033[0m\n")
+                    elif option == "":
+                        printStats(profiler)
+                    else:
+                        print("\033[1;31;40m" + "ERROR: Invalid STATS command.  Use STATS, STATS ON, STATS OFF, STATS RESET or STATS TRACE [file]." + "\033[0m")
+
+         # WORKERS command
+                elif line[0:len("WORKERS")].upper() == "WORKERS":
+                    try:
+                        circuit.setWorkers(int(line[len("WORKERS")+1:]))
+                        print("\033[1;34;40m" + "Solving islands on %d processes." %circuit.workers + "\033[0m")
+                    except ValueError:
+                        print("\033[1;31;40m" + "ERROR: Invalid WORKERS command.  Format: WORKERS [count]" + "\033[0m")
+
+         # ORDER command
+                elif line[0:len("ORDER")].upper() == "ORDER":
+                    try:
+                        circuit.setOrdering(line[len("ORDER")+1:])
+                        print("\033[1;34;40m" + "Using %s node ordering." %circuit.ordering + "\033[0m")
+                    except ValueError:
+                        print("\033[1;31;40m" + "ERROR: Invalid node ordering.  Use MMD, COLAMD, RCM or NATURAL." + "\033[0m")
+
          # EDIT command 
                 elif line[0:len("EDIT")].upper() == "EDIT":
                     line = line.upper()
@@ -673,10 +3333,10 @@ def PCTspice():
                         for i in line[len("EDIT") + len(name) + 2 :]:
                             val = val + i
                         val = engNot(val, toOrFromStr="from")
-                        psuedoBranch = Branch('', '', 0.0, '')
-                        psuedoBranch.compName = name
-                        if psuedoBranch.validComp():
-                            compnentDict[name.upper()] = val
+                        try:
+                            circuit.setValue(name, val)
+                        except ValueError:
+                            pass
 
                 # EDIT BRANCHES
                     elif line[len("EDIT "):len("EDIT BRANCH")] == "BRANCH":
@@ -688,38 +3348,8 @@ def PCTspice():
                         
 
                         if branchVal:
-
-                            tempBranch = branchArray[index]
-                            if tempBranch.startNode != 'GND':
-                                nodeIndexDict[tempBranch.startNode][0].remove(index)
-                            if tempBranch.endNode != 'GND':
-                                nodeIndexDict[tempBranch.endNode][1].remove(index)
-
-                            branchArray[index] = branchVal
                             print("\33[2A\r\033[2K\r" + "> \033[1;33;40m" + newBranch + "\033[0m")
-
-                            try:
-                                if branchVal.compVal and compnentDict[branchVal.compName]:
-                                    compnentDict[branchVal.compName] = branchVal.compVal
-                            except KeyError:
-                                if branchVal.compVal:
-                                    compnentDict[branchVal.compName] = branchVal.compVal
-                            branchVal.compVal = 0
-
-                            try:
-                                if branchVal.startNode != "GND":
-                                    nodeIndexDict[branchVal.startNode][0].append(branchArray.index(branchVal))
-                            except KeyError:
-                                if branchVal.startNode != "GND":
-                                    nodeIndexDict[branchVal.startNode] = [[branchArray.index(branchVal)],[]]
-                            try:
-                                if branchVal.endNode != "GND":
-                                    nodeIndexDict[branchVal.endNode][1].append(branchArray.index(branchVal))
-                            except KeyError:
-                                if branchVal.endNode != "GND":
-                                    nodeIndexDict[branchVal.endNode] = [[],[branchArray.index(branchVal)]]
-
-
+                            circuit.replaceBranch(index, branchVal.startNode, branchVal.compName, branchVal.endNode, branchVal.compVal or None)
 
                     else:
                         print("\033[1;31;40m" + "ERROR: Invalid or incomplete command." + "\033[0m")
@@ -739,40 +3369,27 @@ def PCTspice():
                         val = engNot(val, toOrFromStr="from")
                         psuedoBranch = Branch('', '', 0.0, '')
                         psuedoBranch.compName = name
-                        if compnentDict[name.upper()] != 0:
+                        if circuit.values[name.upper()] != 0:
                             print("\033[1;31;40m" + "Component %s already exists." %name.upper() + "\033[0m")
                         else:
                             if psuedoBranch.validComp():
                                 print("\33[2K\33[A\r\033[1;33;40m" + line + "\033[0m")
-                                compnentDict[name.upper()] = val
+                                circuit.setValue(name, val)
                     except KeyError:
                         if psuedoBranch.validComp():
                             print("\33[2K\33[A\r\033[1;33;40m" + line + "\033[0m")
-                            compnentDict[name.upper()] = val
+                            circuit.setValue(name, val)
                
 
          # Handling branch descriptions
                 else:
                     branchVal = nodeAssign(line)
                     if branchVal:
-                        if branchVal.compName in list(compnentDict.keys()):
+                        if branchVal.compName in circuit.values:
                             print("\033[1;31;40m" + "Component %s already exists." %branchVal.compName + "\033[0m")
                         else:
                             print("\33[2K\33[A\r\033[1;33;40m" + line + "\033[0m")
-                        
-                            compnentDict[branchVal.compName] = branchVal.compVal
-                            branchVal.compVal = 0
-                            branchArray.append(branchVal)
-                            try:
-                                nodeIndexDict[branchVal.startNode][0].append(branchArray.index(branchVal))
-                            except KeyError:
-                                if branchVal.startNode != "GND":
-                                    nodeIndexDict[branchVal.startNode] = [[branchArray.index(branchVal)],[]]
-                            try:
-                                nodeIndexDict[branchVal.endNode][1].append(branchArray.index(branchVal))
-                            except KeyError:
-                                if branchVal.endNode != "GND":
-                                    nodeIndexDict[branchVal.endNode] = [[],[branchArray.index(branchVal)]]
+                            circuit.addBranch(branchVal.startNode, branchVal.compName, branchVal.endNode, branchVal.compVal)
                         
 #END def PCTspice()
 
@@ -781,6 +3398,10 @@ def PCTspice():
 #__________________________________________________________________________________________________________________________________________
 #CODE TO EXECUTE
 if __name__ == '__main__':
+    if sys.argv[1:2] == ["--serve"]:
+        sys.exit(serveMain(sys.argv[2:]))
+    if len(sys.argv) > 1:
+        sys.exit(batchMain(sys.argv[1:]))
     try:
         PCTspice()
     except Exception as error:
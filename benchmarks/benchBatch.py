@@ -0,0 +1,64 @@
+'''
+Batched multi-RHS solving against one nodalAnalysis() call per source configuration.
+
+Each corner is one row of source values.  batchAnalysis() factors the circuit once
+and solves every corner as one block; the baseline edits the source values and
+re-solves the circuit from scratch for each corner.
+
+Usage:  python benchmarks/benchBatch.py [--nodes 1000] [--sources 8] [--corners 100 1000 10000] [--loop-max 1000]
+'''
+
+import argparse
+import time
+
+import numpy
+
+from circuitGen import sourcedLadder
+from PCTspice import batchAnalysis, nodalAnalysis
+
+
+def loopCorners(netlist, sourceNames, sourceValues):  # Baseline: one full nodalAnalysis() per corner.
+    sourceBranches = [netlist.getBranch(name) for name in sourceNames]
+    voltages = []
+    for corner in sourceValues:
+        for s in range(len(sourceBranches)):
+            sourceBranches[s].compVal = corner[s]
+        voltages.append(nodalAnalysis(netlist)[1])
+    return numpy.array(voltages)
+#END def loopCorners()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=1000)
+    parser.add_argument("--sources", type=int, default=8)
+    parser.add_argument("--corners", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--loop-max", type=int, default=1000, help="largest corner count to run through the per-corner baseline")
+    args = parser.parse_args()
+
+    netlist = sourcedLadder(args.nodes, args.sources)
+    sourceNames = [branch.compName for branch in netlist.branches if branch.compName[0] in ['V', 'I']]
+    nominal = numpy.array([netlist.getBranch(name).compVal for name in sourceNames])
+    rng = numpy.random.default_rng(0)
+
+    print("{: >8}{: >10}{: >14}{: >14}{: >10}".format("corners", "sources", "batch (s)", "loop (s)", "speedup"))
+    for corners in args.corners:
+        sourceValues = nominal * rng.uniform(0.9, 1.1, (corners, len(sourceNames)))
+
+        start = time.perf_counter()
+        batch = batchAnalysis(netlist, sourceNames, sourceValues)
+        batchTime = time.perf_counter() - start
+
+        if corners <= args.loop_max:
+            start = time.perf_counter()
+            loop = loopCorners(netlist, sourceNames, sourceValues)
+            loopTime = time.perf_counter() - start
+            assert numpy.allclose(batch[1], loop), "batched and per-corner solutions differ"
+            print("{: >8}{: >10}{: >14.4f}{: >14.4f}{: >9.1f}x".format(corners, len(sourceNames), batchTime, loopTime, loopTime / batchTime))
+        else:
+            print("{: >8}{: >10}{: >14.4f}{: >14}{: >10}".format(corners, len(sourceNames), batchTime, "-", "-"))
+#END def main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+'''
+EXPORT and LOAD time of the binary netlist format against branch count.
+
+Each generated resistor ladder is solved, exported with its solution and loaded
+back through loadBinary().  The loaded solution is checked against the original.
+
+Usage:  python benchmarks/benchBinary.py [--sizes 10000 100000 1000000]
+'''
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy
+
+from circuitGen import ladderCircuit
+from PCTspice import exportBinary, loadBinary, nodalAnalysis
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+
+    print("{: >10}{: >12}{: >14}{: >12}".format("branches", "size (MiB)", "export (s)", "load (s)"))
+    with tempfile.TemporaryDirectory() as directory:
+        fileName = os.path.join(directory, "ladder.pct")
+        for size in args.sizes:
+            netlist = ladderCircuit(size // 2 + 1)
+            compDict = {branch.compName: branch.compVal for branch in netlist.branches}
+            results = nodalAnalysis(netlist)
+
+            start = time.perf_counter()
+            exportBinary(fileName, netlist, compDict, results)
+            export = time.perf_counter() - start
+
+            start = time.perf_counter()
+            loaded, loadedDict, loadedResults = loadBinary(fileName)
+            load = time.perf_counter() - start
+
+            assert numpy.array_equal(numpy.asarray(loadedResults[1]), numpy.asarray(results[1]))
+            print("{: >10}{: >12.1f}{: >14.3f}{: >12.3f}".format(len(loaded.branches), os.path.getsize(fileName) / 2**20, export, load))
+#END def main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+'''
+Query throughput of the Circuit library API against driving the PCTspice session.
+
+Builds a resistor ladder, then times repeated node voltage queries and value
+edits made through one warm Circuit object, and the same queries sent as
+RETURN commands to a PCTspice session in a child process over a pipe.  The
+session is timed from the answer to its first query, which follows the setup
+and the solve, to the answer to its last, so process startup is not counted.
+
+Usage:  python benchmarks/benchCircuit.py [--nodes 1000] [--queries 2000]
+'''
+
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from PCTspice import Circuit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    lines = ["N0 V1=10 GND"]
+    circuit = Circuit()
+    circuit.addBranch("N0", "V1", "GND", 10.0)
+    for n in range(1, args.nodes):
+        lines.append("N%d R%d=1k N%d" %(n-1, 2*n-1, n))
+        lines.append("N%d R%d=1k GND" %(n, 2*n))
+        circuit.addBranch("N%d" %(n-1), "R%d" %(2*n-1), "N%d" %n, 1000.0)
+        circuit.addBranch("N%d" %n, "R%d" %(2*n), "GND", 1000.0)
+    queries = ["N%d" %(q * 7919 % args.nodes) for q in range(args.queries)]
+
+    circuit.solve()
+    start = time.perf_counter()
+    for name in queries:
+        circuit.voltage(name)
+    apiQuery = (time.perf_counter() - start) / len(queries)
+
+    start = time.perf_counter()
+    for q, name in enumerate(queries):
+        circuit.setValue("R%d" %(2 * (q % (args.nodes-1)) + 2), 1000.0 + q)
+        circuit.voltage(name)
+    apiEdit = (time.perf_counter() - start) / len(queries)
+
+    # Unbuffered, so each answer reaches the pipe as it is printed.  Commands are written from a thread so that neither pipe fills while the other waits.
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "PCTspice.py")
+    process = subprocess.Popen([sys.executable, "-u", script], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    commands = "\n".join(lines + ["RETURN V(N0)"] + ["RETURN V(%s)" %name for name in queries] + ["END"]) + "\n"
+    writer = threading.Thread(target=lambda: (process.stdin.write(commands), process.stdin.close()))
+    writer.start()
+    answers = 0
+    for line in process.stdout:
+        if "\tVOLTS" in line:
+            answers += 1
+            if answers == 1:
+                start = time.perf_counter()
+            elif answers == len(queries) + 1:
+                replQuery = (time.perf_counter() - start) / len(queries)
+    writer.join()
+    if process.wait() or answers != len(queries) + 1:
+        raise RuntimeError("PCTspice session answered %d of %d queries." %(answers, len(queries) + 1))
+
+    print("Ladder of %d nodes, %d queries\n" %(args.nodes, len(queries)))
+    print("{: <34}{: >16}".format("", "us per query"))
+    print("{: <34}{: >16.1f}".format("Circuit.voltage()", apiQuery * 1e6))
+    print("{: <34}{: >16.1f}".format("Circuit.setValue() + voltage()", apiEdit * 1e6))
+    print("{: <34}{: >16.1f}".format("RETURN V() through a pipe", replQuery * 1e6))
+#END def main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+'''
+Throughput of result export against printing every result line.
+
+Solves a 2-D resistor grid, then writes every node voltage and branch current
+in rows per second: printed one line at a time through engNot() as RETURN
+V(ALL) and I(ALL) did, printed in chunks through engNotArray(), and written
+by exportResults() to CSV, CSV in engineering notation, JSON lines, JSON
+array and NPY files.  Printed lines go to the null device, so terminal speed is not counted.
+
+Usage:  python benchmarks/benchExport.py [--nodes 100000] [--repeat 3]
+'''
+
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+from circuitGen import meshCircuit
+from PCTspice import Circuit, branchCalc, engNot, engNotArray, exportChunk, exportResults
+
+
+def printLines(netlist, results):  # One print and one engNot() call per row.
+    for name, voltage in zip(results[0], results[1]):
+        print("\033[1;36;40m" + "V(" + name + ")\t = " + engNot(voltage, "to") + "\tVOLTS\033[0m")
+    for comp, current in zip(netlist.compNames, branchCalc(netlist, results)[1].tolist()):
+        print("\033[1;36;40m" + "I(" + comp + ")\t = " + engNot(current, 'to') + "\tAMPERES\033[0m")
+#END def printLines()
+
+
+def printChunks(netlist, results):  # One write per chunk of rows, formatted by engNotArray().
+    currents = branchCalc(netlist, results)[1]
+    for names, values, prefix, unit in ((results[0], results[1], "V(", "VOLTS"), (netlist.compNames, currents, "I(", "AMPERES")):
+        for start in range(0, len(names), exportChunk):
+            text = engNotArray(values[start:start+exportChunk])
+            sys.stdout.write("".join(["\033[1;36;40m" + prefix + name + ")\t = " + value + "\t" + unit + "\033[0m\n" for name, value in zip(names[start:start+exportChunk], text)]))
+#END def printChunks()
+
+
+def best(function, repeat):  # Smallest wall time of repeat calls.
+    seconds = []
+    for n in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+    return min(seconds)
+#END def best()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    netlist = meshCircuit(args.nodes)
+    circuit = Circuit()
+    circuit.netlist = netlist
+    circuit.values = dict(zip(netlist.compNames, netlist.compVals.tolist()))
+    start = time.perf_counter()
+    results = circuit.solve()
+    solveSeconds = time.perf_counter() - start
+    rows = len(results[0]) + netlist.count
+
+    print("Grid of %d nodes and %d branches, %d rows, solved in %.3f s\n" %(len(netlist.nodeNames), netlist.count, rows, solveSeconds))
+    print("{: <30}{: >12}{: >14}{: >12}".format("", "seconds", "rows / s", "MB"))
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, "w") as null:
+        for label, printer in (("print per line, engNot()", printLines), ("chunked write, engNotArray()", printChunks)):
+            with contextlib.redirect_stdout(null):
+                seconds = best(lambda: printer(netlist, results), args.repeat)
+            print("{: <30}{: >12.3f}{: >14.0f}{: >12}".format(label, seconds, rows / seconds, "-"))
+
+        for label, extension, fileFormat, engineering in (("CSV", ".csv", None, False), ("CSV, engineering notation", ".csv", None, True), ("JSON lines", ".jsonl", None, False), ("JSON array", ".json", None, False), ("NPY", ".npy", None, False)):
+            fileName = os.path.join(directory, "results" + extension)
+            seconds = best(lambda: exportResults(fileName, netlist, results, fileFormat, engineering), args.repeat)
+            print("{: <30}{: >12.3f}{: >14.0f}{: >12.1f}".format(label, seconds, rows / seconds, os.path.getsize(fileName) / 1e6))
+            sys.stdout.flush()
+#END def main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+'''
+Netlist import throughput in lines per second.
+
+Writes a generated resistor ladder netlist to a temporary file and streams it
+back in through importNetlist() without echoing it to the terminal.
+
+Usage:  python benchmarks/benchImport.py [--branches 1000000]
+'''
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from PCTspice import Netlist, importNetlist
+
+
+def writeLadder(file, branchCount):  # Writes a resistor ladder netlist of about branchCount branches, alternating series and shunt resistors.
+    file.write("* Generated resistor ladder\n")
+    file.write("N0 V1=10 GND\n")
+    lines = []
+    for n in range(1, branchCount // 2 + 1):
+        lines.append("N%d R%d=1k N%d\nN%d R%d=10k GND\n" %(n-1, 2*n-1, n, n, 2*n))
+        if len(lines) >= 10000:
+            file.write("".join(lines))
+            lines = []
+    file.write("".join(lines))
+#END def writeLadder()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--branches", type=int, default=1000000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        fileName = os.path.join(directory, "ladder.txt")
+        with open(fileName, "wt") as file:
+            writeLadder(file, args.branches)
+        size = os.path.getsize(fileName)
+
+        netlist = Netlist()
+        compDict = {}
+        start = time.perf_counter()
+        num, errors = importNetlist(fileName, netlist, compDict)
+        elapsed = time.perf_counter() - start
+
+    assert not errors, errors[0:5]
+    print("Imported %d branches (%.1f MiB) in %.3f s" %(num, size / 2**20, elapsed))
+    print("%.0f lines/s, %.1f MiB/s" %((num + 1) / elapsed, size / 2**20 / elapsed))
+#END def main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+'''
+Solve time of circuits made of many disconnected islands.
+
+Compares one global factorization of the whole MNA matrix (MNAFactor) with
+islandAnalysis(), which factors each island, or group of small islands, on its
+own, serially and on a process pool.
+
+Usage:  python benchmarks/benchIslands.py [--islands 10 100 1000] [--nodes 400] [--workers 4]
+'''
+
+import argparse
+import os
+import time
+
+import numpy
+
+from circuitGen import islandCircuit
+from PCTspice import MNAFactor, islandAnalysis
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+#END def timed()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--islands", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--nodes", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print("{: >8}{: >10}{: >12}{: >12}{: >14}".format("islands", "nodes", "global (s)", "islands (s)", "%d workers (s)" %args.workers))
+    for islandCount in args.islands:
+        netlist = islandCircuit(islandCount, args.nodes)
+        globalTime, reference = timed(lambda: MNAFactor(netlist).results())
+        serialTime, results = timed(islandAnalysis, netlist)
+        poolTime, pooled = timed(islandAnalysis, netlist, "SPARSE", args.workers)
+        assert numpy.allclose(results[1], reference[1]) and numpy.allclose(pooled[1], reference[1])
+        print("{: >8}{: >10}{: >12.3f}{: >12.3f}{: >14.3f}".format(islandCount, len(netlist.nodeNames), globalTime, serialTime, poolTime))
+#END def main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+'''
+Direct against iterative solving of large resistor grids.
+
+Solves 2-D or 3-D resistor grids with the SPARSE and ITERATIVE backends, each
+in a fresh process, and reports solve time, the peak resident memory added by
+the solve, iteration counts, and the iterations needed again after a resistor
+edit, which starts from the previous solution.  The floating grid is the 2-D
+grid with voltage sources between grid nodes, whose zero diagonals keep CG and
+IC from being used and can break the incomplete LU preconditioner.
+
+Usage:  python benchmarks/benchIterative.py [--grid 3d] [--sizes 20000 100000] [--backends SPARSE ITERATIVE]
+'''
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from circuitGen import floatingMesh, gridCircuit3D, meshCircuit
+from PCTspice import Circuit
+
+
+def child(backend, grid, size):  # Runs one measurement and prints it as JSON.  Peak memory is read from the process, so that memory allocated by SuperLU and NumPy is counted.
+    netlist = {"2d": meshCircuit, "3d": gridCircuit3D, "floating": floatingMesh}[grid](size)
+    circuit = Circuit(backend)
+    circuit.netlist = netlist
+    circuit.values = dict(zip(netlist.compNames, netlist.compVals.tolist()))
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    circuit.solve()
+    seconds = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+    stats = circuit.matrixStats() or {}
+    iterations = stats.get("iterations", 0)
+
+    circuit.setValue("R%d" %(netlist.count // 2), 2000.0)
+    start = time.perf_counter()
+    circuit.solve()
+    editSeconds = time.perf_counter() - start
+    editIterations = (circuit.matrixStats() or {}).get("iterations", 0)
+
+    print(json.dumps({"nodes": len(netlist.nodeNames), "nnz": stats.get("nnz", 0), "seconds": seconds, "peakKiB": peak, "iterations": iterations, "method": stats.get("method", "LU"),
+                      "preconditioner": stats.get("preconditioner", "-"), "editSeconds": editSeconds, "editIterations": editIterations}))
+#END def child()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--grid", choices=["2d", "3d", "floating"], default="3d")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20000, 100000])
+    parser.add_argument("--backends", nargs="+", default=["SPARSE", "ITERATIVE"])
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], args.child[1], int(args.child[2]))
+        return
+
+    print("{: <11}{: >9}{: >10}{: >12}{: >12}{: >12}{: >12}{: >12}".format("backend", "nodes", "method", "solve (s)", "peak (MiB)", "iterations", "edit (s)", "edit iter"))
+    for size in args.sizes:
+        for backend in args.backends:
+            output = subprocess.run([sys.executable, __file__, "--child", backend, args.grid, str(size)], capture_output=True, text=True)
+            if output.returncode:
+                print("{: <11}{: >9}  failed: {}".format(backend, size, output.stderr.strip().splitlines()[-1] if output.stderr.strip() else output.returncode))
+                continue
+            record = json.loads(output.stdout)
+            method = record["method"] if record["method"] == "LU" else "%s+%s" %(record["method"], record["preconditioner"])
+            print("{: <11}{: >9}{: >10}{: >12.3f}{: >12.1f}{: >12}{: >12.3f}{: >12}".format(backend, record["nodes"], method, record["seconds"], record["peakKiB"] / 1024, record["iterations"], record["editSeconds"], record["editIterations"]))
+            sys.stdout.flush()
+#END def main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+'''
+Memory held by a Netlist, in bytes per branch.
+
+Builds a generated resistor ladder one branch at a time through
+Netlist.addBranch() and measures the Python heap it keeps with tracemalloc,
+then the memory added by a component dictionary like the one PCTspice() keeps.
+The same ladder is also stored in ObjectNetlist, the earlier layout with one
+Branch object per branch and Python lists of node IDs and adjacency, as the
+baseline.
+
+Usage:  python benchmarks/benchMemory.py [--branches 1000000]
+'''
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from PCTspice import Netlist, nodeAssign
+
+
+def ladderLines(branchCount):  # Yields the lines of a resistor ladder netlist of about branchCount branches, alternating series and shunt resistors.
+    yield "N0 V1=10 GND"
+    for n in range(1, branchCount // 2 + 1):
+        yield "N%d R%d=1k N%d" %(n-1, 2*n-1, n)
+        yield "N%d R%d=10k GND" %(n, 2*n)
+#END def ladderLines()
+
+
+class ObjectBranch: # Branch as stored before the array netlist, with its own strings and no __slots__.
+    def __init__(self, startNode, endNode, compVal, compName):
+        self.startNode = startNode.upper()
+        self.endNode = endNode.upper()
+        self.compVal = compVal
+        self.compName = compName.upper()
+#END class ObjectBranch
+
+
+
+class ObjectNetlist: # Netlist layout before the array netlist: a Branch object per branch, with Python lists of node IDs and per-node adjacency lists.
+    def __init__(self):
+        self.branches = []
+        self.startIDs = []
+        self.endIDs = []
+        self.nodeNames = []
+        self.nodeIDs = {}
+        self.compIndex = {}
+        self.startBranches = []
+        self.endBranches = []
+    #END def __init__()
+
+
+    def nodeID(self, nodeName):
+        if nodeName == "GND":
+            return -1
+        if nodeName not in self.nodeIDs:
+            self.nodeIDs[nodeName] = len(self.nodeNames)
+            self.nodeNames.append(nodeName)
+            self.startBranches.append([])
+            self.endBranches.append([])
+        return self.nodeIDs[nodeName]
+    #END def nodeID()
+
+
+    def addBranch(self, branch):
+        index = len(self.branches)
+        start = self.nodeID(branch.startNode)
+        end = self.nodeID(branch.endNode)
+        self.branches.append(ObjectBranch(branch.startNode, branch.endNode, branch.compVal, branch.compName))
+        self.startIDs.append(start)
+        self.endIDs.append(end)
+        self.compIndex[branch.compName] = index
+        if start >= 0:
+            self.startBranches[start].append(index)
+        if end >= 0:
+            self.endBranches[end].append(index)
+        return index
+    #END def addBranch()
+#END class ObjectNetlist
+
+
+
+def measure(netlistClass, branchCount):  # Returns the heap bytes kept by a ladder stored in netlistClass, without and with a component dictionary, and the node count.
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    netlist = netlistClass()
+    for line in ladderLines(branchCount):
+        netlist.addBranch(nodeAssign(line))
+    if hasattr(netlist, "adjacency"):
+        netlist.adjacency()     # Counted in the baseline as the adjacency lists
+    gc.collect()
+    netlistBytes = tracemalloc.get_traced_memory()[0] - base
+
+    compDict = {branch.compName: branch.compVal for branch in netlist.branches}
+    gc.collect()
+    totalBytes = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return netlistBytes, totalBytes, len(netlist.nodeNames)
+#END def measure()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--branches", type=int, default=1000000)
+    args = parser.parse_args()
+
+    count = sum(1 for line in ladderLines(args.branches))
+    print("{: <22}{: >10}{: >10}{: >14}{: >16}".format("", "branches", "nodes", "netlist B/br", "with dict B/br"))
+    for label, netlistClass in (("before: Branch objects", ObjectNetlist), ("after: arrays", Netlist)):
+        netlistBytes, totalBytes, nodeCount = measure(netlistClass, args.branches)
+        print("{: <22}{: >10}{: >10}{: >14.1f}{: >16.1f}".format(label, count, nodeCount, netlistBytes / count, totalBytes / count))
+#END def main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+'''
+Monte Carlo tolerance analysis throughput and memory.
+
+Gives every resistor of a resistor ladder a 5% tolerance and times
+Circuit.monteCarlo() against a loop that sets every resistor to a random value
+with setValue() and solves again for each sample, like EDIT and RETURN in a
+session.  Ladders up to 48 unknowns are solved as stacks of dense systems and
+larger ones as block-diagonal sparse systems.  The peak traced memory of a run
+is reported for two sample counts, to show that samples are not kept.
+
+Usage:  python benchmarks/benchMonteCarlo.py [--nodes 10 100 1000] [--samples 20000] [--loop-samples 200]
+'''
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from circuitGen import ladderCircuit
+from PCTspice import Circuit
+
+
+def makeCircuit(nodeCount):  # Ladder wrapped in a Circuit, with a 5% tolerance on every resistor.
+    netlist = ladderCircuit(nodeCount)
+    circuit = Circuit()
+    circuit.netlist = netlist
+    circuit.values = dict(zip(netlist.compNames, netlist.compVals.tolist()))
+    circuit.setTolerance("R", 0.05)
+    return circuit
+#END def makeCircuit()
+
+
+def loopSamples(circuit, output, samples):  # Seconds per sample of editing every resistor and solving again.
+    rng = random.Random(1)
+    nominal = {name: value for name, value in circuit.values.items() if name[0] == 'R'}
+    start = time.perf_counter()
+    for s in range(samples):
+        for name, value in nominal.items():
+            circuit.setValue(name, value * (1 + rng.uniform(-0.05, 0.05)))
+        circuit.voltage(output)
+    return (time.perf_counter() - start) / samples
+#END def loopSamples()
+
+
+def peakMemory(circuit, outputs, samples):  # Peak traced memory of one Monte Carlo run, in bytes.
+    tracemalloc.start()
+    circuit.monteCarlo(outputs, samples, workers=1)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+#END def peakMemory()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--loop-samples", type=int, default=200, help="samples timed with the setValue() loop")
+    args = parser.parse_args()
+
+    print("{: >8}{: >10}{: >18}{: >18}{: >10}{: >16}{: >16}".format("nodes", "batch", "loop (us)", "monteCarlo (us)", "speedup", "peak 1x (MB)", "peak 4x (MB)"))
+    for nodeCount in args.nodes:
+        circuit = makeCircuit(nodeCount)
+        output = "N%d" %(nodeCount - 1)
+        samples = max(10, args.samples * 10 // nodeCount) if nodeCount > 10 else args.samples
+
+        start = time.perf_counter()
+        monteCarlo = circuit.monteCarlo(["V(%s)" %output], samples, workers=1)
+        vectorized = (time.perf_counter() - start) / samples
+        loop = loopSamples(makeCircuit(nodeCount), output, max(1, min(args.loop_samples, samples)))
+
+        small = max(monteCarlo.batchSize, samples // 4)
+        peaks = [peakMemory(circuit, ["V(%s)" %output], count) for count in (small, 4 * small)]
+        print("{: >8}{: >10}{: >18.1f}{: >18.1f}{: >10.1f}{: >16.2f}{: >16.2f}".format(nodeCount, monteCarlo.batchSize, loop * 1e6, vectorized * 1e6, loop / vectorized, peaks[0] / 2**20, peaks[1] / 2**20))
+        sys.stdout.flush()
+#END def main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+'''
+Netlist build, solve and query time against branch count.
+
+Branches are added one at a time through Netlist.addBranch(), the circuit is
+solved once, and every component is then queried by name the way RETURN I([component])
+and RETURN V([component]) do.  Time per branch should stay flat.  The last column is
+the single vectorized pass RETURN I(ALL) uses for every branch current.
+
+Usage:  python benchmarks/benchNetlist.py [--sizes 1000 10000 100000]
+'''
+
+import argparse
+import time
+
+from circuitGen import ladderCircuit
+from PCTspice import Netlist, branchCalc, branchVoltage, currentCalc, nodalAnalysis
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    print("{: >10}{: >12}{: >12}{: >12}{: >16}{: >14}".format("branches", "build (s)", "solve (s)", "query (s)", "total/br (us)", "I(ALL) (ms)"))
+    for size in args.sizes:
+        branches = ladderCircuit(size // 2 + 1).branches
+
+        start = time.perf_counter()
+        netlist = Netlist()
+        for branch in branches:
+            netlist.addBranch(branch)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = nodalAnalysis(netlist)
+        solve = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for branch in netlist.branches:
+            currentCalc(netlist, results, branch.compName)
+            branchVoltage(netlist, results, netlist.getBranch(branch.compName))
+        query = time.perf_counter() - start
+
+        start = time.perf_counter()
+        branchCalc(netlist, results)
+        allCurrents = time.perf_counter() - start
+
+        print("{: >10}{: >12.4f}{: >12.4f}{: >12.4f}{: >16.2f}{: >14.2f}".format(len(branches), build, solve, query, (build + solve + query) / len(branches) * 1e6, allCurrents * 1e3))
+#END def main()
+
+
+if __name__ == '__main__':
+    main()
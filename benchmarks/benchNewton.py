@@ -0,0 +1,73 @@
+'''
+Newton-Raphson operating points of resistor grids with many diodes.
+
+Builds 2-D resistor grids with diodes from spread out nodes to GND, finds the
+operating point, and reports the iteration count and how the time splits
+between stamping the matrix, factoring it and solving it.  The Jacobian at the
+operating point is then factored again both ways: as a numeric refactor on the
+elimination order and CSC pattern kept from the first iteration, and as a full
+factorization that orders and assembles the matrix from scratch.
+
+Usage:  python benchmarks/benchNewton.py [--sizes 10000 40000] [--diodes 200] [--repeat 5]
+'''
+
+import argparse
+import sys
+import time
+
+import numpy
+
+from circuitGen import makeBranch, meshCircuit
+from PCTspice import NewtonFactor, diodeCurrent, factorSparse
+
+
+def diodeMesh(nodeCount, diodeCount):  # meshCircuit() with diodes to GND from every (nodes / diodes)th node.
+    netlist = meshCircuit(nodeCount)
+    names = list(netlist.nodeNames)
+    stride = max(1, len(names) // max(1, diodeCount))
+    for d, name in enumerate(names[stride//2::stride][0:diodeCount]):
+        netlist.addBranch(makeBranch(name, "D%d" %(d+1), 1e-14, "GND"))
+    return netlist
+#END def diodeMesh()
+
+
+def best(function, repeat):  # Smallest wall time of repeat calls.
+    seconds = []
+    for n in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+    return min(seconds)
+#END def best()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 40000])
+    parser.add_argument("--diodes", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print("{: <9}{: >8}{: >7}{: >11}{: >11}{: >11}{: >11}{: >14}{: >14}".format("nodes", "diodes", "iter", "total (s)", "stamp (s)", "factor (s)", "solve (s)", "refactor (ms)", "full LU (ms)"))
+    for size in args.sizes:
+        netlist = diodeMesh(size, args.diodes)
+        start = time.perf_counter()
+        factor = NewtonFactor(netlist)
+        seconds = time.perf_counter() - start
+        history = factor.newtonStats["history"]
+
+        # Jacobian at the operating point, stamped the way each iteration stamps it
+        extended = numpy.append(factor.solution, 0.0)
+        conductance = diodeCurrent(extended[factor.anodes] - extended[factor.cathodes], factor.saturation)[1]
+        values = numpy.concatenate((factor.linearVals, conductance[factor.stampDiode] * factor.stampSign, numpy.zeros(len(factor.nodeList))))
+        refactor = best(lambda: factor.numericFactor(values), args.repeat)
+        full = best(lambda: factorSparse(factor.stampRows, factor.stampCols, values, factor.size, factor.ordering), args.repeat)
+
+        print("{: <9}{: >8}{: >7}{: >11.3f}{: >11.3f}{: >11.3f}{: >11.3f}{: >14.1f}{: >14.1f}".format(len(netlist.nodeNames), len(factor.anodes), len(history), seconds,
+              sum(entry["stampSeconds"] for entry in history), sum(entry["factorSeconds"] for entry in history), sum(entry["solveSeconds"] for entry in history), refactor * 1000, full * 1000))
+        sys.stdout.flush()
+#END def main()
+
+
+if __name__ == '__main__':
+    main()
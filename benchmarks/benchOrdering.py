@@ -0,0 +1,39 @@
+'''
+Fill-in and factorization time of the sparse backend for each node ordering.
+
+Factors square 2-D resistor grids with the unknowns in insertion order (NATURAL)
+and with each fill-reducing ordering, and reports the bandwidth, the number of
+nonzeros in the matrix and in its LU factors, and the fill ratio between them.
+
+Usage:  python benchmarks/benchOrdering.py [--sizes 2500 10000 40000 160000]
+'''
+
+import argparse
+import time
+
+from circuitGen import meshCircuit
+from PCTspice import buildMNA, factorSparse, sparseOrderings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2500, 10000, 40000, 160000])
+    parser.add_argument("--orderings", nargs="+", default=list(sparseOrderings))
+    args = parser.parse_args()
+
+    print("{: >8}{: >10}{: >11}{: >10}{: >12}{: >8}{: >12}".format("nodes", "ordering", "bandwidth", "nnz", "LU nnz", "fill", "time (s)"))
+    for size in args.sizes:
+        sourceList, rows, cols, vals, rhs = buildMNA(meshCircuit(size))
+        for ordering in args.orderings:
+            start = time.perf_counter()
+            solve = factorSparse(rows, cols, vals, len(rhs), ordering)
+            solve(rhs)
+            elapsed = time.perf_counter() - start
+
+            stats = solve.stats
+            print("{: >8}{: >10}{: >11}{: >10}{: >12}{: >8.1f}{: >12.3f}".format(len(rhs), ordering, stats["bandwidth"], stats["nnz"], stats["factorNnz"], stats["fillRatio"], elapsed))
+#END def main()
+
+
+if __name__ == '__main__':
+    main()
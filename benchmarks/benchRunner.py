@@ -0,0 +1,49 @@
+'''
+Batch mode throughput in files per second against worker count.
+
+Writes many small generated resistor ladder netlists to a temporary directory
+and solves them all through runBatch() with each worker count.
+
+Usage:  python benchmarks/benchRunner.py [--files 2000] [--branches 200] [--workers 1 2 4]
+'''
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from benchImport import writeLadder
+from PCTspice import findNetlists, runBatch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--branches", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for n in range(args.files):
+            with open(os.path.join(directory, "ladder%05d.txt" %n), "wt") as file:
+                writeLadder(file, args.branches)
+        fileNames = findNetlists([directory])
+
+        print("%d files of %d branches, %d CPUs" %(args.files, args.branches, os.cpu_count() or 1))
+        print("{: >8}{: >12}{: >12}{: >10}".format("workers", "time (s)", "files/s", "speedup"))
+        base = None
+        for workers in args.workers:
+            start = time.perf_counter()
+            records = list(runBatch(fileNames, ["V(ALL)"], workers))
+            elapsed = time.perf_counter() - start
+            assert all(record["status"] == "ok" for record in records)
+            base = base or elapsed
+            print("{: >8}{: >12.3f}{: >12.0f}{: >10.2f}".format(workers, elapsed, len(records) / elapsed, base / elapsed))
+#END def main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+'''
+Adjoint sensitivity analysis against re-solving after editing each component.
+
+Builds a 2-D resistor grid and finds the derivative of one node voltage with
+respect to every component value two ways: Circuit.sensitivity(), which takes
+one extra solve of the adjoint system, and central differences, which edit
+each component up and down and solve again.  Differences are timed on a
+sample of components and scaled to the whole circuit, and their answers are
+checked against the adjoint ones.
+
+Usage:  python benchmarks/benchSens.py [--nodes 10000] [--sample 100]
+'''
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from circuitGen import meshCircuit
+from PCTspice import Circuit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=10000)
+    parser.add_argument("--sample", type=int, default=100, help="components timed with central differences")
+    args = parser.parse_args()
+
+    netlist = meshCircuit(args.nodes)
+    circuit = Circuit()
+    circuit.netlist = netlist
+    circuit.values = dict(zip(netlist.compNames, netlist.compVals.tolist()))
+    target = netlist.nodeNames[len(netlist.nodeNames) // 2]
+    circuit.solve()
+
+    start = time.perf_counter()
+    sens = circuit.sensitivity("V(%s)" %target)
+    adjoint = time.perf_counter() - start
+
+    sample = random.Random(1).sample(netlist.compNames, min(args.sample, netlist.count))
+    error = 0.0
+    start = time.perf_counter()
+    for compName in sample:
+        value = circuit.values[compName]
+        step = 1e-4 * abs(value)
+        circuit.setValue(compName, value + step)
+        up = circuit.voltage(target)
+        circuit.setValue(compName, value - step)
+        down = circuit.voltage(target)
+        circuit.setValue(compName, value)
+        difference = (up - down) / (2 * step)
+        error = max(error, abs(difference - sens[compName]) / max(abs(sens[compName]), 1e-12 * abs(up) / step))
+    perturbed = (time.perf_counter() - start) / len(sample) * netlist.count
+
+    print("Grid of %d nodes and %d components, sensitivities of V(%s)\n" %(len(netlist.nodeNames), netlist.count, target))
+    print("{: <40}{: >14}{: >12}".format("", "seconds", "speedup"))
+    print("{: <40}{: >14.3f}{: >12.1f}".format("Central differences, every component", perturbed, 1.0))
+    print("{: <40}{: >14.3f}{: >12.1f}".format("Circuit.sensitivity()", adjoint, perturbed / adjoint))
+    print("\nLargest relative difference on %d sampled components: %.2e" %(len(sample), error))
+    print("Most sensitive components: " + ", ".join("%s %.3g" %item for item in list(sens.items())[0:5]))
+#END def main()
+
+
+if __name__ == '__main__':
+    main()
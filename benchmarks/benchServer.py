@@ -0,0 +1,116 @@
+'''
+Load test of the PCTspice solve server.
+
+Starts a server on a free local port, or uses a running one given with --url,
+then sends solve requests for a set of generated resistor ladders from many
+client threads at once.  Reports requests per second and the median and p99
+latency, split into requests answered from the circuit cache and requests that
+had to parse and factor the netlist.
+
+Usage:  python benchmarks/benchServer.py [--url http://127.0.0.1:8765] [--circuits 16] [--nodes 2000]
+                                         [--requests 2000] [--clients 8] [--workers 8]
+'''
+
+import argparse
+import concurrent.futures
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+
+def ladderText(nodeCount, rShunt):  # Netlist text of a resistor ladder.  Ladders with different shunt values hash to different cache entries.
+    lines = ["N0 V1=10 GND"]
+    for n in range(1, nodeCount):
+        lines.append("N%d R%d=1k N%d" %(n-1, 2*n-1, n))
+        lines.append("N%d R%d=%d GND" %(n, 2*n, rShunt))
+    return "\n".join(lines) + "\n"
+#END def ladderText()
+
+
+def post(url, body):  # Sends one JSON encoded request and returns (latency in seconds, response record).
+    start = time.perf_counter()
+    with urllib.request.urlopen(urllib.request.Request(url + "/solve", data=body, headers={"Content-Type": "application/json"})) as response:
+        record = json.loads(response.read())
+    return time.perf_counter() - start, record
+#END def post()
+
+
+def startServer(workers, cache):  # Starts a server on a free port and waits until it answers.  Returns the process and its URL.
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "PCTspice.py")
+    process = subprocess.Popen([sys.executable, script, "--serve", "--port", str(port), "--workers", str(workers), "--cache", str(cache)], stderr=subprocess.DEVNULL)
+    url = "http://127.0.0.1:%d" %port
+    for attempt in range(100):
+        try:
+            urllib.request.urlopen(url + "/stats").close()
+            return process, url
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Server did not start.")
+#END def startServer()
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values)-1, int(fraction * len(values)))] if values else float("nan")
+#END def percentile()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default=None, help="running server to test instead of starting one")
+    parser.add_argument("--circuits", type=int, default=16)
+    parser.add_argument("--nodes", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--cache", type=int, default=64)
+    args = parser.parse_args()
+
+    process = None
+    url = args.url
+    if url is None:
+        process, url = startServer(args.workers, args.cache)
+
+    try:
+        texts = [ladderText(args.nodes, 1000 + c) for c in range(args.circuits)]
+        rng = random.Random(1)
+        requests = []
+        for r in range(args.requests):
+            request = {"netlist": rng.choice(texts), "queries": ["V(N%d)" %rng.randrange(args.nodes), "I(R1)"]}
+            if r % 4 == 3:
+                request["values"] = {"R%d" %(2 * rng.randrange(1, args.nodes)): 2000}
+            requests.append(json.dumps(request).encode())    # Encoded ahead of time so that the clients spend their time waiting on the server
+
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=args.clients) as executor:
+            replies = list(executor.map(lambda body: post(url, body), requests))
+        seconds = time.perf_counter() - start
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    failed = [record for latency, record in replies if record["status"] != "ok"]
+    print("%d requests from %d clients, %d circuits of %d nodes\n" %(len(requests), args.clients, args.circuits, args.nodes))
+    print("Requests per second:  %.0f" %(len(requests) / seconds))
+    print("Failed requests:      %d\n" %len(failed))
+    print("{: <12}{: >10}{: >14}{: >14}".format("", "requests", "p50 (ms)", "p99 (ms)"))
+    for name, cached in (("all", None), ("cached", True), ("uncached", False)):
+        latencies = [latency for latency, record in replies if cached is None or record.get("cached") == cached]
+        print("{: <12}{: >10}{: >14.2f}{: >14.2f}".format(name, len(latencies), percentile(latencies, 0.5) * 1000, percentile(latencies, 0.99) * 1000))
+    return 1 if failed else 0
+#END def main()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+'''
+Time and memory of nodalAnalysis() against node count for each solver backend.
+
+Usage:  python benchmarks/benchSolver.py [--sizes 100 1000 10000 100000] [--exact-max 100]
+'''
+
+import argparse
+import time
+import tracemalloc
+
+from circuitGen import ladderCircuit, meshCircuit
+from PCTspice import nodalAnalysis
+
+
+def timeSolve(netlist, backend):  # Returns wall time in seconds and peak traced memory in bytes for one solve.
+    tracemalloc.start()
+    start = time.perf_counter()
+    nodalAnalysis(netlist, backend)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+#END def timeSolve()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--exact-max", type=int, default=100, help="largest node count to run through the EXACT backend")
+    args = parser.parse_args()
+
+    print("{: <8}{: <9}{: >10}{: >14}{: >14}".format("circuit", "backend", "nodes", "time (s)", "peak (MiB)"))
+    for name, generator in (("ladder", ladderCircuit), ("mesh", meshCircuit)):
+        for size in args.sizes:
+            netlist = generator(size)
+            for backend in ("SPARSE", "EXACT"):
+                if backend == "EXACT" and size > args.exact_max:
+                    continue
+                elapsed, peak = timeSolve(netlist, backend)
+                print("{: <8}{: <9}{: >10}{: >14.4f}{: >14.2f}".format(name, backend, len(netlist.nodeNames), elapsed, peak / 2**20))
+#END def main()
+
+
+if __name__ == '__main__':
+    main()
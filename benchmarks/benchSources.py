@@ -0,0 +1,45 @@
+'''
+Build and solve time of the MNA system for circuits made mostly of voltage sources.
+
+Stacked sources are a series chain sitting on GND; floating sources are a series
+chain whose nodes only reach GND through shunt resistors.  Build time per source
+should stay flat as the source count grows.
+
+Usage:  python benchmarks/benchSources.py [--sizes 1000 2000 4000 8000 16000]
+'''
+
+import argparse
+import time
+
+from circuitGen import floatingSources, stackedSources
+from PCTspice import buildMNA, nodalAnalysis
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 2000, 4000, 8000, 16000])
+    args = parser.parse_args()
+
+    print("{: <10}{: >10}{: >14}{: >18}{: >14}".format("circuit", "sources", "build (s)", "build/src (us)", "solve (s)"))
+    for name, generator in (("stacked", stackedSources), ("floating", floatingSources)):
+        for size in args.sizes:
+            netlist = generator(size)
+
+            start = time.perf_counter()
+            buildMNA(netlist)
+            build = time.perf_counter() - start
+
+            start = time.perf_counter()
+            results = nodalAnalysis(netlist)
+            solve = time.perf_counter() - start
+
+            # Top of a stack of 1 V sources must sit at the source count in volts.
+            top = results[1][netlist.nodeIDs["N%d" %size]] - (results[1][netlist.nodeIDs["N0"]] if "N0" in netlist.nodeIDs else 0.0)
+            assert abs(top - size) < 1e-6 * size, "unexpected stack voltage %f" %top
+
+            print("{: <10}{: >10}{: >14.4f}{: >18.2f}{: >14.4f}".format(name, size, build, build / size * 1e6, solve))
+#END def main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+'''
+Import and startup time of PCTspice, with a regression threshold.
+
+Runs each case in a fresh interpreter several times and reports the fastest run:
+  import   python -X importtime -c "import PCTspice", the cumulative time of the module import
+  batch    one small netlist solved in batch mode with one worker
+  REPL     the interactive prompt started and ended with END
+Also checks that a numeric solve never imports SymPy.  Exits with status 1 if
+the import time is above the threshold or SymPy was imported.
+
+Usage:  python benchmarks/benchStartup.py [--runs 5] [--threshold-ms 600]
+'''
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+script = os.path.join(root, "PCTspice.py")
+
+
+def importTime():  # Returns the cumulative import time of the PCTspice module in seconds, as reported by -X importtime.
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", "import PCTspice"], cwd=root, capture_output=True, text=True, check=True).stderr
+    for line in output.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == "PCTspice":
+            return int(fields[1]) / 1e6
+    raise RuntimeError("PCTspice not found in -X importtime output.")
+#END def importTime()
+
+
+def runTime(args, stdin = None):  # Returns the wall time of running PCTspice.py in a new interpreter.
+    start = time.perf_counter()
+    subprocess.run([sys.executable, script] + args, cwd=root, input=stdin, capture_output=True, text=True, check=False)
+    return time.perf_counter() - start
+#END def runTime()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--threshold-ms", type=float, default=600.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        fileName = os.path.join(directory, "divider.txt")
+        with open(fileName, "wt") as file:
+            file.write("N1 V1=10 GND\nN1 R1=1k N2\nN2 R2=1k GND\n")
+
+        cases = [("import", importTime),
+                 ("batch", lambda: runTime([fileName, "--workers", "1"])),
+                 ("REPL", lambda: runTime([], stdin="END\n"))]
+        times = {name: min(case() for run in range(args.runs)) for name, case in cases}
+
+    check = "import sys\nfrom circuitGen import meshCircuit\nimport PCTspice\nPCTspice.nodalAnalysis(meshCircuit(100))\nprint('sympy' in sys.modules)"
+    sympyLoaded = subprocess.run([sys.executable, "-c", check], cwd=os.path.join(root, "benchmarks"), capture_output=True, text=True, check=True).stdout.strip() == "True"
+
+    print("{: >8}{: >12}".format("case", "time (ms)"))
+    for name, seconds in times.items():
+        print("{: >8}{: >12.1f}".format(name, seconds * 1000))
+    print("SymPy imported by a SPARSE solve: %s" %("yes" if sympyLoaded else "no"))
+
+    failed = False
+    if times["import"] * 1000 > args.threshold_ms:
+        print("FAIL: import time %.1f ms is above the %.1f ms threshold." %(times["import"] * 1000, args.threshold_ms))
+        failed = True
+    if sympyLoaded:
+        print("FAIL: SymPy was imported without the EXACT solver.")
+        failed = True
+    sys.exit(1 if failed else 0)
+#END def main()
+
+
+if __name__ == '__main__':
+    main()
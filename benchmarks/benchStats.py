@@ -0,0 +1,51 @@
+'''
+Overhead of the solver phase profiler behind the STATS command.
+
+Times repeated solves of small and large resistor meshes with the profiler
+disabled and enabled, and the cost of one disabled phase wrapper against calling
+the wrapped function directly.
+
+Usage:  python benchmarks/benchStats.py [--sizes 16 10000] [--repeat 200]
+'''
+
+import argparse
+import time
+
+from circuitGen import meshCircuit
+from PCTspice import Netlist, nodalAnalysis, profiler
+
+
+def perCall(function, repeat):  # Returns the mean wall time of one call in seconds.
+    start = time.perf_counter()
+    for n in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+#END def perCall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 10000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    netlist = Netlist()
+    calls = 100000
+    direct = perCall(lambda: Netlist.islands.__wrapped__(netlist), calls)
+    wrapped = perCall(lambda: netlist.islands(), calls)
+    print("Disabled phase wrapper: %.0f ns per call\n" %((wrapped - direct) * 1e9))
+
+    print("{: >8}{: >14}{: >14}{: >10}".format("nodes", "off (ms)", "on (ms)", "ratio"))
+    for size in args.sizes:
+        netlist = meshCircuit(size)
+        repeat = max(3, args.repeat * 16 // size)
+        off = perCall(lambda: nodalAnalysis(netlist), repeat)
+        profiler.enable()
+        on = perCall(lambda: nodalAnalysis(netlist), repeat)
+        profiler.disable()
+        print("{: >8}{: >14.3f}{: >14.3f}{: >10.2f}".format(len(netlist.nodeNames), off * 1000, on * 1000, on / off))
+#END def main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+'''
+Benchmark suite with correctness checks and a regression gate.
+
+Generates resistor ladders, 2-D and 3-D grids, random sparse graphs, chained
+voltage sources and circuits of many disconnected islands at several sizes.
+Each circuit is written to a netlist file, imported and solved with the
+profiler on, and the time and peak memory of every solver phase are reported.
+Node voltages are checked against closed-form answers where they exist, and
+every solution is checked for Kirchhoff's current law.
+
+The results are compared with a stored baseline.  The suite exits with status
+1 if a check fails or a phase is slower or larger than the baseline allows.
+
+Usage:  python benchmarks/benchSuite.py [--sizes 1000 10000] [--circuits ladder grid3d]
+                                        [--repeat 3] [--baseline benchmarks/baseline.json]
+                                        [--update-baseline] [--time-factor 2.0] [--memory-factor 1.25]
+'''
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+
+import numpy
+
+from circuitGen import floatingSources, gridCircuit3D, islandCircuit, ladderCircuit, meshCircuit, randomCircuit, stackedSources, writeNetlist
+from PCTspice import Netlist, branchCalc, compTypeCodes, importNetlist, nodalAnalysis, profiler
+
+
+phaseNames = ["import", "islands", "build", "factor", "islandAnalysis", "branchCalc"]
+checkTolerance = 1e-8       # Largest relative error allowed in node voltages and in the current law residual
+timeFloor = 0.002           # Seconds a phase may grow by on top of the time factor, so that sub-millisecond phases do not fail on timer noise
+memoryFloor = 65536         # Bytes a phase may grow by on top of the memory factor
+
+
+
+def ladderVoltages(netlist, results, nodeCount, rSeries = 1000.0, rShunt = 1000.0, vSource = 10.0):  # Node voltages of ladderCircuit() from the resistance seen into each node, working back from the far end.
+    rEquiv = [rShunt] * nodeCount
+    for n in range(nodeCount-2, 0, -1):
+        rEquiv[n] = 1 / (1/rShunt + 1/(rSeries + rEquiv[n+1]))
+    voltages = {"N0": vSource}
+    for n in range(1, nodeCount):
+        voltages["N%d" %n] = voltages["N%d" %(n-1)] * rEquiv[n] / (rSeries + rEquiv[n])
+    return voltages
+#END def ladderVoltages()
+
+
+def stackedVoltages(netlist, results, sourceCount, vSource = 1.0):  # Node N of stackedSources() sits N sources above GND.
+    return {"N%d" %n: n * vSource for n in range(1, sourceCount+1)}
+#END def stackedVoltages()
+
+
+def floatingVoltages(netlist, results, sourceCount, vSource = 1.0):  # Equal shunts to GND carry no net current, so the voltages of floatingSources() are centred on zero.
+    return {"N%d" %n: vSource * (n - sourceCount/2) for n in range(sourceCount+1)}
+#END def floatingVoltages()
+
+
+def islandVoltages(netlist, results, islandCount):  # Island i of islandCircuit() is island 0 driven by (i+1) times the source voltage, so by linearity its voltages scale the same way.
+    solved = dict(zip(results[0], results[1]))
+    return {name: solved["S0_" + name.partition('_')[2]] * (int(name[1:].partition('_')[0]) + 1) for name in results[0]}
+#END def islandVoltages()
+
+
+def symmetricVoltages(netlist, results, size):  # A square or cubic grid driven between opposite corners is unchanged by swapping its axes, so every node must match its mirror image.
+    solved = dict(zip(results[0], results[1]))
+    return {name: solved["N" + "_".join(reversed(name[1:].split('_')))] for name in results[0]}
+#END def symmetricVoltages()
+
+
+
+# Circuit name -> (generator taking the approximate node count, reference voltages or None)
+circuits = {
+    "ladder":   (lambda size: ladderCircuit(size), lambda netlist, results, size: ladderVoltages(netlist, results, size)),
+    "grid2d":   (lambda size: meshCircuit(size), symmetricVoltages),
+    "grid3d":   (lambda size: gridCircuit3D(size), symmetricVoltages),
+    "random":   (lambda size: randomCircuit(size), None),
+    "stacked":  (lambda size: stackedSources(size), lambda netlist, results, size: stackedVoltages(netlist, results, size)),
+    "floating": (lambda size: floatingSources(size), lambda netlist, results, size: floatingVoltages(netlist, results, size)),
+    "islands":  (lambda size: islandCircuit(max(1, size // 100), 100), lambda netlist, results, size: islandVoltages(netlist, results, max(1, size // 100))),
+}
+
+
+
+def voltageError(results, expected):  # Largest difference from the expected node voltages, relative to the largest expected voltage.
+    solved = dict(zip(results[0], results[1]))
+    scale = max(1.0, max(abs(value) for value in expected.values()))
+    return max(abs(solved[name] - value) for name, value in expected.items()) / scale
+#END def voltageError()
+
+
+def currentLawError(netlist, results):  # Largest net current out of any node, relative to the largest branch current.
+    drops, currents = branchCalc(netlist, results)
+    flows = numpy.where(netlist.compTypes == compTypeCodes['I'], -currents, currents)    # Current sources drive their value into the start node
+    nodeCount = len(netlist.nodeNames) + 1    # Index -1 collects GND
+    net = numpy.bincount(netlist.startIDs % nodeCount, flows, nodeCount) - numpy.bincount(netlist.endIDs % nodeCount, flows, nodeCount)
+    return numpy.abs(net[:-1]).max() / max(1e-30, numpy.abs(currents).max())
+#END def currentLawError()
+
+
+
+def runCircuit(fileName, memory):  # Imports and solves one netlist file with the profiler on.  Returns the collected phases and the solution.
+    profiler.reset()
+    profiler.enable(memory = memory)
+    try:
+        netlist = Netlist()
+        compDict = {}
+        importNetlist(fileName, netlist, compDict)
+        netlist.compVals[:] = numpy.fromiter((compDict[name] for name in netlist.compNames), dtype=numpy.float64, count=netlist.count)
+        results = nodalAnalysis(netlist)
+        branchCalc(netlist, results)
+    finally:
+        profiler.disable()
+    return dict(profiler.phases), dict(profiler.values), netlist, results
+#END def runCircuit()
+
+
+def measure(name, size, repeat, directory):  # Runs one circuit at one size.  Returns {phase: [best seconds, peak bytes]}, the node count, the statistics of the last factored matrix and the check errors.
+    generator, reference = circuits[name]
+    fileName = os.path.join(directory, "%s_%d.txt" %(name, size))
+    with open(fileName, "wt") as file:
+        writeNetlist(file, generator(size))
+
+    phases = {}
+    for n in range(repeat):
+        times, values, netlist, results = runCircuit(fileName, memory = False)
+        for phase, (calls, seconds, peak) in times.items():
+            phases[phase] = [min(seconds, phases.get(phase, [seconds])[0]), 0]
+    peaks = runCircuit(fileName, memory = True)[0]
+    for phase, (calls, seconds, peak) in peaks.items():
+        phases[phase][1] = peak
+    os.remove(fileName)
+
+    errors = {"kcl": currentLawError(netlist, results)}
+    if reference:
+        errors["voltage"] = voltageError(results, reference(netlist, results, size))
+    return phases, len(netlist.nodeNames), values.get("matrix", {}), errors
+#END def measure()
+
+
+
+def compare(current, baseline, timeFactor, memoryFactor):  # Returns a list of messages for the phases that regressed past the baseline.
+    regressions = []
+    for key, (seconds, peak) in current.items():
+        if key not in baseline:
+            continue
+        baseSeconds, basePeak = baseline[key]
+        if seconds > baseSeconds * timeFactor + timeFloor:
+            regressions.append("%s: %.2f ms against a baseline of %.2f ms" %(key, seconds * 1000, baseSeconds * 1000))
+        if peak > basePeak * memoryFactor + memoryFloor:
+            regressions.append("%s: %.2f MB peak against a baseline of %.2f MB" %(key, peak / 2**20, basePeak / 2**20))
+    return regressions
+#END def compare()
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--circuits", nargs="+", choices=list(circuits), default=list(circuits))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json"))
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline instead of comparing against it.")
+    parser.add_argument("--time-factor", type=float, default=2.0, help="Allowed ratio of phase time to the baseline.")
+    parser.add_argument("--memory-factor", type=float, default=1.25, help="Allowed ratio of phase peak memory to the baseline.")
+    args = parser.parse_args()
+
+    current = {}
+    failures = []
+    print("{: <10}{: >8}{: >9}{: >10}".format("circuit", "nodes", "fill", "error") + "".join("{: >16}".format(phase) for phase in phaseNames))
+    print("{: <37}".format("") + "".join("{: >16}".format("ms / MB") for phase in phaseNames))
+    with tempfile.TemporaryDirectory() as directory:
+        for name in args.circuits:
+            for size in args.sizes:
+                phases, nodeCount, stats, errors = measure(name, size, args.repeat, directory)
+                for phase, record in phases.items():
+                    current["%s/%d/%s" %(name, size, phase)] = record
+                worst = max(errors.values())
+                if worst > checkTolerance:
+                    failures.append("%s/%d: %s" %(name, size, ", ".join("%s error %.3g" %item for item in errors.items())))
+
+                cells = ["{: >16}".format("%.2f / %.2f" %(phases[phase][0] * 1000, phases[phase][1] / 2**20) if phase in phases else "-") for phase in phaseNames]
+                print("{: <10}{: >8}{: >9.2f}{: >10.1e}".format(name, nodeCount, stats.get("fillRatio", 0.0), worst) + "".join(cells))
+                sys.stdout.flush()
+
+    if args.update_baseline:
+        with open(args.baseline, "wt") as file:
+            json.dump({"python": platform.python_version(), "numpy": numpy.__version__, "results": current}, file, indent=1, sort_keys=True)
+            file.write("\n")
+        print("\nBaseline written to %s" %args.baseline)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "rt") as file:
+            failures += compare(current, json.load(file)["results"], args.time_factor, args.memory_factor)
+    else:
+        print("\nNo baseline at %s.  Use --update-baseline to store one." %args.baseline)
+
+    if failures:
+        print("\nFAILED:")
+        for message in failures:
+            print("  " + message)
+        return 1
+    print("\nAll checks passed.")
+    return 0
+#END def main()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+'''
+Thevenin resistance queries answered from a reused factorization.
+
+Builds a 2-D resistor grid and times RTH() queries between random node pairs
+three ways: all pairs in one Circuit.thevenin() call, which solves them as
+blocks of right-hand side columns, one call per pair, and building and
+factoring a new circuit for every pair with its sources zeroed and a 1 A test
+source between the nodes.  The answers of the three are checked to agree.
+
+Usage:  python benchmarks/benchThevenin.py [--nodes 10000] [--pairs 200] [--rebuild-pairs 20]
+'''
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from circuitGen import meshCircuit
+from PCTspice import Circuit, Netlist, compTypeCodes
+
+
+def makeCircuit(netlist):  # Wraps a generated Netlist in a Circuit without going through netlist text.
+    circuit = Circuit()
+    circuit.netlist = netlist
+    circuit.values = dict(zip(netlist.compNames, netlist.compVals.tolist()))
+    return circuit
+#END def makeCircuit()
+
+
+def rebuiltRth(netlist, a, b):  # Thevenin resistance from a new circuit with every source zeroed and a 1 A source driving current from b into a.
+    compVals = numpy.where(netlist.compTypes == compTypeCodes['R'], netlist.compVals, 0.0)
+    circuit = makeCircuit(Netlist.fromArrays(netlist.nodeNames, netlist.startIDs, netlist.endIDs, netlist.compTypes, compVals, netlist.compNames))
+    circuit.addBranch(a, "I%d" %(netlist.count + 1), b, 1.0)
+    return abs(circuit.voltage(a) - circuit.voltage(b))
+#END def rebuiltRth()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=10000)
+    parser.add_argument("--pairs", type=int, default=200)
+    parser.add_argument("--rebuild-pairs", type=int, default=20, help="pairs timed with a new circuit each, since every one is a full factorization")
+    args = parser.parse_args()
+
+    netlist = meshCircuit(args.nodes)
+    rng = random.Random(1)
+    pairs = [tuple(rng.sample(netlist.nodeNames, 2)) for p in range(args.pairs)]
+    circuit = makeCircuit(netlist)
+    circuit.solve()
+
+    start = time.perf_counter()
+    blockRth = circuit.thevenin(pairs)[1]
+    block = (time.perf_counter() - start) / len(pairs)
+
+    start = time.perf_counter()
+    singleRth = [circuit.thevenin([pair])[1][0] for pair in pairs]
+    single = (time.perf_counter() - start) / len(pairs)
+
+    rebuildPairs = pairs[0:args.rebuild_pairs]
+    start = time.perf_counter()
+    rebuiltValues = [rebuiltRth(netlist, a, b) for a, b in rebuildPairs]
+    rebuild = (time.perf_counter() - start) / len(rebuildPairs)
+
+    error = max(numpy.abs(blockRth - singleRth).max(), numpy.abs(blockRth[0:len(rebuildPairs)] - rebuiltValues).max()) / numpy.abs(blockRth).max()
+    print("Grid of %d nodes, %d node pairs\n" %(len(netlist.nodeNames), len(pairs)))
+    print("{: <36}{: >16}{: >12}".format("", "ms per pair", "speedup"))
+    print("{: <36}{: >16.3f}{: >12.1f}".format("New circuit per pair", rebuild * 1000, 1.0))
+    print("{: <36}{: >16.3f}{: >12.1f}".format("thevenin() one pair per call", single * 1000, rebuild / single))
+    print("{: <36}{: >16.3f}{: >12.1f}".format("thevenin() all pairs in one call", block * 1000, rebuild / block))
+    print("\nLargest relative difference between methods: %.2e" %error)
+#END def main()
+
+
+if __name__ == '__main__':
+    main()
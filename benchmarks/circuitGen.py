@@ -0,0 +1,167 @@
+'''
+Synthetic circuit generators used by the PCTspice benchmarks.
+
+Each generator returns a Netlist in the same form the PCTspice() session builds
+it, with component values stored on the branches so it can be handed directly
+to nodalAnalysis().
+'''
+
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from PCTspice import Branch, Netlist
+
+
+def buildNetlist(branchArray):  # Adds a list of branches to a new Netlist.
+    netlist = Netlist()
+    for branch in branchArray:
+        netlist.addBranch(branch)
+    return netlist
+#END def buildNetlist()
+
+
+def makeBranch(startNode, compName, compVal, endNode):
+    branch = Branch(startNode, endNode, 0, compName)
+    branch.compVal = float(compVal)
+    return branch
+#END def makeBranch()
+
+
+
+def ladderCircuit(nodeCount, rSeries = 1000.0, rShunt = 1000.0, vSource = 10.0):  # Resistor ladder driven by a voltage source at N0, with a shunt resistor from every node to GND.
+    branchArray = [makeBranch("N0", "V1", vSource, "GND")]
+    r = 1
+    for n in range(1, nodeCount):
+        branchArray.append(makeBranch("N%d" %(n-1), "R%d" %r, rSeries, "N%d" %n))
+        branchArray.append(makeBranch("N%d" %n, "R%d" %(r+1), rShunt, "GND"))
+        r += 2
+    return buildNetlist(branchArray)
+#END def ladderCircuit()
+
+
+
+def sourcedLadder(nodeCount, sourceCount, rSeries = 1000.0, rShunt = 1000.0, vSource = 10.0, iSource = 1e-3):  # Resistor ladder with current sources injecting at evenly spaced nodes in addition to the voltage source at N0.
+    netlist = ladderCircuit(nodeCount, rSeries, rShunt, vSource)
+    for s in range(1, sourceCount):
+        netlist.addBranch(makeBranch("N%d" %(s * (nodeCount-1) // max(1, sourceCount-1)), "I%d" %s, iSource, "GND"))
+    return netlist
+#END def sourcedLadder()
+
+
+
+def meshCircuit(nodeCount, rValue = 1000.0, vSource = 10.0):  # Square 2-D resistor grid of about nodeCount nodes, driven at one corner and grounded through a resistor at the opposite corner.
+    side = max(2, int(round(math.sqrt(nodeCount))))
+    branchArray = [makeBranch("N0_0", "V1", vSource, "GND")]
+    r = 1
+    for y in range(side):
+        for x in range(side):
+            if x + 1 < side:
+                branchArray.append(makeBranch("N%d_%d" %(x, y), "R%d" %r, rValue, "N%d_%d" %(x+1, y)))
+                r += 1
+            if y + 1 < side:
+                branchArray.append(makeBranch("N%d_%d" %(x, y), "R%d" %r, rValue, "N%d_%d" %(x, y+1)))
+                r += 1
+    branchArray.append(makeBranch("N%d_%d" %(side-1, side-1), "R%d" %r, rValue, "GND"))
+    return buildNetlist(branchArray)
+#END def meshCircuit()
+
+
+
+def gridCircuit3D(nodeCount, rValue = 1000.0, vSource = 10.0):  # Cubic 3-D resistor grid of about nodeCount nodes, driven at one corner and grounded through a resistor at the opposite corner.
+    side = max(2, int(round(nodeCount ** (1/3))))
+    branchArray = [makeBranch("N0_0_0", "V1", vSource, "GND")]
+    r = 1
+    for z in range(side):
+        for y in range(side):
+            for x in range(side):
+                for dx, dy, dz in ((1, 0, 0), (0, 1, 0), (0, 0, 1)):
+                    if x + dx < side and y + dy < side and z + dz < side:
+                        branchArray.append(makeBranch("N%d_%d_%d" %(x, y, z), "R%d" %r, rValue, "N%d_%d_%d" %(x+dx, y+dy, z+dz)))
+                        r += 1
+    branchArray.append(makeBranch("N%d_%d_%d" %(side-1, side-1, side-1), "R%d" %r, rValue, "GND"))
+    return buildNetlist(branchArray)
+#END def gridCircuit3D()
+
+
+
+def randomCircuit(nodeCount, degree = 4, span = 32, seed = 1, vSource = 10.0, iSource = 1e-3):  # Random sparse resistor graph with about degree branches per node, each joining nodes at most span apart in node order.  A random spanning tree keeps every node connected to the source at N0, and every tenth node has a shunt to GND.
+    rng = random.Random(seed)
+    branchArray = [makeBranch("N0", "V1", vSource, "GND")]
+    r = 1
+    for n in range(1, nodeCount):
+        branchArray.append(makeBranch("N%d" %rng.randrange(max(0, n-span), n), "R%d" %r, 10 ** rng.uniform(2, 5), "N%d" %n))
+        r += 1
+    for k in range(max(0, nodeCount * degree // 2 - (nodeCount-1))):
+        a = rng.randrange(nodeCount - 1)
+        branchArray.append(makeBranch("N%d" %a, "R%d" %r, 10 ** rng.uniform(2, 5), "N%d" %min(nodeCount-1, a + rng.randint(1, span))))
+        r += 1
+    for n in range(0, nodeCount, 10):
+        branchArray.append(makeBranch("N%d" %n, "R%d" %r, 10 ** rng.uniform(2, 5), "GND"))
+        r += 1
+    for i in range(1, nodeCount // 100 + 1):
+        branchArray.append(makeBranch("N%d" %rng.randrange(nodeCount), "I%d" %i, iSource, "GND"))
+    return buildNetlist(branchArray)
+#END def randomCircuit()
+
+
+
+def stackedSources(sourceCount, vSource = 1.0, rLoad = 1000.0):  # Chain of series voltage sources stacked on GND, loaded by a resistor at the top.
+    branchArray = [makeBranch("N1", "V1", vSource, "GND")]
+    for n in range(2, sourceCount+1):
+        branchArray.append(makeBranch("N%d" %n, "V%d" %n, vSource, "N%d" %(n-1)))
+    branchArray.append(makeBranch("N%d" %sourceCount, "R1", rLoad, "GND"))
+    return buildNetlist(branchArray)
+#END def stackedSources()
+
+
+
+def floatingSources(sourceCount, vSource = 1.0, rShunt = 1000.0):  # Chain of series voltage sources with no terminal at GND.  Every node is tied to GND only through a shunt resistor.
+    branchArray = []
+    for n in range(1, sourceCount+1):
+        branchArray.append(makeBranch("N%d" %n, "V%d" %n, vSource, "N%d" %(n-1)))
+    for n in range(sourceCount+1):
+        branchArray.append(makeBranch("N%d" %n, "R%d" %(n+1), rShunt, "GND"))
+    return buildNetlist(branchArray)
+#END def floatingSources()
+
+
+
+def floatingMesh(nodeCount, sourceCount = 20, rValue = 1000.0, vSource = 10.0, vFloating = 0.5):  # meshCircuit() with voltage sources between pairs of grid nodes, neither on GND.  Each source joins a node in the first third of the grid to one a third further on, so no two share a node and they form no loop.
+    netlist = meshCircuit(nodeCount, rValue, vSource)
+    names = list(netlist.nodeNames)
+    third = len(names) // 3
+    stride = max(1, third // max(1, sourceCount))
+    for s, n in enumerate(range(0, third, stride)[0:sourceCount]):
+        netlist.addBranch(makeBranch(names[n], "V%d" %(s+2), vFloating, names[n + third]))
+    return netlist
+#END def floatingMesh()
+
+
+
+def islandCircuit(islandCount, nodeCount, rValue = 1000.0, vSource = 10.0):  # Many separate meshes of about nodeCount nodes each, with no branches between them, like one test fixture per sheet.
+    branchArray = []
+    r = 1
+    for i in range(islandCount):
+        for branch in meshCircuit(nodeCount, rValue, vSource * (i+1)).branches:
+            branchArray.append(makeBranch("S%d_%s" %(i, branch.startNode) if branch.startNode != "GND" else "GND", "%s%d" %(branch.compName[0], r), branch.compVal, "S%d_%s" %(i, branch.endNode) if branch.endNode != "GND" else "GND"))
+            r += 1
+    return buildNetlist(branchArray)
+#END def islandCircuit()
+
+
+
+def writeNetlist(file, netlist):  # Writes a Netlist as a text netlist file that IMPORT and batch mode can read, one branch per line with its value.
+    nodeNames = netlist.nodeNames + ["GND"]    # Node ID -1 (GND) reads the last name
+    lines = []
+    for startID, compName, compVal, endID in zip(netlist.startIDs.tolist(), netlist.compNames, netlist.compVals.tolist(), netlist.endIDs.tolist()):
+        startNode, endNode = nodeNames[startID], nodeNames[endID]
+        lines.append("%s %s=%r %s\n" %(startNode, compName, compVal, endNode))
+        if len(lines) >= 10000:
+            file.write("".join(lines))
+            lines = []
+    file.write("".join(lines))
+#END def writeNetlist()